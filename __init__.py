@@ -32,6 +32,9 @@ classes = (
     operator.ONESHOT_OT_reconstruct_monitor,
     operator.ONESHOT_OT_import_colmap_model,
     operator.ONESHOT_OT_stop_process,
+    operator.ONESHOT_OT_spawn_camera_from_frustums,
+    operator.ONESHOT_OT_load_full_resolution_images,
+    operator.ONESHOT_OT_video_proxy_monitor,
     operator.ONESHOT_OT_optimise_scene, # New operator
 )
 
@@ -6,7 +6,9 @@ from .importers.point_importer import PointImporter
 from .importers.mesh_importer import MeshImporter
 from .blender_utility.object_utility import add_collection
 from .blender_utility.logging_utility import log_report
+from .opengl.utility import set_merged_draw_mode
 from .types.camera import Camera
+from .types.camera_poses import apply_similarity_transform_to_cameras
 
 # Assuming GeneralOptions is not found and thus omitted from inheritance
 # If GeneralOptions is meant to be a mixin for settings, its properties will be copied by the __init__ method.
@@ -40,6 +42,7 @@ class ColmapImportController(CameraImporter, PointImporter, MeshImporter):
         self.import_cameras = True
         self.add_background_image_for_each_camera = True # From PhotogrammetrySettings
         self.add_background_images = True # Mapped for CameraImporter
+        self.share_camera_data = True # From PhotogrammetrySettings
         self.add_image_plane_for_each_camera = False # From PhotogrammetrySettings
         self.add_image_planes = False # Mapped for CameraImporter
         self.add_image_plane_emission = True # From CameraImporter
@@ -69,6 +72,9 @@ class ColmapImportController(CameraImporter, PointImporter, MeshImporter):
         self.import_mesh = False # From PhotogrammetrySettings
         self.add_mesh_color_emission = True # From MeshImporter
         self.adjust_clipping_distance = False # From PhotogrammetrySettings
+        self.merge_opengl_point_clouds = False # From PhotogrammetrySettings
+        self.compress_opengl_point_data = False # From PhotogrammetrySettings
+        self.remove_outlier_points = False # From PhotogrammetrySettings
 
         # FloatProperty
         self.initial_camera_extent = 1.0 # From PhotogrammetrySettings
@@ -76,8 +82,15 @@ class ColmapImportController(CameraImporter, PointImporter, MeshImporter):
         self.image_plane_transparency = 0.5 # From CameraImporter
         self.depth_map_default_color = (0.0, 1.0, 0.0) # From CameraImporter
         self.point_radius = 0.05 # From PointImporter
+        self.outlier_radius = 0.0 # From PhotogrammetrySettings
+        self.voxel_size = 0.01 # From PhotogrammetrySettings
 
         # EnumProperty
+        self.camera_display_mode = "OBJECTS" # From PhotogrammetrySettings
+        self.background_image_resolution = "HALF" # From PhotogrammetrySettings
+        self.undistorted_image_transfer_mode = "AUTO" # From PhotogrammetrySettings
+        self.voxel_downsampling_mode = "NONE" # From PhotogrammetrySettings
+        self.point_geometry_mode = "REALIZED_INSTANCES" # From PointImporter
         self.interpolation_type = 'LINEAR' # Default from EnumProperty items
         self.animation_frame_source = 'ORIGINAL' # From CameraImporter
         self.image_fp_type = Camera.IMAGE_FP_TYPE_NAME # From CameraImporter
@@ -86,6 +99,9 @@ class ColmapImportController(CameraImporter, PointImporter, MeshImporter):
         self.point_cloud_display_sparsity = 1 # From PhotogrammetrySettings
         self.initial_point_size = 5 # From PhotogrammetrySettings
         self.point_size = 5 # Mapped for PointImporter
+        self.opengl_point_budget = 3000000 # From PhotogrammetrySettings
+        self.outlier_min_neighbors = 3 # From PhotogrammetrySettings
+        self.voxel_point_budget = 1000000 # From PhotogrammetrySettings
         self.depth_map_display_sparsity = 10 # From CameraImporter
         self.number_interpolation_frames = 0 # From CameraImporter
         self.default_width = -1 # From CameraImporter
@@ -162,11 +178,19 @@ def import_colmap_scene(reconstruction_folder_path, settings):
 
         reconstruction_collection = add_collection("Reconstruction Collection")
 
+        # Depth maps (cameras) and points share the OpenGL draw mode
+        set_merged_draw_mode(getattr(controller, 'merge_opengl_point_clouds', False))
+
         # Call import methods on the controller instance, conditioned by settings
+        # Import the points first, so the cameras can be shifted consistently
+        # with the (optionally) centered points
+        points_transform = None
+        if getattr(controller, 'import_points', False):
+            points_transform = controller.import_photogrammetry_points(points, reconstruction_collection)
         if getattr(controller, 'import_cameras', False):
+            if points_transform is not None:
+                apply_similarity_transform_to_cameras(cameras, points_transform)
             controller.import_photogrammetry_cameras(cameras, reconstruction_collection)
-        if getattr(controller, 'import_points', False):
-            controller.import_photogrammetry_points(points, reconstruction_collection)
         if getattr(controller, 'import_mesh', False) and mesh_ifp:
             controller.import_photogrammetry_mesh(mesh_ifp, reconstruction_collection)
 
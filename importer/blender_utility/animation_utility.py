@@ -0,0 +1,275 @@
+import numpy as np
+import bpy
+from ..utility.pose_utility import compute_quaternion_rotation_matrices
+
+
+def _get_fcurves(id_data):
+    animation_data = id_data.animation_data
+    if animation_data is None or animation_data.action is None:
+        return None
+    return animation_data.action.fcurves
+
+
+def _sample_property(id_data, data_path, frames, num_components=None):
+    """Sample an (optionally animated) property for all frames at once.
+
+    Components without fcurve use the current (static) value of the property.
+    Returns an array with shape (len(frames), num_components) or, if
+    :code:`num_components` is None, with shape (len(frames),).
+    """
+    fcurves = _get_fcurves(id_data)
+    static_value = getattr(id_data, data_path)
+    is_scalar = num_components is None
+    if is_scalar:
+        static_value = [static_value]
+        num_components = 1
+    values = np.empty((len(frames), num_components), dtype=np.float64)
+    for index in range(num_components):
+        fcurve = None
+        if fcurves is not None:
+            fcurve = fcurves.find(data_path, index=0 if is_scalar else index)
+        if fcurve is None:
+            values[:, index] = static_value[index]
+        else:
+            values[:, index] = [fcurve.evaluate(frame) for frame in frames]
+    if is_scalar:
+        return values[:, 0]
+    return values
+
+
+def make_quaternions_continuous(quaternions):
+    """Flip the signs of quaternions to avoid interpolation discontinuities.
+
+    Since q and -q represent the same rotation, the sign of each quaternion
+    is chosen such that the dot product with its predecessor is
+    non-negative (i.e. the interpolation takes the shortest path).
+    """
+    quaternions = np.array(quaternions, dtype=np.float64).reshape(-1, 4)
+    if len(quaternions) < 2:
+        return quaternions
+    dots = np.einsum("nc,nc->n", quaternions[:-1], quaternions[1:])
+    # The sign of a quaternion depends on the flips of all its predecessors
+    signs = np.cumprod(np.where(dots < 0, -1.0, 1.0))
+    quaternions[1:] *= signs[:, np.newaxis]
+    return quaternions
+
+
+def add_fcurve_keyframes(
+    id_data,
+    data_path,
+    frames,
+    values,
+    interpolation_type=None,
+    action_group="",
+):
+    """Add the keyframes of an (array) property with a single call per fcurve.
+
+    In contrast to :code:`keyframe_insert()`, which adds a single keyframe
+    (and updates the fcurve) per call, the keyframe points of each fcurve
+    are allocated and set at once. The values must be provided as array with
+    shape (len(frames),) or (len(frames), num_components).
+    """
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32).reshape(len(frames), -1)
+    animation_data = id_data.animation_data_create()
+    if animation_data.action is None:
+        animation_data.action = bpy.data.actions.new(id_data.name + "Action")
+    fcurves = animation_data.action.fcurves
+    coords = np.empty((len(frames), 2), dtype=np.float32)
+    coords[:, 0] = frames
+    fcurve_list = []
+    for index in range(values.shape[1]):
+        fcurve = fcurves.find(data_path, index=index)
+        if fcurve is None:
+            fcurve = fcurves.new(
+                data_path, index=index, action_group=action_group
+            )
+        num_existing_points = len(fcurve.keyframe_points)
+        fcurve.keyframe_points.add(len(frames))
+        coords[:, 1] = values[:, index]
+        if num_existing_points == 0:
+            fcurve.keyframe_points.foreach_set("co", coords.ravel())
+        else:
+            for keyframe_point, co in zip(
+                fcurve.keyframe_points[num_existing_points:], coords
+            ):
+                keyframe_point.co = co
+        if interpolation_type is not None:
+            for keyframe_point in fcurve.keyframe_points:
+                keyframe_point.interpolation = interpolation_type
+        # Sort the keyframe points and recompute the handles
+        fcurve.update()
+        fcurve_list.append(fcurve)
+    return fcurve_list
+
+
+def _compute_axis_rotation_matrices(axis, angles):
+    cos = np.cos(angles)
+    sin = np.sin(angles)
+    matrices = np.zeros((len(angles), 3, 3), dtype=np.float64)
+    i, j = [(1, 2), (0, 2), (0, 1)][axis]
+    matrices[:, axis, axis] = 1
+    matrices[:, i, i] = cos
+    matrices[:, j, j] = cos
+    # The rotation around y has the opposite sign convention
+    sign = -1 if axis == 1 else 1
+    matrices[:, i, j] = -sign * sin
+    matrices[:, j, i] = sign * sin
+    return matrices
+
+
+def _compute_euler_rotation_matrices(eulers, rotation_mode):
+    # An order like "XYZ" means that x is applied first, i.e. R = Rz Ry Rx
+    rotation_matrices = np.broadcast_to(np.identity(3), (len(eulers), 3, 3))
+    for axis_name in rotation_mode:
+        axis = "XYZ".index(axis_name)
+        rotation_matrices = (
+            _compute_axis_rotation_matrices(axis, eulers[:, axis])
+            @ rotation_matrices
+        )
+    return rotation_matrices
+
+
+def _compute_perspective_projection_matrices(
+    lenses, shifts_x, shifts_y, camera_data, width, height
+):
+    """Compute the projection matrices like Blender's camera parameters.
+
+    See BKE_camera_params_compute_viewplane() and perspective_m4().
+    """
+    render = bpy.context.scene.render
+    aspect_x = render.pixel_aspect_x
+    aspect_y = render.pixel_aspect_y
+    y_correction = aspect_y / aspect_x
+
+    sensor_fit = camera_data.sensor_fit
+    if sensor_fit == "VERTICAL":
+        sensor_size = camera_data.sensor_height
+    else:
+        sensor_size = camera_data.sensor_width
+    if sensor_fit == "AUTO":
+        if aspect_x * width >= aspect_y * height:
+            sensor_fit = "HORIZONTAL"
+        else:
+            sensor_fit = "VERTICAL"
+
+    if sensor_fit == "HORIZONTAL":
+        view_factor = width
+    else:
+        view_factor = y_correction * height
+    clip_start = camera_data.clip_start
+    clip_end = camera_data.clip_end
+    pixel_sizes = sensor_size * clip_start / lenses / view_factor
+
+    x_min = (-0.5 * width + shifts_x * view_factor) * pixel_sizes
+    x_max = (0.5 * width + shifts_x * view_factor) * pixel_sizes
+    y_min = (-0.5 * y_correction * height + shifts_y * view_factor) * (
+        pixel_sizes
+    )
+    y_max = (0.5 * y_correction * height + shifts_y * view_factor) * (
+        pixel_sizes
+    )
+
+    projection_matrices = np.zeros((len(lenses), 4, 4), dtype=np.float64)
+    projection_matrices[:, 0, 0] = 2 * clip_start / (x_max - x_min)
+    projection_matrices[:, 1, 1] = 2 * clip_start / (y_max - y_min)
+    projection_matrices[:, 0, 2] = (x_max + x_min) / (x_max - x_min)
+    projection_matrices[:, 1, 2] = (y_max + y_min) / (y_max - y_min)
+    projection_matrices[:, 2, 2] = -(clip_end + clip_start) / (
+        clip_end - clip_start
+    )
+    projection_matrices[:, 2, 3] = (
+        -2 * clip_start * clip_end / (clip_end - clip_start)
+    )
+    projection_matrices[:, 3, 2] = -1
+    return projection_matrices
+
+
+class CameraPoseEvaluator:
+    """Class that evaluates the animation of a camera for many frames.
+
+    Instead of changing the current frame of the scene (which evaluates the
+    dependency graph of the whole scene), the fcurves of the camera's
+    location, rotation, scale and lens / shift values are sampled directly.
+    Use :code:`can_evaluate()` to check if the camera's pose depends only on
+    these fcurves.
+    """
+
+    def __init__(self, cam):
+        self._cam = cam
+
+    @staticmethod
+    def can_evaluate(cam):
+        """Return whether the pose of the camera can be sampled directly."""
+        if cam.constraints or cam.rotation_mode == "AXIS_ANGLE":
+            return False
+        for id_data in [cam, cam.data]:
+            animation_data = id_data.animation_data
+            if animation_data is not None and animation_data.drivers:
+                return False
+        parent = cam.parent
+        while parent is not None:
+            if parent.animation_data is not None or parent.constraints:
+                return False
+            parent = parent.parent
+        return True
+
+    def compute_matrices_world(self, frames):
+        """Return the world matrices of the camera as (n, 4, 4) array."""
+        cam = self._cam
+        locations = _sample_property(cam, "location", frames, 3)
+        scales = _sample_property(cam, "scale", frames, 3)
+        if cam.rotation_mode == "QUATERNION":
+            rotation_matrices = compute_quaternion_rotation_matrices(
+                _sample_property(cam, "rotation_quaternion", frames, 4)
+            )
+        else:
+            rotation_matrices = _compute_euler_rotation_matrices(
+                _sample_property(cam, "rotation_euler", frames, 3),
+                cam.rotation_mode,
+            )
+        matrices_basis = np.zeros((len(frames), 4, 4), dtype=np.float64)
+        matrices_basis[:, 0:3, 0:3] = rotation_matrices * scales[:, None, :]
+        matrices_basis[:, 0:3, 3] = locations
+        matrices_basis[:, 3, 3] = 1
+        if cam.parent is None:
+            return matrices_basis
+        parent_matrix = np.array(cam.parent.matrix_world) @ np.array(
+            cam.matrix_parent_inverse
+        )
+        return parent_matrix @ matrices_basis
+
+    def compute_lens_and_shift_values(self, frames):
+        """Return the lens, shift_x and shift_y values of the camera."""
+        cam_data = self._cam.data
+        return (
+            _sample_property(cam_data, "lens", frames),
+            _sample_property(cam_data, "shift_x", frames),
+            _sample_property(cam_data, "shift_y", frames),
+        )
+
+    def compute_projection_matrices(self, frames, width, height):
+        """Return the projection matrices of the camera as (n, 4, 4) array."""
+        cam = self._cam
+        if cam.data.type != "PERSP":
+            # Only the parameters of perspective cameras are sampled
+            projection_matrix = np.array(
+                cam.calc_matrix_camera(
+                    bpy.context.evaluated_depsgraph_get(), x=width, y=height
+                )
+            )
+            return np.broadcast_to(projection_matrix, (len(frames), 4, 4))
+        lenses, shifts_x, shifts_y = self.compute_lens_and_shift_values(
+            frames
+        )
+        return _compute_perspective_projection_matrices(
+            lenses, shifts_x, shifts_y, cam.data, width, height
+        )
+
+    def compute_perspective_matrices(self, frames, width, height):
+        """Return the matrices mapping world coordinates to clip space."""
+        view_matrices = np.linalg.inv(self.compute_matrices_world(frames))
+        return (
+            self.compute_projection_matrices(frames, width, height)
+            @ view_matrices
+        )
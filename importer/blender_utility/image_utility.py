@@ -1,16 +1,121 @@
 import os
+import numpy as np
 import bpy
 
 
+def create_image_lazy(image_name, width, height):
+    """Return the Blender image with the given name and size.
+
+    The image is created (or scaled) only if required.
+    """
+    if image_name not in bpy.data.images:
+        image = bpy.data.images.new(image_name, width, height)
+    else:
+        image = bpy.data.images[image_name]
+        if image.size[0] != width or image.size[1] != height:
+            image.scale(width, height)
+    return image
+
+
+# Custom property of proxy images storing the path of the original image
+FULL_RESOLUTION_FP_PROPERTY = "full_resolution_fp"
+
+
+def load_image_proxy(image_fp, proxy_fp):
+    """Load a downscaled copy of an image as Blender image.
+
+    The image is named like the original image and remembers its path, so
+    the original image can be loaded later with
+    :code:`load_full_resolution_image()`.
+    """
+    image = bpy.data.images.load(proxy_fp)
+    image.name = os.path.basename(image_fp)
+    image[FULL_RESOLUTION_FP_PROPERTY] = image_fp
+    return image
+
+
+def load_full_resolution_image(image):
+    """Replace the pixels of a proxy image with the original image.
+
+    Returns False, if the image is not a proxy. Since the image data block
+    is kept, all users (e.g. background images and image plane materials)
+    show the full resolution image.
+    """
+    if FULL_RESOLUTION_FP_PROPERTY not in image:
+        return False
+    image.filepath = image[FULL_RESOLUTION_FP_PROPERTY]
+    del image[FULL_RESOLUTION_FP_PROPERTY]
+    image.reload()
+    return True
+
+
+def get_object_images(obj):
+    """Return the background images of a camera or the textures of a mesh."""
+    images = []
+    if obj.type == "CAMERA":
+        for background_image in obj.data.background_images:
+            if background_image.image is not None:
+                images.append(background_image.image)
+    for material_slot in obj.material_slots:
+        material = material_slot.material
+        if material is None or material.node_tree is None:
+            continue
+        for node in material.node_tree.nodes:
+            if node.type == "TEX_IMAGE" and node.image is not None:
+                images.append(node.image)
+    return images
+
+
+def copy_pixels_to_image(pixels, image):
+    """Copy an uint8 RGBA array (with bottom-up row order) to an image."""
+    # Use foreach_set() to avoid the creation of a Python float per value
+    image.pixels.foreach_set(
+        (np.asarray(pixels, dtype=np.float32) / 255.0).ravel()
+    )
+
+
+# https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.file_format
+_EXTENSION_TO_FILE_FORMAT = {
+    ".bmp": "BMP",
+    ".png": "PNG",
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".exr": "OPEN_EXR",
+    ".hdr": "HDR",
+    ".tif": "TIFF",
+    ".tiff": "TIFF",
+}
+
+
+def get_image_file_format(file_path):
+    """Return the Blender file format corresponding to the file extension."""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    assert file_ext in _EXTENSION_TO_FILE_FORMAT, file_ext
+    return _EXTENSION_TO_FILE_FORMAT[file_ext]
+
+
+def save_pixels_to_disk(image_name, pixels, file_path, save_alpha=True):
+    """Save an uint8 RGBA array (with bottom-up row order) with Blender.
+
+    In contrast to :code:`save_image_to_disk()`, the image is saved directly
+    (i.e. without changing and restoring the render settings of the scene).
+    """
+    file_format = get_image_file_format(file_path)
+    if not save_alpha:
+        pixels = np.array(pixels, dtype=np.uint8)
+        pixels[:, :, 3] = 255
+    height, width = pixels.shape[0:2]
+    image = create_image_lazy(image_name, width, height)
+    copy_pixels_to_image(pixels, image)
+    image.filepath_raw = file_path
+    image.file_format = file_format
+    image.save()
+
+
 def save_image_to_disk(image_name, file_path, save_alpha=True):
     """Save a Blender image to disk."""
 
-    file_ext = os.path.splitext(file_path)[1]
-    # https://docs.blender.org/api/current/bpy.types.Image.html#bpy.types.Image.file_format
-    file_format = file_ext[1:].upper()
-    if file_format == "JPG":
-        file_format = "JPEG"
-    assert file_format in ["BPM", "PNG", "JPEG", "OPEN_EXR", "HDR", "TIFF"]
+    file_format = get_image_file_format(file_path)
 
     scene = bpy.context.scene
     settings = scene.render.image_settings
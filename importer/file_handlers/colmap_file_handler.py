@@ -11,6 +11,8 @@ from ..ext.read_write_model import (
 )
 
 from ..types.camera import Camera
+from ..types.camera_poses import CameraPoses
+from ..types.camera_set import CameraSet
 from ..types.point import Point
 from ..file_handlers.utility import (
     check_radial_distortion,
@@ -110,14 +112,16 @@ class ColmapFileHandler:
         #   BaseImage = collections.namedtuple(
         #       "Image", ["id", "qvec", "tvec", "camera_id", "name", "xys", "point3D_ids"])
 
-        cameras = []
-        for col_image in id_to_col_images.values():
-            current_camera = Camera()
+        col_images = list(id_to_col_images.values())
+        # Convert the poses of all images at once
+        poses = CameraPoses.from_quaternions_and_translation_vecs(
+            [col_image.qvec for col_image in col_images],
+            [col_image.tvec for col_image in col_images],
+        )
+        cameras = CameraSet(poses)
+        for index, col_image in enumerate(col_images):
+            current_camera = cameras[index]
             current_camera.id = col_image.id
-            current_camera.set_rotation_with_quaternion(col_image.qvec)
-            current_camera.set_camera_translation_vector_after_rotation(
-                col_image.tvec
-            )
 
             current_camera.image_fp_type = image_fp_type
             current_camera.image_dp = image_dp
@@ -174,7 +178,6 @@ class ColmapFileHandler:
                     Camera.DEPTH_MAP_WRT_CANONICAL_VECTORS,
                     shift_depth_map_to_pixel_center=False,
                 )
-            cameras.append(current_camera)
         return cameras
 
     @staticmethod
@@ -1,4 +1,8 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..file_handlers.image_size_cache import ImageSizeCache
+from ..utility.os_utility import get_cache_dp
 from ..blender_utility.logging_utility import log_report
 
 
@@ -7,12 +11,14 @@ class ImageFileHandler:
 
     PILImage = None
 
-    @classmethod
-    def read_image_size(
-        cls, image_ifp, default_width, default_height, op=None
-    ):
-        """Read image size from disk."""
+    # Persistent cache of the image sizes (see read_image_sizes())
+    _image_size_cache = None
 
+    # File extensions of the formats written with write_image()
+    WRITABLE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp"]
+
+    @classmethod
+    def _import_pil(cls):
         if cls.PILImage is None:
             try:
                 from PIL import Image as _PILImage
@@ -20,13 +26,74 @@ class ImageFileHandler:
                 cls.PILImage = _PILImage
             except ImportError:
                 pass
+        return cls.PILImage is not None
+
+    @classmethod
+    def _get_image_size_cache(cls):
+        if cls._image_size_cache is None:
+            cache_ifp = None
+            try:
+                cache_ifp = os.path.join(get_cache_dp(), "image_sizes.json")
+            except OSError:
+                pass
+            cls._image_size_cache = ImageSizeCache(cache_ifp)
+        return cls._image_size_cache
 
-        if cls.PILImage is not None and os.path.isfile(image_ifp):
+    @classmethod
+    def _probe_image_size(cls, image_ifp, cache):
+        # Returns the size and the stat result (if the cache must be updated)
+        try:
+            stat_result = os.stat(image_ifp)
+        except OSError:
+            return None, None
+        size = cache.get(image_ifp, stat_result)
+        if size is not None or cls.PILImage is None:
+            return size, None
+        try:
             # This does NOT load the data into memory -> should be fast!
-            image = cls.PILImage.open(image_ifp)
-            width, height = image.size
-            success = True
-        elif default_width > 0 and default_height > 0:
+            with cls.PILImage.open(image_ifp) as image:
+                size = image.size
+        except OSError:
+            return None, None
+        return size, stat_result
+
+    @classmethod
+    def read_image_sizes(cls, image_ifps, max_workers=None):
+        """Read the sizes of many images from disk.
+
+        Only the image headers are read, using a pool of threads (which
+        hides the latency of network file systems). The sizes are cached
+        persistently, i.e. unchanged images are not opened again by later
+        imports. Returns a list with a (width, height) tuple (or None, if the
+        size could not be determined) for each image.
+        """
+        cls._import_pil()
+        cache = cls._get_image_size_cache()
+        cache.load()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda image_ifp: cls._probe_image_size(image_ifp, cache),
+                    image_ifps,
+                )
+            )
+        sizes = []
+        for image_ifp, (size, stat_result) in zip(image_ifps, results):
+            if stat_result is not None:
+                cache.set(image_ifp, stat_result, size)
+            sizes.append(size)
+        cache.save()
+        return sizes
+
+    @classmethod
+    def get_default_image_size(
+        cls, image_ifp, default_width, default_height, op=None
+    ):
+        """Return the default size for an image that could not be read.
+
+        Reports an error, if the default values are invalid.
+        """
+        if default_width > 0 and default_height > 0:
             width = default_width
             height = default_height
             log_report(
@@ -80,3 +147,61 @@ class ImageFileHandler:
             height = None
             success = False
         return success, width, height
+
+    @classmethod
+    def can_write_image(cls, image_ofp):
+        """Return whether :code:`write_image()` supports the file format."""
+        ext = os.path.splitext(image_ofp)[1].lower()
+        return ext in cls.WRITABLE_EXTENSIONS and cls._import_pil()
+
+    @classmethod
+    def write_image(cls, image_ofp, pixels, save_alpha=True):
+        """Write an uint8 RGBA array (with top-down row order) to disk.
+
+        This does not require the Python GIL for the actual encoding, i.e.
+        several images can be written in parallel using threads.
+        """
+        assert cls.can_write_image(image_ofp)
+        ext = os.path.splitext(image_ofp)[1].lower()
+        if save_alpha and ext in [".png", ".tif", ".tiff"]:
+            image = cls.PILImage.fromarray(pixels, mode="RGBA")
+        else:
+            image = cls.PILImage.fromarray(pixels[:, :, 0:3], mode="RGB")
+        image.save(image_ofp)
+
+    @classmethod
+    def can_read_image(cls):
+        """Return whether images can be read (i.e. Pillow is installed)."""
+        return cls._import_pil()
+
+    @classmethod
+    def write_downscaled_image(cls, image_ifp, image_ofp, scale, quality=90):
+        """Write a copy of an image reduced by an integer factor as JPEG.
+
+        For JPEG images, the decoder already reduces the resolution (draft
+        mode), i.e. the full resolution image is never decoded. Like
+        :code:`write_image()`, this can be called from several threads.
+        """
+        assert cls.can_read_image()
+        with cls.PILImage.open(image_ifp) as image:
+            width, height = image.size
+            size = (max(width // scale, 1), max(height // scale, 1))
+            image.draft("RGB", size)
+            image = image.convert("RGB")
+            if image.size != size:
+                image = image.resize(size, cls.PILImage.BILINEAR)
+        # Write to a temporary file first, so that an interrupted write never
+        # leaves a truncated image behind. The name is unique per process and
+        # thread, since concurrent imports may create the same proxy.
+        tmp_ofp = "%s.tmp%d_%d" % (
+            image_ofp,
+            os.getpid(),
+            threading.get_ident(),
+        )
+        try:
+            image.save(tmp_ofp, format="JPEG", quality=quality)
+            os.replace(tmp_ofp, image_ofp)
+        except BaseException:
+            if os.path.isfile(tmp_ofp):
+                os.remove(tmp_ofp)
+            raise
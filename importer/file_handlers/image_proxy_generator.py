@@ -0,0 +1,76 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from ..file_handlers.image_file_handler import ImageFileHandler
+from ..utility.os_utility import get_cache_dp
+
+
+class ImageProxyGenerator:
+    """Class that creates downscaled copies (proxies) of images.
+
+    The proxies are written by a pool of background threads into a cache
+    directory, i.e. the proxies of all images can be requested at once and
+    are created while the caller continues. The proxy files are keyed by a
+    hash of the source path, file size, modification time and scale, so
+    unchanged images are not processed again by later imports.
+    """
+
+    def __init__(self, scale, max_workers=None, cache_dp=None):
+        assert scale > 1
+        self._scale = scale
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        if cache_dp is None:
+            cache_dp = get_cache_dp("image_proxies")
+        self._cache_dp = cache_dp
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_proxy_ifp(self, image_ifp):
+        """Return the path of the proxy of an image (or None if missing)."""
+        try:
+            stat_result = os.stat(image_ifp)
+        except OSError:
+            return None
+        key = "|".join(
+            [
+                os.path.abspath(image_ifp),
+                str(stat_result.st_size),
+                str(stat_result.st_mtime_ns),
+                str(self._scale),
+            ]
+        )
+        proxy_stem = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self._cache_dp, proxy_stem + ".jpg")
+
+    def _create_proxy(self, image_ifp):
+        proxy_ifp = self.get_proxy_ifp(image_ifp)
+        if proxy_ifp is None:
+            return None
+        if not os.path.isfile(proxy_ifp):
+            try:
+                ImageFileHandler.write_downscaled_image(
+                    image_ifp, proxy_ifp, self._scale
+                )
+            except Exception:
+                # Unsupported formats (e.g. EXR) or images rejected by Pillow
+                # (e.g. decompression bombs) use the original image
+                return None
+        return proxy_ifp
+
+    def submit(self, image_ifp):
+        """Request the proxy of an image.
+
+        Returns a future, whose result is the path of the proxy or None (if
+        the proxy could not be created).
+        """
+        return self._executor.submit(self._create_proxy, image_ifp)
+
+    def close(self):
+        """Cancel pending requests and shut down the threads."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
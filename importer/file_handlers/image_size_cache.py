@@ -0,0 +1,69 @@
+import json
+import os
+
+
+class ImageSizeCache:
+    """Class that stores the sizes of image files persistently.
+
+    The entries are keyed by the path of the image and are only valid, if
+    the file size and the modification time of the image did not change.
+    If no cache file is provided, the entries are kept in memory only.
+    """
+
+    def __init__(self, cache_ifp=None):
+        self._cache_ifp = cache_ifp
+        self._entries = None
+        self._modified = False
+
+    def load(self):
+        """Load the entries from disk (if not already loaded)."""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if self._cache_ifp is None or not os.path.isfile(self._cache_ifp):
+            return
+        try:
+            with open(self._cache_ifp, "r") as cache_file:
+                self._entries = json.load(cache_file)
+        except (OSError, ValueError):
+            # Ignore corrupted cache files, they are replaced on save()
+            self._entries = {}
+
+    def get(self, image_ifp, stat_result):
+        """Return the cached (width, height) of the image or None."""
+        self.load()
+        entry = self._entries.get(image_ifp)
+        if entry is None:
+            return None
+        file_size, mtime_ns, width, height = entry
+        if (
+            file_size != stat_result.st_size
+            or mtime_ns != stat_result.st_mtime_ns
+        ):
+            return None
+        return width, height
+
+    def set(self, image_ifp, stat_result, size):
+        """Store the (width, height) of the image."""
+        self.load()
+        width, height = size
+        entry = [stat_result.st_size, stat_result.st_mtime_ns, width, height]
+        if self._entries.get(image_ifp) != entry:
+            self._entries[image_ifp] = entry
+            self._modified = True
+
+    def save(self):
+        """Write the entries to disk (if they have been modified)."""
+        if self._cache_ifp is None or not self._modified:
+            return
+        # Replace the cache file atomically, so concurrent imports never
+        # read a partially written file
+        tmp_ifp = self._cache_ifp + ".tmp" + str(os.getpid())
+        try:
+            with open(tmp_ifp, "w") as cache_file:
+                json.dump(self._entries, cache_file)
+            os.replace(tmp_ifp, self._cache_ifp)
+            self._modified = False
+        except OSError:
+            if os.path.isfile(tmp_ifp):
+                os.remove(tmp_ifp)
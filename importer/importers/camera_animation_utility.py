@@ -1,15 +1,17 @@
 import os
-import shutil
-from collections import namedtuple
+import numpy as np
 import bpy
-from mathutils import Quaternion
-from mathutils import Matrix
 from ..blender_utility.logging_utility import log_report
+from ..blender_utility.animation_utility import (
+    add_fcurve_keyframes,
+    make_quaternions_continuous,
+)
+from ..utility.pose_utility import compute_rotation_matrix_quaternions
 
 from ..importers.camera_utility import (
     add_camera_object,
     compute_principal_point_shift,
-    compute_camera_matrix_world,
+    compute_camera_matrices_world,
 )
 
 from ..blender_utility.object_utility import add_obj
@@ -17,30 +19,29 @@ from ..blender_utility.object_utility import add_obj
 from ..utility.os_utility import (
     get_image_file_paths_in_dir,
 )
+from ..utility.file_transfer_utility import FileSequenceManifest
+from ..utility.timing_utility import StopWatch
 
 from ..types.camera import Camera
 
 
-_CameraIntrinsics = namedtuple(
-    "CameraIntrinsics", "field_of_view shift_x shift_y"
-)
-
-
 class _NonReconstructedCamera(Camera):
     """Class to distuingish reconstructed and non-reconstructed cameras."""
 
-    pass
+    __slots__ = ()
 
 
 def _enhance_cameras_with_non_reconstructed_cameras(
     cameras, image_dp, image_fp_type, op=None
 ):
-    rec_image_relative_fp = []
+    # The cameras may be given as CameraSet, which has a fixed size
+    cameras = list(cameras)
+    rec_image_relative_fp = set()
     for camera in cameras:
         if camera.has_undistorted_absolute_fp():
-            rec_image_relative_fp.append(camera.get_undistorted_relative_fp())
+            rec_image_relative_fp.add(camera.get_undistorted_relative_fp())
         else:
-            rec_image_relative_fp.append(camera.get_relative_fp())
+            rec_image_relative_fp.add(camera.get_relative_fp())
 
     # rec_image_relative_fp = [camera.get_relative_fp() for camera in cameras]
 
@@ -80,154 +81,76 @@ def _enhance_cameras_with_non_reconstructed_cameras(
     return cameras
 
 
-def _remove_quaternion_discontinuities(target_obj):
-
-    # the interpolation of quaternions may lead to discontinuities
-    # if the quaternions show different signs
-
-    # https://blender.stackexchange.com/questions/58866/keyframe-interpolation-instability
-    action = target_obj.animation_data.action
-
-    # quaternion curves
-    fqw = action.fcurves.find("rotation_quaternion", index=0)
-    fqx = action.fcurves.find("rotation_quaternion", index=1)
-    fqy = action.fcurves.find("rotation_quaternion", index=2)
-    fqz = action.fcurves.find("rotation_quaternion", index=3)
-
-    # invert quaternion so that interpolation takes the shortest path
-    if len(fqw.keyframe_points) > 0:
-        current_quat = Quaternion(
-            (
-                fqw.keyframe_points[0].co[1],
-                fqx.keyframe_points[0].co[1],
-                fqy.keyframe_points[0].co[1],
-                fqz.keyframe_points[0].co[1],
-            )
-        )
-
-        for i in range(len(fqw.keyframe_points) - 1):
-            last_quat = current_quat
-            current_quat = Quaternion(
-                (
-                    fqw.keyframe_points[i + 1].co[1],
-                    fqx.keyframe_points[i + 1].co[1],
-                    fqy.keyframe_points[i + 1].co[1],
-                    fqz.keyframe_points[i + 1].co[1],
-                )
-            )
-
-            if last_quat.dot(current_quat) < 0:
-                current_quat.negate()
-                fqw.keyframe_points[i + 1].co[1] = -fqw.keyframe_points[
-                    i + 1
-                ].co[1]
-                fqx.keyframe_points[i + 1].co[1] = -fqx.keyframe_points[
-                    i + 1
-                ].co[1]
-                fqy.keyframe_points[i + 1].co[1] = -fqy.keyframe_points[
-                    i + 1
-                ].co[1]
-                fqz.keyframe_points[i + 1].co[1] = -fqz.keyframe_points[
-                    i + 1
-                ].co[1]
-
-
-def _set_fcurve_interpolation(some_obj, interpolation_type="LINEAR"):
-
-    # interpolation_string: ['CONSTANT', 'LINEAR', 'BEZIER', 'SINE',
-    # 'QUAD', 'CUBIC', 'QUART', 'QUINT', 'EXPO', 'CIRC',
-    # 'BACK', 'BOUNCE', 'ELASTIC']
-    fcurves = some_obj.animation_data.action.fcurves
-    for fcurve in fcurves:
-        for kf in fcurve.keyframe_points:
-            kf.interpolation = interpolation_type
-
-
 def _add_transformation_animation(
     animated_obj_name,
-    transformations_sorted,
-    number_interpolation_frames,
+    frames,
+    matrices_world,
     interpolation_type=None,
     remove_rotation_discontinuities=True,
     op=None,
 ):
     log_report("INFO", "Adding transformation animation: ...", op)
-
-    scene = bpy.context.scene
-    scene.frame_start = 0
-    step_size = number_interpolation_frames + 1
-    scene.frame_end = step_size * len(transformations_sorted)
     animated_obj = bpy.data.objects[animated_obj_name]
 
-    for index, transformation in enumerate(transformations_sorted):
-        # log_report('INFO', 'index: ' + str(index), op)
-        # log_report('INFO', 'transformation: ' + str(transformation), op)
-
-        current_keyframe_index = (index + 1) * step_size
-
-        if transformation is None:
-            continue
-
-        animated_obj.matrix_world = Matrix(transformation)
-
-        animated_obj.keyframe_insert(
-            data_path="location", index=-1, frame=current_keyframe_index
-        )
-
-        # Don't use euler rotations, they show too many discontinuties
-        # animated_obj.keyframe_insert(
-        #   data_path="rotation_euler",
-        #   index=-1,
-        #   frame=current_keyframe_index)
-
-        animated_obj.rotation_mode = "QUATERNION"
-        animated_obj.keyframe_insert(
-            data_path="rotation_quaternion",
-            index=-1,
-            frame=current_keyframe_index,
+    # Don't use euler rotations, they show too many discontinuties
+    animated_obj.rotation_mode = "QUATERNION"
+    locations = matrices_world[:, 0:3, 3]
+    quaternions = compute_rotation_matrix_quaternions(
+        matrices_world[:, 0:3, 0:3]
+    )
+    if remove_rotation_discontinuities:
+        # q and -q represent the same rotation, the interpolation of
+        # quaternions with different signs leads to discontinuities
+        # https://blender.stackexchange.com/questions/58866/keyframe-interpolation-instability
+        quaternions = make_quaternions_continuous(quaternions)
+
+    for data_path, values in [
+        ("location", locations),
+        ("rotation_quaternion", quaternions),
+    ]:
+        add_fcurve_keyframes(
+            animated_obj,
+            data_path,
+            frames,
+            values,
+            interpolation_type=interpolation_type,
+            action_group="Object Transforms",
         )
 
-        if remove_rotation_discontinuities:
-            # q and -q represent the same rotation
-            _remove_quaternion_discontinuities(animated_obj)
+    log_report("INFO", "Adding transformation animation: Done", op)
 
-        if interpolation_type is not None:
-            _set_fcurve_interpolation(animated_obj, interpolation_type)
 
-    log_report("INFO", "Adding transformation animation: Done", op)
+def _get_sensor_size(camera_data):
+    # See BKE_camera_sensor_size()
+    if camera_data.sensor_fit == "VERTICAL":
+        return camera_data.sensor_height
+    return camera_data.sensor_width
 
 
 def _add_camera_intrinsics_animation(
     animated_obj_name,
-    intrinsics_sorted,
-    number_interpolation_frames,
+    frames,
+    fields_of_view,
+    shifts,
     op=None,
 ):
 
     log_report("INFO", "Adding camera intrinsic parameter animation: ...", op)
 
-    step_size = number_interpolation_frames + 1
-    animated_obj = bpy.data.objects[animated_obj_name]
-
-    for index, intrinsics in enumerate(intrinsics_sorted):
-        current_keyframe_index = (index + 1) * step_size
-
-        if intrinsics is None:
-            continue
-
-        animated_obj.data.angle = intrinsics.field_of_view
-        animated_obj.data.shift_x = intrinsics.shift_x
-        animated_obj.data.shift_y = intrinsics.shift_y
-
-        animated_obj.data.keyframe_insert(
-            data_path="lens", index=-1, frame=current_keyframe_index
-        )
-        animated_obj.data.keyframe_insert(
-            data_path="shift_x", index=-1, frame=current_keyframe_index
-        )
-        animated_obj.data.keyframe_insert(
-            data_path="shift_y", index=-1, frame=current_keyframe_index
-        )
+    camera_data = bpy.data.objects[animated_obj_name].data
+    # Convert the field of view to the lens value like setting
+    # camera_data.angle (see fov_to_focallength())
+    lenses = (
+        _get_sensor_size(camera_data)
+        / 2
+        / np.tan(np.asarray(fields_of_view, dtype=np.float64) / 2)
+    )
+    for data_path, values in [
+        ("lens", lenses),
+        ("shift_x", shifts[:, 0]),
+        ("shift_y", shifts[:, 1]),
+    ]:
+        add_fcurve_keyframes(camera_data, data_path, frames, values)
 
     log_report("INFO", "Adding camera intrinsic parameter animation: Done", op)
 
@@ -243,15 +166,24 @@ def _get_reorganized_file_name(cam, common_prefix, op=None):
     return reorganized_fn
 
 
-def _reorganize_undistorted_images(cameras_sorted, op):
-    """Reorganize the undistorted images in the workspace."""
-
+def _reorganize_undistorted_images(
+    cameras_sorted, transfer_mode="AUTO", op=None
+):
+    """Reorganize the undistorted images in the workspace.
+
+    The reorganized directory contains a (renamed) reflink, hard link or copy
+    of each image (see :code:`transfer_file()`). If the transfer mode is
+    :code:`SYMLINK`, the directory is a virtual sequence consisting of
+    symbolic links to the original files. Unchanged files of previous
+    imports are reused.
+    """
     log_report(
         "WARNING",
         "Writing (renamed) undistorted images to a single folder in the"
         " workspace!",
         op,
     )
+    stop_watch = StopWatch()
 
     common_prefix = os.path.commonprefix(
         [
@@ -268,15 +200,21 @@ def _reorganize_undistorted_images(cameras_sorted, op):
         "WARNING", f"Reorganized directory: {reorganized_undistorted_dp}", op
     )
 
-    if not os.path.isdir(reorganized_undistorted_dp):
-        os.mkdir(reorganized_undistorted_dp)
-
+    source_fps = {}
     for cam in cameras_sorted:
         reorganized_fn = _get_reorganized_file_name(cam, common_prefix)
-        reorganized_fp = os.path.join(
-            reorganized_undistorted_dp, reorganized_fn
-        )
-        shutil.copyfile(cam.get_undistorted_absolute_fp(), reorganized_fp)
+        source_fps[reorganized_fn] = cam.get_undistorted_absolute_fp()
+    manifest = FileSequenceManifest(reorganized_undistorted_dp)
+    num_transferred, num_skipped, num_removed = manifest.update(
+        source_fps, transfer_mode=transfer_mode
+    )
+    log_report(
+        "INFO",
+        f"Reorganized images: {num_transferred} written, {num_skipped}"
+        f" unchanged, {num_removed} removed (Duration:"
+        f" {stop_watch.get_elapsed_time()} s)",
+        op,
+    )
 
     first_cam = cameras_sorted[0]
     first_fn = _get_reorganized_file_name(first_cam, common_prefix)
@@ -286,7 +224,11 @@ def _reorganize_undistorted_images(cameras_sorted, op):
 
 
 def _add_background_image_sequence(
-    cam_obj, cameras_sorted, reorganize_undistorted_images, op=None
+    cam_obj,
+    cameras_sorted,
+    reorganize_undistorted_images,
+    undistorted_image_transfer_mode="AUTO",
+    op=None,
 ):
     # https://docs.blender.org/api/current/bpy.types.CameraBackgroundImage.html
     camera_data = bpy.data.objects[cam_obj.name].data
@@ -299,7 +241,9 @@ def _add_background_image_sequence(
         reorganize_undistorted_images
         and first_cam.has_undistorted_absolute_fp()
     ):
-        dp, first_fn = _reorganize_undistorted_images(cameras_sorted, op)
+        dp, first_fn = _reorganize_undistorted_images(
+            cameras_sorted, undistorted_image_transfer_mode, op
+        )
     else:
         first_cam = cameras_sorted[0]
         dp = os.path.dirname(first_cam.get_absolute_fp())
@@ -338,6 +282,7 @@ def add_camera_animation(
     animation_frame_source="ORIGINAL",
     add_background_images=False,
     reorganize_undistorted_images=False,
+    undistorted_image_transfer_mode="AUTO",
     number_interpolation_frames=0,
     interpolation_type="LINEAR",
     remove_rotation_discontinuities=True,
@@ -367,7 +312,7 @@ def add_camera_animation(
 
     # Using the first reconstructed camera as template for the animated camera.
     # The values are adjusted with _add_transformation_animation() and
-    # add_camera_intrinsics_animation().
+    # _add_camera_intrinsics_animation().
     some_cam = cameras[0]
     cam_obj = add_camera_object(
         some_cam, "Animated Camera", parent_collection, copy_matrix_world=False
@@ -380,28 +325,35 @@ def add_camera_animation(
         ),
     )
 
-    transformations_sorted = []
-    camera_intrinsics_sorted = []
-    for camera in cameras_sorted:
-        if isinstance(camera, _NonReconstructedCamera):
-            matrix_world = None
-            camera_intrinsics = None
-        else:
-            matrix_world = compute_camera_matrix_world(camera)
-            shift_x, shift_y = compute_principal_point_shift(
+    # Non-reconstructed cameras are considered by leaving a gap in the
+    # keyframes
+    step_size = number_interpolation_frames + 1
+    scene = bpy.context.scene
+    scene.frame_start = 0
+    scene.frame_end = step_size * len(cameras_sorted)
+    frames = []
+    reconstructed_cameras = []
+    for index, camera in enumerate(cameras_sorted):
+        if not isinstance(camera, _NonReconstructedCamera):
+            frames.append((index + 1) * step_size)
+            reconstructed_cameras.append(camera)
+    fields_of_view = [
+        camera.get_field_of_view() for camera in reconstructed_cameras
+    ]
+    shifts = np.array(
+        [
+            compute_principal_point_shift(
                 camera, relativ_to_largest_extend=True
             )
-            camera_intrinsics = _CameraIntrinsics(
-                camera.get_field_of_view(), shift_x, shift_y
-            )
-
-        transformations_sorted.append(matrix_world)
-        camera_intrinsics_sorted.append(camera_intrinsics)
+            for camera in reconstructed_cameras
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 2)
 
     _add_transformation_animation(
         animated_obj_name=cam_obj.name,
-        transformations_sorted=transformations_sorted,
-        number_interpolation_frames=number_interpolation_frames,
+        frames=frames,
+        matrices_world=compute_camera_matrices_world(reconstructed_cameras),
         interpolation_type=interpolation_type,
         remove_rotation_discontinuities=remove_rotation_discontinuities,
         op=op,
@@ -409,14 +361,19 @@ def add_camera_animation(
 
     _add_camera_intrinsics_animation(
         animated_obj_name=cam_obj.name,
-        intrinsics_sorted=camera_intrinsics_sorted,
-        number_interpolation_frames=number_interpolation_frames,
+        frames=frames,
+        fields_of_view=fields_of_view,
+        shifts=shifts,
         op=op,
     )
 
     if add_background_images:
         _add_background_image_sequence(
-            cam_obj, cameras_sorted, reorganize_undistorted_images, op
+            cam_obj,
+            cameras_sorted,
+            reorganize_undistorted_images,
+            undistorted_image_transfer_mode,
+            op,
         )
 
     log_report("INFO", "Adding Camera Animation: Done", op)
@@ -11,16 +11,21 @@ from bpy.props import (
 
 from ..importers.camera_utility import (
     add_cameras,
+    add_camera_frustums_as_mesh,
     adjust_render_settings_if_possible,
 )
 from ..importers.camera_animation_utility import (
     add_camera_animation,
 )
 from ..types.camera import Camera
+from ..file_handlers.image_file_handler import ImageFileHandler
 
 from ..blender_utility.logging_utility import log_report
 
 
+_BACKGROUND_IMAGE_SCALES = {"FULL": 1, "HALF": 2, "QUARTER": 4, "EIGHTH": 8}
+
+
 class CameraImporter:
     """Importer for cameras and corresponding image information."""
 
@@ -58,6 +63,18 @@ class CameraImporter:
     import_cameras: BoolProperty(
         name="Import Cameras", description="Import Cameras", default=True
     )
+    camera_display_mode: EnumProperty(
+        name="Camera Display Mode",
+        description="Represent the cameras with camera objects or with a "
+        "single mesh of frustum wireframes. The frustum mesh scales to "
+        "thousands of cameras, but supports no background images, image "
+        "planes or depth maps",
+        items=(
+            ("OBJECTS", "Camera Objects", "One camera object per image"),
+            ("FRUSTUM_MESH", "Frustum Mesh", "A single frustum mesh"),
+        ),
+        default="OBJECTS",
+    )
     default_width: IntProperty(
         name="Default Width",
         description="Width, which will be used used if corresponding "
@@ -97,6 +114,30 @@ class CameraImporter:
         "scene from a specific camera",
         default=True,
     )
+    share_camera_data: BoolProperty(
+        name="Share Camera Data",
+        description="Cameras with equal intrinsics (i.e. width, height, "
+        "focal length and principal point) share the same camera data. "
+        "Reduces the import time and the size of the blend file. Only "
+        "takes effect if background images are disabled (for large camera "
+        "sets, disable them or use the frustum mesh display mode)",
+        default=True,
+    )
+    background_image_resolution: EnumProperty(
+        name="Image Resolution",
+        description="Resolution of the background images and image plane "
+        "textures. Reduced resolutions use downscaled copies, which are "
+        "created in parallel during the import and cached for later "
+        "imports. Use 'Load Full Resolution Images' to switch selected "
+        "cameras to the original images",
+        items=[
+            ("FULL", "Full", "Use the original images"),
+            ("HALF", "Half", "Use images with half resolution"),
+            ("QUARTER", "Quarter", "Use images with a quarter resolution"),
+            ("EIGHTH", "Eighth", "Use images with an eighth resolution"),
+        ],
+        default="HALF",
+    )
     add_image_planes: BoolProperty(
         name="Add an Image Plane for each Camera",
         description="Add an Image Plane for each Camera - only for "
@@ -184,6 +225,26 @@ class CameraImporter:
         " workspace directory",
         default=True,
     )
+    undistorted_image_transfer_mode: EnumProperty(
+        name="Reorganized Images",
+        description="Determines how the reorganized images are written."
+        " Unchanged images of previous imports are reused",
+        items=(
+            (
+                "AUTO",
+                "Link or Copy",
+                "Use reflinks or hard links (if supported by the file"
+                " system), otherwise copy the images",
+            ),
+            ("COPY", "Copy", "Copy the images"),
+            (
+                "SYMLINK",
+                "Virtual Sequence",
+                "Use symbolic links to the original images (i.e. no copies)",
+            ),
+        ),
+        default="AUTO",
+    )
     number_interpolation_frames: IntProperty(
         name="Number of Frames Between two Reconstructed Cameras",
         description="The poses of the animated camera are interpolated",
@@ -296,8 +357,11 @@ class CameraImporter:
         import_camera_box = camera_box.box()
         import_camera_box.prop(self, "import_cameras")
         if self.import_cameras or draw_everything:
+            import_camera_box.prop(self, "camera_display_mode")
             import_camera_box.prop(self, "camera_extent")
             import_camera_box.prop(self, "add_background_images")
+            import_camera_box.prop(self, "share_camera_data")
+            import_camera_box.prop(self, "background_image_resolution")
 
             image_plane_box = import_camera_box.box()
             image_plane_box.prop(self, "add_image_planes")
@@ -324,6 +388,7 @@ class CameraImporter:
                 anim_box.prop(self, "add_animated_camera_background_images")
                 if reorganize_undistorted_images or draw_everything:
                     anim_box.prop(self, "reorganize_undistorted_images")
+                    anim_box.prop(self, "undistorted_image_transfer_mode")
             if self.animation_frame_source == "ADJUSTED" or draw_everything:
                 anim_box.prop(self, "number_interpolation_frames")
             anim_box.prop(self, "consider_missing_cameras_during_animation")
@@ -345,11 +410,49 @@ class CameraImporter:
     def set_image_size_of_cameras(self, cameras):
         """Set image size of cameras.
 
-        This function should be overwritten, if the image size is not part of
-        the reconstruction data (e.g. nvm file).
+        The sizes provided by the reconstruction data (e.g. Colmap's
+        cameras.bin) are kept. The sizes of the remaining cameras are read
+        from the (cached) image headers or set to the default width and
+        height.
         """
-        success = True
-        return cameras, success
+        missing_cameras = [
+            camera
+            for camera in cameras
+            if camera.width is None or camera.height is None
+        ]
+        if len(missing_cameras) == 0:
+            return cameras, True
+
+        log_report(
+            "INFO",
+            "Reading the image sizes of "
+            + str(len(missing_cameras))
+            + " cameras",
+            self,
+        )
+        sizes = ImageFileHandler.read_image_sizes(
+            [camera.get_absolute_fp() for camera in missing_cameras]
+        )
+        for camera, size in zip(missing_cameras, sizes):
+            if size is None:
+                # Falls back to the default values (and reports errors)
+                (
+                    success,
+                    width,
+                    height,
+                ) = ImageFileHandler.get_default_image_size(
+                    camera.get_absolute_fp(),
+                    self.default_width,
+                    self.default_height,
+                    op=self,
+                )
+                if not success:
+                    return cameras, False
+            else:
+                width, height = size
+            camera.width = width
+            camera.height = height
+        return cameras, True
 
     @staticmethod
     def _principal_points_initialized(cameras):
@@ -405,7 +508,14 @@ class CameraImporter:
         if self.adjust_render_settings:
             adjust_render_settings_if_possible(cameras, op=self)
 
-        if self.import_cameras:
+        if self.import_cameras and self.camera_display_mode == "FRUSTUM_MESH":
+            add_camera_frustums_as_mesh(
+                cameras,
+                parent_collection,
+                camera_scale=self.camera_extent,
+                op=self,
+            )
+        elif self.import_cameras:
             add_cameras(
                 cameras,
                 parent_collection,
@@ -419,6 +529,10 @@ class CameraImporter:
                 depth_map_default_color=self.depth_map_default_color,
                 depth_map_display_sparsity=self.depth_map_display_sparsity,
                 depth_map_id_or_name_str=self.depth_map_id_or_name_str,
+                share_camera_data=self.share_camera_data,
+                background_image_scale=_BACKGROUND_IMAGE_SCALES[
+                    self.background_image_resolution
+                ],
                 op=self,
             )
 
@@ -429,6 +543,7 @@ class CameraImporter:
                 animation_frame_source=self.animation_frame_source,
                 add_background_images=self.add_animated_camera_background_images,
                 reorganize_undistorted_images=self.reorganize_undistorted_images,
+                undistorted_image_transfer_mode=self.undistorted_image_transfer_mode,
                 number_interpolation_frames=self.number_interpolation_frames,
                 interpolation_type=self.interpolation_type,
                 remove_rotation_discontinuities=self.remove_rotation_discontinuities,
@@ -1,19 +1,25 @@
 import os
+import contextlib
 import bpy
 import colorsys
 import numpy as np
 from mathutils import Matrix
-from mathutils import Vector
 
 from ..types.camera import Camera
+from ..types.camera_poses import CameraPoses
+from ..types.camera_set import CameraSet
 from ..blender_utility.object_utility import (
     add_collection,
     add_obj,
 )
 
 from ..opengl.utility import draw_coords
+from ..file_handlers.image_file_handler import ImageFileHandler
+from ..file_handlers.image_proxy_generator import ImageProxyGenerator
+from ..blender_utility.image_utility import load_image_proxy
 from ..utility.timing_utility import StopWatch
 from ..utility.type_utility import is_int
+from ..utility.os_utility import get_existing_file_paths
 from ..blender_utility.logging_utility import log_report
 
 
@@ -86,17 +92,48 @@ def _add_camera_data(camera, camera_name):
     return bcamera
 
 
+def _get_camera_data_key(camera):
+    """Return a key reflecting the parameters of the camera data."""
+    p_x, p_y = camera.get_principal_point()
+    return (
+        camera.width,
+        camera.height,
+        camera.get_focal_length(),
+        p_x,
+        p_y,
+        camera.get_panoramic_type() if camera.is_panoramic() else None,
+    )
+
+
 def add_camera_object(
     camera,
     camera_name,
     camera_collection,
     copy_matrix_world=True,
     convert_coordinate_system=True,
+    camera_data_cache=None,
+    matrix_world=None,
 ):
-    """Add a camera as Blender object."""
-    bcamera = _add_camera_data(camera, camera_name)
+    """Add a camera as Blender object.
+
+    If a camera data cache (a dictionary) is provided, cameras with equal
+    intrinsics (i.e. width, height, focal length and principal point) share
+    the same camera data. A precomputed :code:`matrix_world` (see
+    :code:`compute_camera_matrices_world()`) avoids converting the pose of
+    each camera individually.
+    """
+    if camera_data_cache is None:
+        bcamera = _add_camera_data(camera, camera_name)
+    else:
+        camera_data_key = _get_camera_data_key(camera)
+        bcamera = camera_data_cache.get(camera_data_key)
+        if bcamera is None:
+            bcamera = _add_camera_data(camera, "Shared Camera")
+            camera_data_cache[camera_data_key] = bcamera
     camera_object = add_obj(bcamera, camera_name, camera_collection)
-    if copy_matrix_world:
+    if matrix_world is not None:
+        camera_object.matrix_world = Matrix(np.asarray(matrix_world).tolist())
+    elif copy_matrix_world:
         camera_object.matrix_world = compute_camera_matrix_world(
             camera, convert_coordinate_system
         )
@@ -128,6 +165,12 @@ def _get_camera_obj_gui_str(camera):
     return image_fp_suffix
 
 
+def _get_camera_image_path(camera):
+    if camera.has_undistorted_absolute_fp():
+        return camera.get_undistorted_absolute_fp()
+    return camera.get_absolute_fp()
+
+
 def invert_y_and_z_axis(input_matrix_or_vector):
     """Invert the y and z axis of a given matrix or vector.
 
@@ -142,39 +185,12 @@ def invert_y_and_z_axis(input_matrix_or_vector):
     return output_matrix_or_vector
 
 
-def _get_world_matrix_from_translation_and_rotation(translation_vec, rotation):
-    translation_vec_hom_coord = Vector(translation_vec).to_4d()
-    world_matrix = Matrix()
-    for row in range(3):
-        world_matrix[row][0:3] = rotation[row]
-
-    world_matrix.transpose()  # = Inverse rotation
-
-    # Camera position in world coordinates
-    camera_center_hom_coord = -(world_matrix @ translation_vec_hom_coord)
-    camera_center_hom_coord[3] = 1.0
-
-    world_matrix = world_matrix.copy()
-    world_matrix.col[
-        3
-    ] = camera_center_hom_coord  # Set translation to camera position
-    return world_matrix
-
-
 def compute_camera_matrix_world(camera, convert_coordinate_system=True):
     """Compute Blender's :code:`matrix_world` for a given camera."""
-    translation_vec = camera.get_translation_vec()
-    rotation_mat = camera.get_rotation_as_rotation_mat()
-    if convert_coordinate_system:
-        # Transform the camera coordinate system from computer vision camera
-        # coordinate frames to the computer vision camera coordinate frames.
-        # That is, rotate the camera matrix around the x axis by 180 degrees,
-        # i.e. invert the x and y axis.
-        rotation_mat = invert_y_and_z_axis(rotation_mat)
-        translation_vec = invert_y_and_z_axis(translation_vec)
-    return _get_world_matrix_from_translation_and_rotation(
-        translation_vec, rotation_mat
+    matrices_world = compute_camera_matrices_world(
+        [camera], convert_coordinate_system
     )
+    return Matrix(matrices_world[0].tolist())
 
 
 def get_calibration_mat(blender_camera, op=None):
@@ -287,9 +303,20 @@ def add_cameras(
     depth_map_default_color=(1.0, 0.0, 0.0),
     depth_map_display_sparsity=10,
     depth_map_id_or_name_str="",
+    share_camera_data=True,
+    background_image_scale=1,
     op=None,
 ):
-    """Add a set of reconstructed cameras to Blender's 3D view port."""
+    """Add a set of reconstructed cameras to Blender's 3D view port.
+
+    If :code:`share_camera_data` is True, cameras with equal intrinsics share
+    the same camera data. Since background images are part of the camera
+    data, this is not possible in combination with background images.
+
+    If :code:`background_image_scale` is larger than one, the background
+    images and image plane textures use copies of the images reduced by this
+    factor (see :code:`load_full_resolution_image()`).
+    """
     log_report("INFO", "Adding Cameras: ...", op)
     stop_watch = StopWatch()
     camera_collection = add_collection(
@@ -344,60 +371,180 @@ def add_cameras(
                         op,
                     )
 
-    # Adding cameras and image planes:
-    for index, camera in enumerate(cameras):
-
-        # camera_name = "Camera %d" % index     # original code
-        # Replace the camera name so it matches the image name (without extension)
-        blender_image_name_stem = _get_camera_obj_gui_str(camera)
-        camera_name = blender_image_name_stem + "_cam"
-        camera_object = add_camera_object(
-            camera, camera_name, camera_collection
-        )
-        camera_object.scale *= camera_scale
+    if share_camera_data and not add_background_images:
+        camera_data_cache = {}
+    else:
+        camera_data_cache = None
+        if share_camera_data:
+            # The background image is a property of the camera data, i.e.
+            # cameras with different images require separate data blocks
+            log_report(
+                "INFO",
+                "Camera data is not shared, since background images are"
+                " added (disable the background images or use the frustum"
+                " mesh display mode for large camera sets)",
+                op,
+            )
 
-        if not add_image_planes and not add_background_images:
-            continue
+    # Convert the poses of all cameras at once
+    matrices_world = compute_camera_matrices_world(
+        cameras, convert_camera_coordinate_system
+    )
 
-        if camera.has_undistorted_absolute_fp():
-            image_path = camera.get_undistorted_absolute_fp()
+    # Create the downscaled images in background threads, while the camera
+    # objects are added
+    proxy_generator = None
+    if (add_background_images or add_image_planes) and (
+        background_image_scale > 1
+    ):
+        if ImageFileHandler.can_read_image():
+            proxy_generator = ImageProxyGenerator(background_image_scale)
         else:
-            image_path = camera.get_absolute_fp()
-
-        if not os.path.isfile(image_path):
             log_report(
-                "WARNING", "Could not find image at " + str(image_path), op
+                "WARNING",
+                "Pillow is not installed, using full resolution images",
+                op,
             )
-            continue
-        else:
-            log_report("INFO", "Found image at " + str(image_path), op)
 
-        blender_image = bpy.data.images.load(image_path)
+    # The generator is closed (i.e. pending requests are cancelled), even if
+    # adding the cameras fails
+    with proxy_generator or contextlib.nullcontext():
+        proxy_futures = []
+        if proxy_generator is not None:
+            proxy_futures = [
+                proxy_generator.submit(_get_camera_image_path(camera))
+                for camera in cameras
+            ]
+
+        image_plane_requests = []
+        existing_image_paths = set()
+        if add_image_planes or add_background_images:
+            existing_image_paths = get_existing_file_paths(
+                [_get_camera_image_path(camera) for camera in cameras]
+            )
+
+        # Adding cameras and image planes:
+        for index, camera in enumerate(cameras):
+
+            # camera_name = "Camera %d" % index     # original code
+            # Replace the camera name so it matches the image name (without
+            # extension)
+            blender_image_name_stem = _get_camera_obj_gui_str(camera)
+            camera_name = blender_image_name_stem + "_cam"
+            camera_object = add_camera_object(
+                camera,
+                camera_name,
+                camera_collection,
+                camera_data_cache=camera_data_cache,
+                matrix_world=matrices_world[index],
+            )
+            camera_object.scale *= camera_scale
+
+            if not add_image_planes and not add_background_images:
+                continue
+
+            image_path = _get_camera_image_path(camera)
+            if image_path not in existing_image_paths:
+                log_report(
+                    "WARNING", "Could not find image at " + str(image_path), op
+                )
+                continue
+            else:
+                log_report("INFO", "Found image at " + str(image_path), op)
+
+            proxy_ifp = None
+            if proxy_generator is not None:
+                proxy_ifp = proxy_futures[index].result()
+            if proxy_ifp is None:
+                blender_image = bpy.data.images.load(image_path)
+            else:
+                blender_image = load_image_proxy(image_path, proxy_ifp)
+
+            if add_background_images:
+                load_background_image(blender_image, camera_name)
+
+            if add_image_planes and not camera.is_panoramic():
+                # The image planes are added at once (see below)
+                image_plane_requests.append(
+                    (
+                        camera,
+                        camera_object,
+                        blender_image,
+                        blender_image_name_stem,
+                    )
+                )
 
-        if add_background_images:
-            load_background_image(blender_image, camera_name)
+            if not add_depth_maps_as_point_cloud:
+                continue
+
+            if camera.get_depth_map_fp() is None:
+                continue
+
+            if depth_map_indices is not None:
+                if index not in depth_map_indices:
+                    continue
 
-        if add_image_planes and not camera.is_panoramic():
             # Group image plane and camera:
-            camera_image_plane_pair_collection_current = add_collection(
-                "Camera Image Plane Pair Collection %s"
-                % blender_image_name_stem,
-                camera_image_plane_pair_collection,
+            camera_depth_map_pair_collection_current = add_collection(
+                "Camera Depth Map Pair Collection %s"
+                % os.path.basename(camera.get_depth_map_fp()),
+                camera_depth_map_pair_collection,
             )
 
-            image_plane_name = blender_image_name_stem + "_image_plane"
+            depth_map_world_coords = camera.convert_depth_map_to_world_coords(
+                depth_map_display_sparsity=depth_map_display_sparsity
+            )
 
-            image_plane_obj = add_camera_image_plane(
-                camera_object.matrix_world,
-                blender_image,
-                camera=camera,
-                name=image_plane_name,
-                transparency=image_plane_transparency,
-                add_image_plane_emission=add_image_plane_emission,
-                image_planes_collection=image_planes_collection,
+            if use_default_depth_map_color:
+                color = depth_map_default_color
+            else:
+                color = _color_from_value(
+                    val=index, min_val=0, max_val=len(cameras)
+                )
+
+            depth_map_anchor_handle = draw_coords(
+                depth_map_world_coords,
+                color=color,
+                point_size=depth_map_point_size,
+                add_points_to_point_cloud_handle=True,
+                reconstruction_collection=depth_map_collection,
+                object_anchor_handle_name=_get_camera_obj_gui_str(camera)
+                + "_depth_point_cloud",
                 op=op,
             )
 
+            camera_depth_map_pair_collection_current.objects.link(
+                camera_object
+            )
+            camera_depth_map_pair_collection_current.objects.link(
+                depth_map_anchor_handle
+            )
+
+    if len(image_plane_requests) > 0:
+        (
+            plane_cameras,
+            plane_camera_objects,
+            plane_images,
+            plane_name_stems,
+        ) = zip(*image_plane_requests)
+        image_plane_objs = add_camera_image_planes(
+            plane_cameras,
+            [obj.matrix_world for obj in plane_camera_objects],
+            plane_images,
+            [name_stem + "_image_plane" for name_stem in plane_name_stems],
+            transparency=image_plane_transparency,
+            add_image_plane_emission=add_image_plane_emission,
+            image_planes_collection=image_planes_collection,
+            op=op,
+        )
+        for camera_object, image_plane_obj, name_stem in zip(
+            plane_camera_objects, image_plane_objs, plane_name_stems
+        ):
+            # Group image plane and camera:
+            camera_image_plane_pair_collection_current = add_collection(
+                "Camera Image Plane Pair Collection %s" % name_stem,
+                camera_image_plane_pair_collection,
+            )
             camera_image_plane_pair_collection_current.objects.link(
                 camera_object
             )
@@ -405,138 +552,379 @@ def add_cameras(
                 image_plane_obj
             )
 
-        if not add_depth_maps_as_point_cloud:
-            continue
-
-        if camera.get_depth_map_fp() is None:
-            continue
+    if camera_data_cache is not None:
+        log_report(
+            "INFO",
+            "Number of shared camera data blocks: "
+            + str(len(camera_data_cache)),
+            op,
+        )
+    log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
+    log_report("INFO", "Adding Cameras: Done", op)
 
-        if depth_map_indices is not None:
-            if index not in depth_map_indices:
-                continue
 
-        # Group image plane and camera:
-        camera_depth_map_pair_collection_current = add_collection(
-            "Camera Depth Map Pair Collection %s"
-            % os.path.basename(camera.get_depth_map_fp()),
-            camera_depth_map_pair_collection,
-        )
+def compute_camera_matrices_world(cameras, convert_coordinate_system=True):
+    """Compute Blender's :code:`matrix_world` for all cameras at once.
 
-        depth_map_world_coords = camera.convert_depth_map_to_world_coords(
-            depth_map_display_sparsity=depth_map_display_sparsity
-        )
-        depth_map_world_coords = depth_map_world_coords.tolist()
+    If :code:`convert_coordinate_system` is True, the computer vision camera
+    coordinate systems are converted to Blender's camera coordinate system
+    (i.e. the y and the z axis are inverted).
+    """
+    return CameraPoses.from_cameras(cameras).compute_matrices_world(
+        convert_coordinate_system
+    )
 
-        if use_default_depth_map_color:
-            color = depth_map_default_color
-        else:
-            color = _color_from_value(
-                val=index, min_val=0, max_val=len(cameras)
-            )
 
-        depth_map_anchor_handle = draw_coords(
-            depth_map_world_coords,
-            color=color,
-            point_size=depth_map_point_size,
-            add_points_to_point_cloud_handle=True,
-            reconstruction_collection=depth_map_collection,
-            object_anchor_handle_name=_get_camera_obj_gui_str(camera)
-            + "_depth_point_cloud",
-            op=op,
-        )
+def _compute_camera_intrinsics(cameras):
+    """Return the width, height, focal length and principal point."""
+    intrinsics = np.empty((len(cameras), 5), dtype=np.float64)
+    if isinstance(cameras, CameraSet):
+        intrinsics[:, 0] = cameras.widths
+        intrinsics[:, 1] = cameras.heights
+        intrinsics[:, 2] = cameras.get_focal_lengths()
+        intrinsics[:, 3:5] = cameras.get_principal_points()
+        return intrinsics
+    for index, camera in enumerate(cameras):
+        intrinsics[index, 0] = camera.width
+        intrinsics[index, 1] = camera.height
+        intrinsics[index, 2] = camera.get_focal_length()
+        intrinsics[index, 3:5] = camera.get_principal_point()
+    return intrinsics
 
-        camera_depth_map_pair_collection_current.objects.link(camera_object)
-        camera_depth_map_pair_collection_current.objects.link(
-            depth_map_anchor_handle
-        )
 
-    log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
-    log_report("INFO", "Adding Cameras: Done", op)
+# Each frustum consists of the camera center and the four image corners
+_FRUSTUM_EDGES = np.array(
+    [[0, 1], [0, 2], [0, 3], [0, 4], [1, 2], [2, 3], [3, 4], [4, 1]],
+    dtype=np.int32,
+)
 
 
-def add_camera_image_plane(
-    matrix_world,
-    blender_image,
-    camera,
-    name,
-    transparency,
-    add_image_plane_emission,
-    image_planes_collection,
+def add_camera_frustums_as_mesh(
+    cameras,
+    parent_collection,
+    camera_scale=1.0,
+    name="Camera Frustums",
     op=None,
 ):
-    """Add an image plane corresponding to a reconstructed camera."""
-    # log_report('INFO', 'add_camera_image_plane: ...', op)
-    # log_report('INFO', 'name: ' + str(name), op)
+    """Represent all cameras with a single mesh of frustum wireframes.
 
-    width = camera.width
-    height = camera.height
-    focal_length = camera.get_focal_length()
-
-    assert width is not None and height is not None
+    This scales to thousands of cameras, which would otherwise require one
+    camera object per image. The vertex attribute :code:`camera_index`
+    reflects the camera of each vertex. The camera poses and intrinsics are
+    stored in the object, which allows to create a camera object for a
+    specific frustum (see :code:`add_camera_object_from_frustums()`).
+    """
+    log_report("INFO", "Adding Camera Frustums: ...", op)
+    stop_watch = StopWatch()
+    num_cameras = len(cameras)
+    matrices_world = compute_camera_matrices_world(cameras)
+    intrinsics = _compute_camera_intrinsics(cameras)
+    widths, heights, focal_lengths, p_xs, p_ys = intrinsics.T
+
+    # Image corners w.r.t. the camera coordinate system used by Blender
+    # (i.e. the camera looks along the negative z axis)
+    zeros = np.zeros(num_cameras)
+    corner_us = np.stack([zeros, widths, widths, zeros], axis=1)
+    corner_vs = np.stack([zeros, zeros, heights, heights], axis=1)
+    local_coords = np.zeros((num_cameras, 5, 3), dtype=np.float64)
+    focal_lengths = focal_lengths[:, np.newaxis]
+    p_xs = p_xs[:, np.newaxis]
+    p_ys = p_ys[:, np.newaxis]
+    local_coords[:, 1:5, 0] = (corner_us - p_xs) / focal_lengths
+    local_coords[:, 1:5, 1] = -(corner_vs - p_ys) / focal_lengths
+    local_coords[:, 1:5, 2] = -1
+    local_coords *= camera_scale
+    world_coords = (
+        np.einsum("nij,nvj->nvi", matrices_world[:, 0:3, 0:3], local_coords)
+        + matrices_world[:, np.newaxis, 0:3, 3]
+    )
 
-    bpy.context.scene.render.engine = "CYCLES"
     mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(5 * num_cameras)
+    mesh.vertices.foreach_set(
+        "co", world_coords.astype(np.float32).ravel()
+    )
+    edges = _FRUSTUM_EDGES[np.newaxis, :, :] + 5 * np.arange(
+        num_cameras, dtype=np.int32
+    ).reshape(-1, 1, 1)
+    mesh.edges.add(len(_FRUSTUM_EDGES) * num_cameras)
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    camera_index_attribute = mesh.attributes.new(
+        name="camera_index", type="INT", domain="POINT"
+    )
+    camera_index_attribute.data.foreach_set(
+        "value", np.repeat(np.arange(num_cameras, dtype=np.int32), 5)
+    )
     mesh.update()
     mesh.validate()
 
-    plane_distance = 1.0  # Distance from camera position
-    # Right vector in view frustum at plane_distance:
-    right = Vector((1, 0, 0)) * (width / focal_length) * plane_distance
-    # Up vector in view frustum at plane_distance:
-    up = Vector((0, 1, 0)) * (height / focal_length) * plane_distance
-    # Camera view direction:
-    view_dir = -Vector((0, 0, 1)) * plane_distance
-    plane_center = view_dir
-
-    shift_x, shift_y = compute_principal_point_shift(
-        camera, relativ_to_largest_extend=False
-    )
-
-    corners = ((-0.5, -0.5), (+0.5, -0.5), (+0.5, +0.5), (-0.5, +0.5))
-    points = [
-        (plane_center + (c[0] + shift_x) * right + (c[1] + shift_y) * up)[0:3]
-        for c in corners
+    frustum_obj = add_obj(mesh, name, parent_collection)
+    frustum_obj["camera_matrices_world"] = matrices_world.ravel().tolist()
+    frustum_obj["camera_intrinsics"] = intrinsics.ravel().tolist()
+    frustum_obj["camera_names"] = [
+        _get_camera_obj_gui_str(camera) for camera in cameras
     ]
-    mesh.from_pydata(points, [], [[0, 1, 2, 3]])
-    mesh.uv_layers.new()
+    frustum_obj["camera_scale"] = camera_scale
 
-    # Add mesh to new image plane object:
-    mesh_obj = add_obj(mesh, name, image_planes_collection)
+    log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
+    log_report("INFO", "Adding Camera Frustums: Done", op)
+    return frustum_obj
+
+
+def is_camera_frustum_object(obj):
+    """Return whether the object has been created with the frustum mode."""
+    return obj is not None and "camera_matrices_world" in obj
+
+
+def get_selected_frustum_camera_index(frustum_obj):
+    """Return the camera index of the first selected vertex (or None)."""
+    if frustum_obj.mode == "EDIT":
+        # Synchronize the selection of the edit mode with the mesh data
+        frustum_obj.update_from_editmode()
+    mesh = frustum_obj.data
+    num_vertices = len(mesh.vertices)
+    is_selected = np.zeros(num_vertices, dtype=bool)
+    mesh.vertices.foreach_get("select", is_selected)
+    selected_indices = np.flatnonzero(is_selected)
+    if len(selected_indices) == 0:
+        return None
+    camera_indices = np.zeros(num_vertices, dtype=np.int32)
+    mesh.attributes["camera_index"].data.foreach_get("value", camera_indices)
+    return int(camera_indices[selected_indices[0]])
+
+
+def add_camera_object_from_frustums(
+    frustum_obj, camera_index, camera_collection=None
+):
+    """Add a camera object for a frustum of a frustum mesh object."""
+    intrinsics = np.array(frustum_obj["camera_intrinsics"]).reshape(-1, 5)
+    matrices_world = np.array(frustum_obj["camera_matrices_world"]).reshape(
+        -1, 4, 4
+    )
+    width, height, focal_length, p_x, p_y = intrinsics[camera_index]
+    camera = Camera()
+    camera.width = int(width)
+    camera.height = int(height)
+    camera.set_calibration(
+        Camera.compute_calibration_mat(focal_length, p_x, p_y),
+        radial_distortion=0,
+    )
+    if camera_collection is None:
+        camera_collection = frustum_obj.users_collection[0]
+    camera_name = frustum_obj["camera_names"][camera_index] + "_cam"
+    camera_object = add_camera_object(
+        camera, camera_name, camera_collection, copy_matrix_world=False
+    )
+    camera_object.matrix_world = Matrix(
+        matrices_world[camera_index].tolist()
+    )
+    camera_object.scale *= frustum_obj["camera_scale"]
+    return camera_object
 
-    image_plane_material = bpy.data.materials.new(name="image_plane_material")
-    # Adds "Principled BSDF" and a "Material Output" node
-    image_plane_material.use_nodes = True
 
-    nodes = image_plane_material.node_tree.nodes
-    links = image_plane_material.node_tree.links
+def _get_image_plane_node_group(transparency, add_image_plane_emission):
+    """Return the shader node group shared by the image plane materials."""
+    node_group_name = "Image Plane Shader (Alpha %.3f%s)" % (
+        transparency,
+        ", Emission" if add_image_plane_emission else "",
+    )
+    node_group = bpy.data.node_groups.get(node_group_name)
+    if node_group is not None:
+        return node_group
 
-    shader_node_tex_image = nodes.new(type="ShaderNodeTexImage")
-    shader_node_principled_bsdf = nodes.get("Principled BSDF")
+    node_group = bpy.data.node_groups.new(node_group_name, "ShaderNodeTree")
+    node_group.interface.new_socket(
+        name="Color", in_out="INPUT", socket_type="NodeSocketColor"
+    )
+    node_group.interface.new_socket(
+        name="Shader", in_out="OUTPUT", socket_type="NodeSocketShader"
+    )
+    nodes = node_group.nodes
+    links = node_group.links
+    group_input = nodes.new(type="NodeGroupInput")
+    group_output = nodes.new(type="NodeGroupOutput")
+    shader_node_principled_bsdf = nodes.new(type="ShaderNodeBsdfPrincipled")
     shader_node_principled_bsdf.inputs["Alpha"].default_value = transparency
 
     links.new(
-        shader_node_tex_image.outputs["Color"],
+        group_input.outputs["Color"],
         shader_node_principled_bsdf.inputs["Base Color"],
     )
-
     if add_image_plane_emission:
         links.new(
-            shader_node_tex_image.outputs["Color"],
+            group_input.outputs["Color"],
             shader_node_principled_bsdf.inputs["Emission Color"],
         )
+    links.new(
+        shader_node_principled_bsdf.outputs["BSDF"],
+        group_output.inputs["Shader"],
+    )
+    return node_group
 
-    shader_node_tex_image.image = blender_image
 
-    # Assign it to object
-    if mesh_obj.data.materials:
-        # assign to 1st material slot
-        mesh_obj.data.materials[0] = image_plane_material
-    else:
-        # no slots
-        mesh_obj.data.materials.append(image_plane_material)
+def _get_image_plane_material_template(
+    transparency, add_image_plane_emission
+):
+    """Return a material consisting of an image texture and the node group.
 
-    mesh_obj.matrix_world = matrix_world
-    mesh.update()
-    mesh.validate()
-    # log_report('INFO', 'add_camera_image_plane: Done', op)
-    return mesh_obj
\ No newline at end of file
+    The image plane materials are copies of this template, which differ only
+    in the image of the texture node.
+    """
+    node_group = _get_image_plane_node_group(
+        transparency, add_image_plane_emission
+    )
+    template_name = node_group.name + " Template"
+    template = bpy.data.materials.get(template_name)
+    if template is not None:
+        return template
+
+    template = bpy.data.materials.new(name=template_name)
+    # Adds "Principled BSDF" and a "Material Output" node
+    template.use_nodes = True
+    nodes = template.node_tree.nodes
+    links = template.node_tree.links
+    nodes.remove(nodes.get("Principled BSDF"))
+    material_output = nodes.get("Material Output")
+
+    shader_node_tex_image = nodes.new(type="ShaderNodeTexImage")
+    shader_node_tex_image.name = "Image Texture"
+    shader_node_group = nodes.new(type="ShaderNodeGroup")
+    shader_node_group.node_tree = node_group
+    links.new(
+        shader_node_tex_image.outputs["Color"],
+        shader_node_group.inputs["Color"],
+    )
+    links.new(
+        shader_node_group.outputs["Shader"],
+        material_output.inputs["Surface"],
+    )
+    # Keep the (unassigned) template when saving the file
+    template.use_fake_user = True
+    return template
+
+
+def _compute_image_plane_corners(cameras, plane_distance=1.0):
+    """Return the (n, 4, 3) image plane corners w.r.t. the cameras.
+
+    The planes are located in front of the cameras (i.e. along the negative
+    z axis of Blender's camera coordinate system) and are shifted according
+    to the principal points (see :code:`compute_principal_point_shift()`).
+    """
+    intrinsics = _compute_camera_intrinsics(cameras)
+    widths, heights, focal_lengths, p_xs, p_ys = intrinsics.T
+    shifts_x = (widths / 2.0 - p_xs) / widths
+    shifts_y = -(heights / 2.0 - p_ys) / heights
+    # Length of the right and the up vector of the view frustum at the plane
+    rights = widths / focal_lengths * plane_distance
+    ups = heights / focal_lengths * plane_distance
+
+    offsets = np.array(
+        [(-0.5, -0.5), (+0.5, -0.5), (+0.5, +0.5), (-0.5, +0.5)],
+        dtype=np.float64,
+    )
+    corners = np.empty((len(cameras), 4, 3), dtype=np.float64)
+    corners[:, :, 0] = (offsets[:, 0] + shifts_x[:, np.newaxis]) * rights[
+        :, np.newaxis
+    ]
+    corners[:, :, 1] = (offsets[:, 1] + shifts_y[:, np.newaxis]) * ups[
+        :, np.newaxis
+    ]
+    corners[:, :, 2] = -plane_distance
+    return corners
+
+
+# Vertex indices and texture coordinates of the (single) image plane face
+_IMAGE_PLANE_LOOP_VERTEX_INDICES = np.array([0, 1, 2, 3], dtype=np.int32)
+_IMAGE_PLANE_LOOP_UVS = np.array(
+    [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)], dtype=np.float32
+)
+
+
+def _add_image_plane_to_mesh(mesh, plane_corners):
+    """Add a quad with texture coordinates without creating Python lists."""
+    mesh.vertices.add(4)
+    mesh.vertices.foreach_set("co", plane_corners.ravel())
+    mesh.loops.add(4)
+    mesh.loops.foreach_set("vertex_index", _IMAGE_PLANE_LOOP_VERTEX_INDICES)
+    mesh.polygons.add(1)
+    mesh.polygons.foreach_set("loop_start", np.zeros(1, dtype=np.int32))
+    # Since Blender 4.0, the face sizes are derived from the loop starts
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set(
+            "loop_total", np.full(1, 4, dtype=np.int32)
+        )
+    uv_layer = mesh.uv_layers.new()
+    uv_layer.data.foreach_set("uv", _IMAGE_PLANE_LOOP_UVS.ravel())
+    mesh.update(calc_edges=True)
+
+
+def add_camera_image_planes(
+    cameras,
+    matrices_world,
+    blender_images,
+    names,
+    transparency,
+    add_image_plane_emission,
+    image_planes_collection,
+    op=None,
+):
+    """Add image planes corresponding to many reconstructed cameras.
+
+    The plane corners of all cameras are computed at once and copied to the
+    plane meshes with :code:`foreach_set()`. The materials are copies of a
+    template material (see :code:`_get_image_plane_material_template()`),
+    i.e. all planes share a single shader node group.
+    """
+    if len(cameras) == 0:
+        return []
+    for camera in cameras:
+        assert camera.width is not None and camera.height is not None
+
+    bpy.context.scene.render.engine = "CYCLES"
+    corners = _compute_image_plane_corners(cameras).astype(np.float32)
+    material_template = _get_image_plane_material_template(
+        transparency, add_image_plane_emission
+    )
+
+    image_plane_objs = []
+    for plane_corners, matrix_world, blender_image, name in zip(
+        corners, matrices_world, blender_images, names
+    ):
+        mesh = bpy.data.meshes.new(name)
+        _add_image_plane_to_mesh(mesh, plane_corners)
+
+        image_plane_material = material_template.copy()
+        image_plane_material.name = "image_plane_material"
+        image_plane_material.use_fake_user = False
+        tex_image_node = image_plane_material.node_tree.nodes["Image Texture"]
+        tex_image_node.image = blender_image
+        mesh.materials.append(image_plane_material)
+
+        # Add mesh to new image plane object:
+        mesh_obj = add_obj(mesh, name, image_planes_collection)
+        mesh_obj.matrix_world = matrix_world
+        image_plane_objs.append(mesh_obj)
+    return image_plane_objs
+
+
+def add_camera_image_plane(
+    matrix_world,
+    blender_image,
+    camera,
+    name,
+    transparency,
+    add_image_plane_emission,
+    image_planes_collection,
+    op=None,
+):
+    """Add an image plane corresponding to a reconstructed camera."""
+    return add_camera_image_planes(
+        [camera],
+        [matrix_world],
+        [blender_image],
+        [name],
+        transparency,
+        add_image_plane_emission,
+        image_planes_collection,
+        op,
+    )[0]
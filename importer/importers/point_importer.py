@@ -1,3 +1,4 @@
+import numpy as np
 import bpy
 
 from bpy.props import (
@@ -7,12 +8,16 @@ from bpy.props import (
     FloatProperty,
     FloatVectorProperty,
 )
-from ..opengl.utility import draw_points
+from ..opengl.utility import draw_coords_with_colors
+from ..opengl.octree import DEFAULT_MAX_POINTS_PER_NODE
 from ..importers.point_utility import (
-    add_points_as_mesh_vertices,
+    downsample_coords_with_voxel_grid,
+    remove_outlier_coords,
+    add_coords_as_mesh_vertices,
     add_points_as_object_with_particle_system,
 )
 from ..types.point import Point
+from ..utility.point_cloud_utility import center_coords
 
 
 class PointImporter:
@@ -28,6 +33,52 @@ class PointImporter:
         default=1,
         min=1,
     )
+    remove_outlier_points: BoolProperty(
+        name="Remove Outlier Points",
+        description="Remove points with few neighbors (e.g. floating points "
+        "of sparse reconstructions).",
+        default=False,
+    )
+    outlier_radius: FloatProperty(
+        name="Outlier Radius",
+        description="Radius used to count the neighbors of each point. A "
+        "value of 0 determines the radius from the point density.",
+        default=0.0,
+        min=0.0,
+    )
+    outlier_min_neighbors: IntProperty(
+        name="Outlier Min Neighbors",
+        description="Points with fewer neighbors are removed.",
+        default=3,
+        min=1,
+    )
+    voxel_downsampling_mode: EnumProperty(
+        name="Voxel Downsampling",
+        description="Reduce the number of points by averaging the "
+        "positions and colors of the points in each voxel.",
+        items=(
+            ("NONE", "None", "Keep all points"),
+            ("VOXEL_SIZE", "Voxel Size", "Use the given voxel size"),
+            (
+                "POINT_BUDGET",
+                "Point Budget",
+                "Choose the voxel size to reach the given number of points",
+            ),
+        ),
+        default="NONE",
+    )
+    voxel_size: FloatProperty(
+        name="Voxel Size",
+        description="Edge length of the voxels used for downsampling.",
+        default=0.01,
+        min=1e-6,
+    )
+    voxel_point_budget: IntProperty(
+        name="Downsampling Point Budget",
+        description="Maximum number of points after downsampling.",
+        default=1000000,
+        min=1,
+    )
     center_points: BoolProperty(
         name="Center Data Around Origin",
         description="Center data by subtracting the centroid. Useful for las/"
@@ -48,11 +99,31 @@ class PointImporter:
         "after saving and reloading the blend file.",
         default=True,
     )
+    compress_opengl_point_data: BoolProperty(
+        name="Compress Point Data",
+        description="Compress the point data stored in the point cloud "
+        "handle. Reduces the size of the blend file, but increases the time "
+        "to save and load it.",
+        default=False,
+    )
     point_size: IntProperty(
         name="Initial Point Size",
         description="Initial Point Size",
         default=5,
     )
+    opengl_point_budget: IntProperty(
+        name="Point Budget",
+        description="Maximum number of points drawn per redraw. Large point "
+        "clouds are drawn with a level of detail depending on the view",
+        default=3000000,
+        min=DEFAULT_MAX_POINTS_PER_NODE,
+    )
+    merge_opengl_point_clouds: BoolProperty(
+        name="Merge OpenGL Point Clouds",
+        description="Draw all OpenGL point clouds (e.g. many depth maps) "
+        "with a single draw callback using shared GPU buffers.",
+        default=False,
+    )
 
     # Option 2: Add Points as Mesh Object
     add_points_as_mesh_oject: BoolProperty(
@@ -67,6 +138,30 @@ class PointImporter:
         "with Blender's built-in renderers (Eevee / Cycles).",
         default=True,
     )
+    point_geometry_mode: EnumProperty(
+        name="Point Geometry",
+        description="Geometry used by the geometry nodes to represent the "
+        "points.",
+        items=(
+            (
+                "REALIZED_INSTANCES",
+                "Realized Instances",
+                "Create a copy of the sphere for each point",
+            ),
+            (
+                "INSTANCES",
+                "Instances",
+                "Instance a sphere on each point (memory efficient)",
+            ),
+            (
+                "POINTS",
+                "Points",
+                "Use a point cloud with a radius attribute (rendered as "
+                "spheres by Cycles)",
+            ),
+        ),
+        default="REALIZED_INSTANCES",
+    )
     point_radius: FloatProperty(
         name="Initial Point Radius",
         description="Initial point radius (can be changed in GUI).",
@@ -78,9 +173,9 @@ class PointImporter:
         default=1,
     )
     add_color_as_custom_property: BoolProperty(
-        name="Add Colors as Custom Property",
-        description="Use a custom property (named colors) to store the point "
-        "cloud colors.",
+        name="Add Colors as Color Attribute",
+        description="Use a color attribute (named point_color) of the mesh "
+        "to store the point cloud colors.",
         default=True,
     )
 
@@ -89,46 +184,109 @@ class PointImporter:
         point_box = layout.box()
         point_box.prop(self, "import_points")
         point_box.prop(self, "point_cloud_display_sparsity")
+        point_box.prop(self, "remove_outlier_points")
+        if self.remove_outlier_points or draw_everything:
+            point_box.prop(self, "outlier_radius")
+            point_box.prop(self, "outlier_min_neighbors")
+        point_box.prop(self, "voxel_downsampling_mode")
+        if self.voxel_downsampling_mode == "VOXEL_SIZE" or draw_everything:
+            point_box.prop(self, "voxel_size")
+        if self.voxel_downsampling_mode == "POINT_BUDGET" or draw_everything:
+            point_box.prop(self, "voxel_point_budget")
         point_box.prop(self, "center_points")
         if self.import_points or draw_everything:
             opengl_box = point_box.box()
             opengl_box.prop(self, "draw_points_with_gpu")
             if self.draw_points_with_gpu or draw_everything:
                 opengl_box.prop(self, "add_points_to_point_cloud_handle")
+                opengl_box.prop(self, "compress_opengl_point_data")
                 opengl_box.prop(self, "point_size")
+                opengl_box.prop(self, "opengl_point_budget")
+                opengl_box.prop(self, "merge_opengl_point_clouds")
             mesh_box = point_box.box()
             mesh_box.prop(self, "add_points_as_mesh_oject")
             if self.add_points_as_mesh_oject:
                 mesh_box.prop(self, "add_mesh_to_point_geometry_nodes")
+                mesh_box.prop(self, "point_geometry_mode")
                 mesh_box.prop(self, "point_radius")
                 mesh_box.prop(self, "point_subdivisions")
                 mesh_box.prop(self, "add_color_as_custom_property")
 
     def import_photogrammetry_points(self, points, reconstruction_collection):
-        """Import a point cloud using the properties of this class."""
+        """Import a point cloud using the properties of this class.
+
+        Returns the transform applied to the points (i.e. the centering
+        transform) or None.
+        """
+        transform = None
         if self.import_points:
-            if self.point_cloud_display_sparsity > 1:
-                points = points[:: self.point_cloud_display_sparsity]
+            # Thin out the points after removing the outliers, since the
+            # neighbor counts depend on the point density
+            sparsity = self.point_cloud_display_sparsity
+            if sparsity > 1 and not self.remove_outlier_points:
+                points = points[::sparsity]
 
+            # Convert the points once and process the arrays in place.
+            # Center the points in double precision, since they may be given
+            # w.r.t. a distant origin (e.g. geo-referenced data).
             if self.center_points:
-                points = Point.get_centered_points(points)
+                coords_dtype = np.float64
+            else:
+                coords_dtype = np.float32
+            coords, colors = Point.split_points_as_arrays(
+                points, coords_dtype=coords_dtype
+            )
+
+            if self.remove_outlier_points:
+                coords, colors = remove_outlier_coords(
+                    coords,
+                    colors,
+                    radius=self.outlier_radius or None,
+                    min_neighbors=self.outlier_min_neighbors,
+                    op=self,
+                )
+                if sparsity > 1:
+                    coords = coords[::sparsity].copy()
+                    colors = colors[::sparsity].copy()
+
+            if self.voxel_downsampling_mode == "VOXEL_SIZE":
+                coords, colors = downsample_coords_with_voxel_grid(
+                    coords, colors, voxel_size=self.voxel_size, op=self
+                )
+            elif self.voxel_downsampling_mode == "POINT_BUDGET":
+                coords, colors = downsample_coords_with_voxel_grid(
+                    coords,
+                    colors,
+                    point_budget=self.voxel_point_budget,
+                    op=self,
+                )
+
+            if self.center_points:
+                transform = center_coords(coords)
+                coords = coords.astype(np.float32)
 
             if self.draw_points_with_gpu:
-                draw_points(
-                    points,
+                draw_coords_with_colors(
+                    coords,
+                    colors,
                     self.point_size,
                     self.add_points_to_point_cloud_handle,
                     reconstruction_collection,
+                    point_budget=self.opengl_point_budget,
+                    compress_point_data=self.compress_opengl_point_data,
                     op=self,
                 )
 
             if self.add_points_as_mesh_oject:
-                add_points_as_mesh_vertices(
-                    points,
+                add_coords_as_mesh_vertices(
+                    coords,
+                    colors,
                     reconstruction_collection,
                     self.add_mesh_to_point_geometry_nodes,
                     self.point_radius,
                     self.point_subdivisions,
                     self.add_color_as_custom_property,
+                    self.point_geometry_mode,
                     op=self,
-                )
\ No newline at end of file
+                )
+        return transform
\ No newline at end of file
@@ -8,28 +8,99 @@ from ..blender_utility.object_utility import (
     add_obj,
 )
 from ..utility.timing_utility import StopWatch
+from ..utility.point_cloud_utility import (
+    compute_voxel_size_for_point_budget,
+    downsample_with_voxel_grid,
+    compute_outlier_mask,
+)
 from ..blender_utility.logging_utility import log_report
 
 
+def downsample_coords_with_voxel_grid(
+    coords, colors, voxel_size=None, point_budget=None, op=None
+):
+    """Downsample a point cloud by averaging the points of each voxel.
+
+    The coordinates and the colors must be provided as arrays (see
+    :code:`Point.split_points_as_arrays()`), the result is returned with the
+    same dtypes. If no voxel size is provided, the voxel size is chosen such
+    that the number of resulting points does not exceed the point budget.
+    """
+    log_report("INFO", "Downsampling points with voxel grid: ...", op)
+    stop_watch = StopWatch()
+    num_points = len(coords)
+    if num_points == 0:
+        return coords, colors
+    if voxel_size is None:
+        voxel_size = compute_voxel_size_for_point_budget(coords, point_budget)
+        if voxel_size is None:
+            log_report(
+                "INFO", "Number of points is already within budget", op
+            )
+            return coords, colors
+        log_report("INFO", "Adaptive voxel size: " + str(voxel_size), op)
+    coords, colors = downsample_with_voxel_grid(coords, colors, voxel_size)
+    log_report(
+        "INFO",
+        f"Reduced number of points from {num_points} to {len(coords)}",
+        op,
+    )
+    log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
+    log_report("INFO", "Downsampling points with voxel grid: Done", op)
+    return coords, colors
+
+
+def remove_outlier_coords(
+    coords, colors, radius=None, min_neighbors=3, op=None
+):
+    """Remove points with less than :code:`min_neighbors` neighbors.
+
+    The coordinates and the colors must be provided as arrays (see
+    :code:`Point.split_points_as_arrays()`). If no radius is provided, it is
+    determined from the point density.
+    """
+    log_report("INFO", "Removing outlier points: ...", op)
+    stop_watch = StopWatch()
+    num_points = len(coords)
+    if num_points == 0:
+        return coords, colors
+    inlier_mask = ~compute_outlier_mask(coords, radius, min_neighbors)
+    coords = coords[inlier_mask]
+    colors = colors[inlier_mask]
+    log_report(
+        "INFO",
+        f"Removed {num_points - len(coords)} of {num_points} points",
+        op,
+    )
+    log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
+    log_report("INFO", "Removing outlier points: Done", op)
+    return coords, colors
+
+
 def _copy_values_to_image(value_tripplets, image_name):
     """ Copy values to image pixels. """
     image = bpy.data.images[image_name]
-    # working on a copy of the pixels results in a MASSIVE performance speed
-    local_pixels = list(image.pixels[:])
-    for value_index, tripplet in enumerate(value_tripplets):
-        column_offset = value_index * 4  # (R,G,B,A)
-        # Order is R,G,B, opacity
-        local_pixels[column_offset] = tripplet[0]
-        local_pixels[column_offset + 1] = tripplet[1]
-        local_pixels[column_offset + 2] = tripplet[2]
-        # opacity (0 = transparent, 1 = opaque)
-        # local_pixels[column_offset + 3] = 1.0    # already set by default
-    image.pixels = local_pixels[:]
+    width, height = image.size
+    value_tripplets = np.asarray(value_tripplets, dtype=np.float32)
+    # Order is R,G,B, opacity (0 = transparent, 1 = opaque)
+    local_pixels = np.ones((width * height, 4), dtype=np.float32)
+    local_pixels[: len(value_tripplets), 0:3] = value_tripplets[:, 0:3]
+    # Using foreach_set avoids the creation of a Python float per value
+    image.pixels.foreach_set(local_pixels.ravel())
+
+
+def _compute_particle_color_texture_size(num_colors, max_texture_width=4096):
+    # Use a 2D layout, since the width of textures is limited
+    width = max(min(num_colors, max_texture_width), 1)
+    height = max(-(-num_colors // width), 1)
+    return width, height
 
 
 def _compute_particle_color_texture(colors, name="ParticleColor"):
-    # To view the texture we set the height of the texture to vis_image_height
-    image = bpy.data.images.new(name=name, width=len(colors), height=1)
+    # The color of the i-th particle is stored in the pixel with the
+    # coordinates (i % width, i // width)
+    width, height = _compute_particle_color_texture_size(len(colors))
+    image = bpy.data.images.new(name=name, width=width, height=height)
 
     _copy_values_to_image(colors, image.name)
     image = bpy.data.images[image.name]
@@ -38,6 +109,14 @@ def _compute_particle_color_texture(colors, name="ParticleColor"):
     return image
 
 
+def _add_math_node(node_tree, operation, input_socket, value):
+    math_node = node_tree.nodes.new("ShaderNodeMath")
+    math_node.operation = operation
+    node_tree.links.new(input_socket, math_node.inputs[0])
+    math_node.inputs[1].default_value = value
+    return math_node
+
+
 def _create_particle_color_nodes(
     node_tree, colors, particle_overwrite_color=None
 ):
@@ -58,35 +137,56 @@ def _create_particle_color_nodes(
             particle_color_node = node_tree.nodes.new("ShaderNodeTexImage")
 
         particle_color_node.image = _compute_particle_color_texture(colors)
-        texture_size = len(colors)
+        texture_width, texture_height = particle_color_node.image.size
         particle_color_node.interpolation = "Closest"
 
         particle_info_node = node_tree.nodes.new("ShaderNodeParticleInfo")
+        index_socket = particle_info_node.outputs["Index"]
 
-        # Idea: we use the particle idx to compute a texture coordinate
+        # Idea: we use the particle idx to compute a texture coordinate,
+        # i.e. u = (idx % width + 0.5) / width and
+        # v = (floor(idx / width) + 0.5) / height
 
-        # Shift the un-normalized texture coordinate by a half pixel
-        shift_half_pixel_node = node_tree.nodes.new("ShaderNodeMath")
-        shift_half_pixel_node.operation = "ADD"
+        # Compute the (un-normalized) pixel coordinates
+        column_node = _add_math_node(
+            node_tree, "MODULO", index_socket, texture_width
+        )
+        row_divide_node = _add_math_node(
+            node_tree, "DIVIDE", index_socket, texture_width
+        )
+        row_node = node_tree.nodes.new("ShaderNodeMath")
+        row_node.operation = "FLOOR"
         node_tree.links.new(
-            particle_info_node.outputs["Index"],
-            shift_half_pixel_node.inputs[0],
+            row_divide_node.outputs["Value"], row_node.inputs[0]
         )
-        shift_half_pixel_node.inputs[1].default_value = 0.5
 
-        # Compute normalized texture coordinates (value between 0 and 1)
-        # by dividing by the number of particles
-        divide_node = node_tree.nodes.new("ShaderNodeMath")
-        divide_node.operation = "DIVIDE"
-        node_tree.links.new(
-            shift_half_pixel_node.outputs["Value"], divide_node.inputs[0]
+        # Shift the un-normalized texture coordinates by a half pixel and
+        # compute normalized texture coordinates (values between 0 and 1)
+        shift_column_node = _add_math_node(
+            node_tree, "ADD", column_node.outputs["Value"], 0.5
+        )
+        u_node = _add_math_node(
+            node_tree,
+            "DIVIDE",
+            shift_column_node.outputs["Value"],
+            texture_width,
+        )
+        shift_row_node = _add_math_node(
+            node_tree, "ADD", row_node.outputs["Value"], 0.5
+        )
+        v_node = _add_math_node(
+            node_tree,
+            "DIVIDE",
+            shift_row_node.outputs["Value"],
+            texture_height,
         )
-        divide_node.inputs[1].default_value = texture_size
 
-        # Compute texture coordinate (x axis corresponds to particle idx)
         shader_node_combine = node_tree.nodes.new("ShaderNodeCombineXYZ")
         node_tree.links.new(
-            divide_node.outputs["Value"], shader_node_combine.inputs["X"]
+            u_node.outputs["Value"], shader_node_combine.inputs["X"]
+        )
+        node_tree.links.new(
+            v_node.outputs["Value"], shader_node_combine.inputs["Y"]
         )
         node_tree.links.new(
             shader_node_combine.outputs["Vector"],
@@ -183,13 +283,20 @@ def _add_particle_material(
         )
 
 
+def _add_vertices_to_mesh(mesh, coords):
+    """Add vertices to the mesh without creating Python objects per point."""
+    coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+    mesh.vertices.add(len(coords))
+    mesh.vertices.foreach_set("co", coords.ravel())
+    mesh.update()
+    mesh.validate()
+
+
 def _add_particle_system_obj(
     coords, particle_obj, point_cloud_obj_name, reconstruction_collection
 ):
     point_cloud_mesh = bpy.data.meshes.new(point_cloud_obj_name)
-    point_cloud_mesh.update()
-    point_cloud_mesh.validate()
-    point_cloud_mesh.from_pydata(coords, [], [])
+    _add_vertices_to_mesh(point_cloud_mesh, coords)
     point_cloud_obj = add_obj(
         point_cloud_mesh, point_cloud_obj_name, reconstruction_collection
     )
@@ -244,9 +351,8 @@ def add_points_as_object_with_particle_system(
         point_cloud_obj_name = f"Particle Point Cloud {i}"
 
         points_subset = points[i : i + max_number_particles]
-        coords, colors = Point.split_points(
-            points_subset, normalize_colors=True
-        )
+        coords, colors = Point.split_points_as_arrays(points_subset)
+        colors = colors[:, 0:3] / 255.0
 
         particle_obj = _add_particle_obj(
             colors,
@@ -286,6 +392,122 @@ def create_geometry_nodes_node_group():
     return node_group
 
 
+def _get_input_socket_identifier(node_group, socket_name):
+    if hasattr(node_group, "interface"):
+        for item in node_group.interface.items_tree:
+            if item.item_type == "SOCKET" and item.in_out == "INPUT":
+                if item.name == socket_name:
+                    return item.identifier
+    elif socket_name in node_group.inputs:
+        return node_group.inputs[socket_name].identifier
+    return None
+
+
+def _create_point_cloud_node_group(node_group, point_geometry_mode):
+    # The group_input and the group_output nodes are created by default
+    group_input = node_group.nodes["Group Input"]
+    group_output = node_group.nodes["Group Output"]
+
+    # Add modifier inputs that are editable from the GUI
+    create_interface_socket(
+        node_group, "Point Color", "INPUT", "NodeSocketMaterial"
+    )
+    create_interface_socket(
+        node_group, "Point Radius", "INPUT", "NodeSocketFloat"
+    )
+    if point_geometry_mode != "POINTS":
+        create_interface_socket(
+            node_group, "Point Subdivisions", "INPUT", "NodeSocketIntUnsigned"
+        )
+
+    # Note: To determine the name required for new(...), create the
+    # corresponding node with the gui and print the value of "bl_rna".
+    # Or enable python tooltips under preferences > interface and hover
+    # over a node in the add node dropdown
+    mesh_to_points = node_group.nodes.new("GeometryNodeMeshToPoints")
+    set_material = node_group.nodes.new("GeometryNodeSetMaterial")
+    node_group.links.new(
+        group_input.outputs["Geometry"], mesh_to_points.inputs["Mesh"]
+    )
+    node_group.links.new(
+        group_input.outputs["Point Color"], set_material.inputs["Material"]
+    )
+
+    if point_geometry_mode == "POINTS":
+        # Native point clouds are rendered as spheres by Cycles and require
+        # only a position and a radius per point
+        node_group.links.new(
+            group_input.outputs["Point Radius"],
+            mesh_to_points.inputs["Radius"],
+        )
+        node_group.links.new(
+            mesh_to_points.outputs["Points"], set_material.inputs["Geometry"]
+        )
+        node_group.links.new(
+            set_material.outputs["Geometry"], group_output.inputs["Geometry"]
+        )
+        return
+
+    instance_on_points = node_group.nodes.new("GeometryNodeInstanceOnPoints")
+    sphere_marker = node_group.nodes.new("GeometryNodeMeshIcoSphere")
+    node_group.links.new(
+        mesh_to_points.outputs["Points"],
+        instance_on_points.inputs["Points"],
+    )
+    node_group.links.new(
+        group_input.outputs["Point Radius"], sphere_marker.inputs["Radius"]
+    )
+    node_group.links.new(
+        group_input.outputs["Point Subdivisions"],
+        sphere_marker.inputs["Subdivisions"],
+    )
+    node_group.links.new(
+        sphere_marker.outputs["Mesh"], set_material.inputs["Geometry"]
+    )
+    node_group.links.new(
+        set_material.outputs["Geometry"],
+        instance_on_points.inputs["Instance"],
+    )
+
+    if point_geometry_mode == "REALIZED_INSTANCES":
+        realize_instances = node_group.nodes.new(
+            "GeometryNodeRealizeInstances"
+        )
+        node_group.links.new(
+            instance_on_points.outputs["Instances"],
+            realize_instances.inputs["Geometry"],
+        )
+        node_group.links.new(
+            realize_instances.outputs["Geometry"],
+            group_output.inputs["Geometry"],
+        )
+    else:
+        # Keeping the instances avoids copying the sphere for each point
+        node_group.links.new(
+            instance_on_points.outputs["Instances"],
+            group_output.inputs["Geometry"],
+        )
+
+
+def _get_point_cloud_node_group(point_geometry_mode):
+    """Return the point cloud node group of the current file.
+
+    The node group is created only once per mode and reused by later imports.
+    """
+    for node_group in bpy.data.node_groups:
+        if node_group.get("point_geometry_mode") == point_geometry_mode:
+            return node_group
+    # https://blender.stackexchange.com/questions/249763/python-geometry-node-trees
+    node_group = create_geometry_nodes_node_group()
+    mode_name = point_geometry_mode.replace("_", " ").title()
+    node_group.name = f"Point Cloud ({mode_name})"
+    # Remove the default link between the group input and the group output
+    node_group.links.clear()
+    _create_point_cloud_node_group(node_group, point_geometry_mode)
+    node_group["point_geometry_mode"] = point_geometry_mode
+    return node_group
+
+
 def add_points_as_mesh_vertices(
     points,
     reconstruction_collection,
@@ -293,111 +515,82 @@ def add_points_as_mesh_vertices(
     point_radius=0.05,
     point_subdivisions=1,
     add_color_as_custom_property=True,
+    point_geometry_mode="REALIZED_INSTANCES",
     op=None,
 ):
-    """Add a point cloud as mesh."""
+    """Add a point cloud as mesh.
+
+    The point geometry mode defines the output of the geometry nodes:
+    realized spheres (REALIZED_INSTANCES), instanced spheres (INSTANCES) or
+    a point cloud with a radius attribute (POINTS).
+    """
+    coords, colors = Point.split_points_as_arrays(points)
+    return add_coords_as_mesh_vertices(
+        coords,
+        colors,
+        reconstruction_collection,
+        add_mesh_to_point_geometry_nodes,
+        point_radius,
+        point_subdivisions,
+        add_color_as_custom_property,
+        point_geometry_mode,
+        op=op,
+    )
+
+
+def add_coords_as_mesh_vertices(
+    coords,
+    colors,
+    reconstruction_collection,
+    add_mesh_to_point_geometry_nodes=True,
+    point_radius=0.05,
+    point_subdivisions=1,
+    add_color_as_custom_property=True,
+    point_geometry_mode="REALIZED_INSTANCES",
+    op=None,
+):
+    """Add a point cloud given as coordinate and color arrays as mesh.
+
+    The colors must be provided as uint8 RGBA array (see
+    :code:`Point.split_points_as_arrays()`). See
+    :code:`add_points_as_mesh_vertices()` for the other parameters.
+    """
     log_report("INFO", "Adding Points as Mesh: ...", op)
     stop_watch = StopWatch()
     point_cloud_obj_name = "Mesh Point Cloud"
     point_cloud_mesh = bpy.data.meshes.new(point_cloud_obj_name)
-    point_cloud_mesh.update()
-    point_cloud_mesh.validate()
-    coords, colors = Point.split_points(points, normalize_colors=False)
-    point_cloud_mesh.from_pydata(coords, [], [])
+    _add_vertices_to_mesh(point_cloud_mesh, coords)
     point_cloud_obj = add_obj(
         point_cloud_mesh, point_cloud_obj_name, reconstruction_collection
     )
-    if add_mesh_to_point_geometry_nodes:
-        # Add a point_color attribute to each vertex
+    if add_mesh_to_point_geometry_nodes or add_color_as_custom_property:
+        # Add a point_color attribute to each vertex. Use a byte color
+        # attribute, which requires a quarter of the memory of float colors.
         point_cloud_mesh.attributes.new(
-            name="point_color", type="FLOAT_COLOR", domain="POINT"
+            name="point_color", type="BYTE_COLOR", domain="POINT"
         )
         _add_colors_to_vertices(point_cloud_mesh, colors, "point_color")
 
+    if add_mesh_to_point_geometry_nodes:
         geometry_nodes = point_cloud_obj.modifiers.new(
             "GeometryNodes", "NODES"
         )
-
-        # https://blender.stackexchange.com/questions/249763/python-geometry-node-trees
-        if not geometry_nodes.node_group:
-            geometry_nodes.node_group = create_geometry_nodes_node_group()
-
-        # The group_input and the group_output nodes are created by default
-        node_group = geometry_nodes.node_group
-        group_input = node_group.nodes["Group Input"]
-        group_output = node_group.nodes["Group Output"]
-
-        # Add modifier inputs that are editable from the GUI, the order these are added is important
-        create_interface_socket(node_group,
-            "Point Color", 'INPUT', 'NodeSocketMaterial'
-        )  # {Input|Socket}_1
-        create_interface_socket(node_group,
-            "Point Radius", 'INPUT', 'NodeSocketFloat'
-        )  # {Input|Socket}_2
-        create_interface_socket(node_group,
-            "Point Subdivisions", 'INPUT', 'NodeSocketIntUnsigned'
-        )  # {Input|Socket}_3
-        input_prefix = 'Socket_' if hasattr(node_group, 'interface') else 'Input_'
-        geometry_nodes[input_prefix + "2"] = _get_color_from_attribute("point_color")
-        geometry_nodes[input_prefix + "3"] = point_radius
-        geometry_nodes[input_prefix + "4"] = point_subdivisions
-
-        # Note: To determine the name required for new(...), create the
-        # corresponding node with the gui and print the value of "bl_rna".
-        # Or enable python tooltips under preferences > interface and hover
-        # over a node in the add node dropdown
-        mesh_to_points = geometry_nodes.node_group.nodes.new(
-            "GeometryNodeMeshToPoints"
-        )
-        instance_on_points = geometry_nodes.node_group.nodes.new(
-            "GeometryNodeInstanceOnPoints"
-        )
-        realize_instances = geometry_nodes.node_group.nodes.new(
-            "GeometryNodeRealizeInstances"
-        )
-        sphere_marker = geometry_nodes.node_group.nodes.new(
-            "GeometryNodeMeshIcoSphere"
-        )
-        set_material = geometry_nodes.node_group.nodes.new(
-            "GeometryNodeSetMaterial"
-        )
-
-        geometry_nodes.node_group.links.new(
-            group_input.outputs["Geometry"], mesh_to_points.inputs["Mesh"]
-        )
-        geometry_nodes.node_group.links.new(
-            mesh_to_points.outputs["Points"],
-            instance_on_points.inputs["Points"],
-        )
-        geometry_nodes.node_group.links.new(
-            instance_on_points.outputs["Instances"],
-            realize_instances.inputs["Geometry"],
-        )
-        geometry_nodes.node_group.links.new(
-            realize_instances.outputs["Geometry"],
-            group_output.inputs["Geometry"],
-        )
-
-        geometry_nodes.node_group.links.new(
-            group_input.outputs["Point Radius"], sphere_marker.inputs["Radius"]
-        )
-        geometry_nodes.node_group.links.new(
-            group_input.outputs["Point Subdivisions"],
-            sphere_marker.inputs["Subdivisions"],
-        )
-        geometry_nodes.node_group.links.new(
-            sphere_marker.outputs["Mesh"], set_material.inputs["Geometry"]
-        )
-        geometry_nodes.node_group.links.new(
-            group_input.outputs["Point Color"], set_material.inputs["Material"]
-        )
-        geometry_nodes.node_group.links.new(
-            set_material.outputs["Geometry"],
-            instance_on_points.inputs["Instance"],
-        )
-
-    if add_color_as_custom_property:
-        point_cloud_obj["colors"] = colors
+        # Reuse the node group of previous imports (with the same mode)
+        node_group = _get_point_cloud_node_group(point_geometry_mode)
+        geometry_nodes.node_group = node_group
+
+        # Set the modifier inputs that are editable from the GUI
+        input_values = {
+            "Point Color": _get_color_from_attribute(
+                "point_color", _get_color_attribute_type(point_geometry_mode)
+            ),
+            "Point Radius": point_radius,
+            "Point Subdivisions": point_subdivisions,
+        }
+        for socket_name, value in input_values.items():
+            identifier = _get_input_socket_identifier(node_group, socket_name)
+            if identifier is not None:
+                geometry_nodes[identifier] = value
 
     log_report("INFO", "Duration: " + str(stop_watch.get_elapsed_time()), op)
     log_report("INFO", "Adding Points as Mesh: Done", op)
@@ -405,25 +598,40 @@ def add_points_as_mesh_vertices(
 
 
 def _add_colors_to_vertices(mesh, colors, attribute_name):
-    """Add a color attribute to each vertex of mesh."""
+    """Add a color attribute to each vertex of mesh.
+
+    The colors must be provided as uint8 RGBA values in sRGB space.
+    """
     if len(mesh.vertices) != len(colors):
         raise ValueError(
             f"Got {len(mesh.vertices)} vertices and {len(colors)} color values."
         )
 
-    color_array = np.array(colors)
-    color_array[:, :3] /= 255.0
+    color_array = np.asarray(colors, dtype=np.float32) / 255.0
     mesh.attributes[attribute_name].data.foreach_set(
-        "color", color_array.reshape(-1)
+        "color_srgb", color_array.reshape(-1)
     )
 
 
-def _get_color_from_attribute(attribute_name):
+def _get_color_attribute_type(point_geometry_mode):
+    """Return the attribute type required to read the point colors.
+
+    Realized instances and native point clouds store the colors on the
+    rendered geometry. Unrealized instances store the colors on the instance
+    domain, which shaders access via the instancer.
+    """
+    if point_geometry_mode == "INSTANCES":
+        return "INSTANCER"
+    return "GEOMETRY"
+
+
+def _get_color_from_attribute(attribute_name, attribute_type="GEOMETRY"):
     """Create a material that obtains its color from the specified attribute."""
     material = bpy.data.materials.new("color")
     material.use_nodes = True
     color_node = material.node_tree.nodes.new("ShaderNodeAttribute")
     color_node.attribute_name = attribute_name
+    color_node.attribute_type = attribute_type
     material.node_tree.links.new(
         color_node.outputs["Color"],
         material.node_tree.nodes["Principled BSDF"].inputs["Base Color"],
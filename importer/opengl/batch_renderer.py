@@ -0,0 +1,154 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import bpy
+import gpu
+from mathutils import Matrix
+
+from ..opengl.point_shader import (
+    get_point_shader,
+    convert_colors_to_uint8,
+    create_point_batch,
+)
+from ..file_handlers.image_file_handler import ImageFileHandler
+from ..blender_utility.image_utility import save_pixels_to_disk
+
+
+def compute_camera_perspective_matrix(cam, width, height):
+    """Return the matrix mapping world coordinates to clip coordinates."""
+    view_matrix = cam.matrix_world.inverted()
+    projection_matrix = cam.calc_matrix_camera(
+        bpy.context.evaluated_depsgraph_get(), x=width, y=height
+    )
+    return projection_matrix @ view_matrix
+
+
+class OpenGLBatchRenderer:
+    """Class that renders many images of the same point cloud with OpenGL.
+
+    The offscreen buffer and the point batch are created once and reused for
+    all renderings. The renderings are returned as NumPy arrays.
+    """
+
+    def __init__(self, coords, colors, point_size, width, height):
+        self.width = width
+        self.height = height
+        self._point_size = point_size
+        self._shader = get_point_shader()
+        self._offscreen = gpu.types.GPUOffScreen(width, height)
+        self._batch = create_point_batch(
+            coords, convert_colors_to_uint8(colors)
+        )
+        self._buffer = gpu.types.Buffer("UBYTE", width * height * 4)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.free()
+
+    def free(self):
+        """Free the GPU resources."""
+        if self._offscreen is not None:
+            self._offscreen.free()
+            self._offscreen = None
+            self._batch = None
+
+    def render(self, perspective_matrix):
+        """Render the points and return an uint8 RGBA array.
+
+        The perspective matrix (a Matrix or a 4x4 array) maps the world
+        coordinates to clip coordinates. The rows of the returned
+        (height, width, 4) array are ordered from bottom to top (i.e. as in
+        Blender images).
+        """
+        with self._offscreen.bind():
+            gpu.state.point_size_set(self._point_size)
+
+            previous_depth_mask_value = gpu.state.depth_mask_get()
+            previous_depth_test_value = gpu.state.depth_test_get()
+            gpu.state.depth_mask_set(True)
+            gpu.state.depth_test_set("LESS_EQUAL")
+
+            frame_buffer = gpu.state.active_framebuffer_get()
+            frame_buffer.clear(color=(0.0, 0.0, 0.0, 0.0), depth=1.0)
+
+            with gpu.matrix.push_pop():
+                gpu.matrix.load_matrix(
+                    Matrix(np.asarray(perspective_matrix).tolist())
+                )
+                with gpu.matrix.push_pop_projection():
+                    gpu.matrix.load_projection_matrix(Matrix.Identity(4))
+                    self._shader.bind()
+                    self._batch.draw(self._shader)
+
+            gpu.state.depth_mask_set(previous_depth_mask_value)
+            gpu.state.depth_test_set(previous_depth_test_value)
+
+            frame_buffer.read_color(
+                0,
+                0,
+                self.width,
+                self.height,
+                4,
+                0,
+                "UBYTE",
+                data=self._buffer,
+            )
+
+        # Copy the data, since the buffer is reused for the next rendering
+        return np.array(self._buffer, dtype=np.uint8).reshape(
+            self.height, self.width, 4
+        )
+
+
+class ImageSequenceWriter:
+    """Class that writes images to disk using a pool of background threads.
+
+    This allows to overlap the rendering of the next frame with the encoding
+    of the previous frames. Formats not supported by
+    :code:`ImageFileHandler.write_image()` (e.g. EXR) are written with
+    Blender in the main thread (see :code:`save_pixels_to_disk()`).
+    """
+
+    def __init__(self, save_alpha=True, max_workers=None, image_name=None):
+        self._save_alpha = save_alpha
+        self._image_name = image_name or "OpenGL Export"
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, image_ofp, pixels):
+        """Write an uint8 RGBA array (with bottom-up row order) to disk."""
+        if ImageFileHandler.can_write_image(image_ofp):
+            # Limit the number of pending frames (i.e. the memory usage)
+            while len(self._futures) >= 2 * self._max_workers:
+                self._futures.pop(0).result()
+            self._futures.append(
+                self._executor.submit(
+                    ImageFileHandler.write_image,
+                    image_ofp,
+                    pixels[::-1],
+                    self._save_alpha,
+                )
+            )
+        else:
+            save_pixels_to_disk(
+                self._image_name, pixels, image_ofp, self._save_alpha
+            )
+
+    def close(self):
+        """Wait until all images are written and shut down the threads."""
+        for future in self._futures:
+            # Propagate exceptions of the worker threads
+            future.result()
+        self._futures = []
+        self._executor.shutdown()
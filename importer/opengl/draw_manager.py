@@ -2,14 +2,27 @@ import numpy as np
 import atexit
 import bpy
 import gpu
-from gpu_extras.batch import batch_for_shader
+from ..opengl.octree import PointCloudOctree, compute_range_indices
+from ..opengl.spatial_index import (
+    PointCloudSpatialIndex,
+    compute_box_planes,
+    transform_planes,
+)
+from ..opengl.point_shader import (
+    get_point_shader,
+    get_merged_point_shader,
+    get_merged_point_vertex_format,
+    create_anchor_matrix_texture,
+    convert_colors_to_uint8,
+    create_point_batch,
+)
 from ..blender_utility.logging_utility import log_report
 
 
 def _compute_transformed_coords(object_anchor_matrix_world, positions):
 
     if len(positions) == 0:
-        return []
+        return np.zeros((0, 3), dtype=np.float32)
 
     pos_arr = np.asarray(positions)
     ones_arr = np.ones((pos_arr.shape[0], 1))
@@ -25,8 +38,116 @@ def _compute_transformed_coords(object_anchor_matrix_world, positions):
 
     # Delete the homogeneous entries
     transf_pos_arr = np.delete(transf_pos_arr_hom, -1, axis=1)
-    transf_pos_list = transf_pos_arr.tolist()
-    return transf_pos_list
+    return transf_pos_arr.astype(np.float32)
+
+
+def _compute_view_parameters(region, region_data, object_anchor_matrix_world):
+    """Compute the view parameters w.r.t. the coordinates of the anchor."""
+    matrix_world = np.array(object_anchor_matrix_world)
+    perspective_matrix = (
+        np.array(region_data.perspective_matrix) @ matrix_world
+    )
+    view_matrix = np.array(region_data.view_matrix) @ matrix_world
+    view_origin = np.linalg.inv(view_matrix)[0:3, 3]
+    projection_scale = region_data.window_matrix[1][1] * region.height / 2.0
+    return (
+        perspective_matrix,
+        view_origin,
+        projection_scale,
+        region_data.is_perspective,
+    )
+
+
+def _tag_view_3d_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                area.tag_redraw()
+
+
+class _RedrawScheduler:
+    """Class that triggers redraws of the 3D views using a timer.
+
+    Used to upload points progressively, i.e. each redraw uploads a chunk of
+    the points and requests another redraw until all points are uploaded.
+    """
+
+    def __init__(self, interval=0.02):
+        self._interval = interval
+        self._is_redraw_requested = False
+        self._is_timer_registered = False
+
+    def request_redraw(self):
+        """Request a redraw of the 3D views at the next timer tick."""
+        self._is_redraw_requested = True
+        if not self._is_timer_registered:
+            bpy.app.timers.register(
+                self._timer_callback, first_interval=self._interval
+            )
+            self._is_timer_registered = True
+
+    def _timer_callback(self):
+        if not self._is_redraw_requested:
+            # Returning None unregisters the timer
+            self._is_timer_registered = False
+            return None
+        self._is_redraw_requested = False
+        _tag_view_3d_redraw()
+        return self._interval
+
+
+class _OctreeNodeSelector:
+    """Class that caches the octree nodes selected for the current view."""
+
+    def __init__(self, octree):
+        self._octree = octree
+        self._view_key_previous = None
+        self._selected_nodes_cached = []
+
+    def reset(self):
+        """Enforce a new selection at the next request."""
+        self._view_key_previous = None
+
+    def get_selected_nodes(self, object_anchor, point_budget):
+        """Return the selected nodes and whether the selection was updated."""
+        region = bpy.context.region
+        region_data = bpy.context.region_data
+        (
+            perspective_matrix,
+            view_origin,
+            projection_scale,
+            is_perspective,
+        ) = _compute_view_parameters(
+            region, region_data, object_anchor.matrix_world
+        )
+
+        # The selection does only change, if the view or the anchor pose
+        # changes. Thus, avoid recomputing it for other redraws (e.g. caused
+        # by hovering over UI elements).
+        view_key = (
+            perspective_matrix.tobytes(),
+            region.width,
+            region.height,
+            point_budget,
+        )
+        if view_key == self._view_key_previous:
+            return self._selected_nodes_cached, False
+        self._view_key_previous = view_key
+        self._selected_nodes_cached = self._octree.select_nodes(
+            perspective_matrix,
+            view_origin,
+            projection_scale,
+            point_budget,
+            is_perspective=is_perspective,
+        )
+        return self._selected_nodes_cached, True
+
+
+def _create_octree_and_ordered_points(coords, colors):
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+    colors = convert_colors_to_uint8(colors)
+    octree = PointCloudOctree(coords)
+    return octree, coords[octree.point_order], colors[octree.point_order]
 
 
 class DrawManager:
@@ -36,6 +157,9 @@ class DrawManager:
         self._anchor_to_draw_callback_handler = {}
         self._anchor_to_point_coords = {}
         self._anchor_to_point_colors = {}
+        self._anchor_to_spatial_index = {}
+        self._use_merged_draw_mode = False
+        self._merged_draw_callback_handler = None
 
     @classmethod
     def get_singleton(cls):
@@ -47,19 +171,176 @@ class DrawManager:
             bpy.types.Object.photogrammetry_pip_manager = draw_manger
         return draw_manger
 
+    def set_merged_draw_mode(self, use_merged_draw_mode):
+        """Draw point clouds registered afterwards with a single callback.
+
+        In the merged mode, the points of all anchors are stored in shared
+        vertex buffers and drawn with one draw call per buffer and point size
+        (instead of one callback per anchor).
+        """
+        self._use_merged_draw_mode = use_merged_draw_mode
+
     def register_points_draw_callback(
-        self, object_anchor, coords, colors, point_size
+        self,
+        object_anchor,
+        coords,
+        colors,
+        point_size,
+        point_budget=3000000,
     ):
-        """Register a callback to draw a point cloud."""
-        draw_callback_handler = _DrawCallBackHandler()
-        draw_callback_handler.register_points_draw_callback(
-            self, object_anchor, coords, colors, point_size
+        """Register a callback to draw a point cloud.
+
+        The coordinates are stored as float32 and the colors as uint8 RGBA
+        values (see :code:`convert_colors_to_uint8()`). The points are
+        re-ordered according to the level of detail structure (i.e. an octree)
+        that is used to draw the point cloud. The octree is also used as
+        spatial index of the points (see :code:`query_points_in_box()`).
+        """
+        octree, coords, colors = _create_octree_and_ordered_points(
+            coords, colors
         )
+
+        if self._use_merged_draw_mode:
+            if self._merged_draw_callback_handler is None:
+                self._merged_draw_callback_handler = (
+                    _MergedDrawCallBackHandler()
+                )
+            draw_callback_handler = (
+                self._merged_draw_callback_handler.register_anchor(
+                    self, object_anchor, octree, coords, colors, point_size
+                )
+            )
+        else:
+            draw_callback_handler = _DrawCallBackHandler()
+            draw_callback_handler.register_points_draw_callback(
+                self, object_anchor, octree, coords, colors, point_size
+            )
+        draw_callback_handler.set_point_budget(point_budget)
         self._anchor_to_draw_callback_handler[
             object_anchor
         ] = draw_callback_handler
+        self._set_anchor_points(object_anchor, octree, coords, colors)
+
+    def _set_anchor_points(self, object_anchor, octree, coords, colors):
         self._anchor_to_point_coords[object_anchor] = coords
         self._anchor_to_point_colors[object_anchor] = colors
+        self._anchor_to_spatial_index[object_anchor] = PointCloudSpatialIndex(
+            octree, coords
+        )
+
+    def replace_points(self, object_anchor, coords, colors):
+        """Replace the points drawn for the given anchor.
+
+        The point size and the point budget of the anchor are preserved. In
+        the merged mode, the new points reuse the range of the anchor in the
+        shared buffers (if they fit, e.g. after cropping the points).
+        """
+        draw_callback_handler = self._anchor_to_draw_callback_handler[
+            object_anchor
+        ]
+        if isinstance(
+            draw_callback_handler, _MergedAnchor
+        ) and draw_callback_handler.capacity >= len(coords):
+            octree, coords, colors = _create_octree_and_ordered_points(
+                coords, colors
+            )
+            self._merged_draw_callback_handler.replace_anchor_points(
+                draw_callback_handler, octree, coords, colors
+            )
+            self._set_anchor_points(object_anchor, octree, coords, colors)
+            return
+
+        point_size = draw_callback_handler.get_point_size()
+        point_budget = draw_callback_handler.get_point_budget()
+        draw_callback_handler.unregister_points_draw_callback()
+        if isinstance(draw_callback_handler, _MergedAnchor):
+            # Release the points of the (unused) range of the anchor
+            self._merged_draw_callback_handler.release_anchor_points(
+                draw_callback_handler
+            )
+        self.register_points_draw_callback(
+            object_anchor, coords, colors, point_size, point_budget
+        )
+
+    def get_anchors(self):
+        """Return the anchors of the maintained point clouds."""
+        return list(self._anchor_to_point_coords)
+
+    def get_anchor_coords_and_colors(self, object_anchor):
+        """Return the (local) coordinates and the colors of an anchor.
+
+        The indices returned by the spatial queries refer to these arrays.
+        """
+        return (
+            self._anchor_to_point_coords[object_anchor],
+            self._anchor_to_point_colors[object_anchor],
+        )
+
+    def get_spatial_index(self, object_anchor):
+        """Return the spatial index of the anchor's (local) coordinates."""
+        return self._anchor_to_spatial_index[object_anchor]
+
+    def query_points_in_planes(self, object_anchor, planes):
+        """Return the indices of the anchor's points in a convex region.
+
+        The planes must be given in world coordinates (see
+        :code:`PointCloudSpatialIndex.query_planes()`).
+        """
+        local_planes = transform_planes(
+            planes, np.array(object_anchor.matrix_world)
+        )
+        return self._anchor_to_spatial_index[object_anchor].query_planes(
+            local_planes
+        )
+
+    def query_points_in_box(
+        self, object_anchor, box_min, box_max, matrix=None
+    ):
+        """Return the indices of the anchor's points in a box.
+
+        The box is defined by its minimum and maximum corner. If a matrix is
+        provided (e.g. the world matrix of an object), the corners are given
+        in the coordinate system of this matrix, otherwise in world
+        coordinates.
+        """
+        return self.query_points_in_planes(
+            object_anchor, compute_box_planes(box_min, box_max, matrix)
+        )
+
+    def query_points_in_frustum(self, object_anchor, perspective_matrix):
+        """Return the indices of the anchor's points in a view frustum.
+
+        The perspective matrix maps world coordinates to clip coordinates.
+        """
+        local_perspective_matrix = np.array(perspective_matrix) @ np.array(
+            object_anchor.matrix_world
+        )
+        return self._anchor_to_spatial_index[object_anchor].query_frustum(
+            local_perspective_matrix
+        )
+
+    def query_points_in_sphere(self, object_anchor, center, radius):
+        """Return the indices of the anchor's points in a (world) sphere."""
+        matrix_world = np.array(object_anchor.matrix_world)
+        center_local = (np.linalg.inv(matrix_world) @ np.append(center, 1))[
+            0:3
+        ]
+        singular_values = np.linalg.svd(
+            matrix_world[0:3, 0:3], compute_uv=False
+        )
+        # Use a conservative radius for anchors with non-uniform scale and
+        # filter the result in world coordinates
+        indices = self._anchor_to_spatial_index[object_anchor].query_sphere(
+            center_local, radius / singular_values.min()
+        )
+        if np.isclose(singular_values.min(), singular_values.max()):
+            return indices
+        coords = _compute_transformed_coords(
+            matrix_world, self._anchor_to_point_coords[object_anchor][indices]
+        )
+        offsets = coords - np.asarray(center)
+        is_inside = np.einsum("nc,nc->n", offsets, offsets) <= radius**2
+        return indices[is_inside]
 
     def get_coords_and_colors(self, visible_only=False):
         """Return the coordinates and the colors of the maintained points."""
@@ -71,22 +352,25 @@ class DrawManager:
                 continue
 
             coords = self._anchor_to_point_coords[object_anchor]
-            transf_coord_list = (
-                transf_coord_list
-                + _compute_transformed_coords(
-                    object_anchor.matrix_world, coords
-                )
+            transf_coord_list.append(
+                _compute_transformed_coords(object_anchor.matrix_world, coords)
             )
 
             colors = self._anchor_to_point_colors[object_anchor]
-            color_list = color_list + colors
+            color_list.append(colors)
 
-        return transf_coord_list, color_list
+        if len(transf_coord_list) == 0:
+            return (
+                np.zeros((0, 3), dtype=np.float32),
+                np.zeros((0, 4), dtype=np.uint8),
+            )
+        return np.concatenate(transf_coord_list), np.concatenate(color_list)
 
     def delete_anchor(self, object_anchor):
         """Delete the anchor used to control the pose of the point cloud."""
         del self._anchor_to_point_coords[object_anchor]
         del self._anchor_to_point_colors[object_anchor]
+        del self._anchor_to_spatial_index[object_anchor]
         # del self._anchor_to_draw_callback_handler[object_anchor]
 
     def get_draw_callback_handler(self, object_anchor):
@@ -95,35 +379,111 @@ class DrawManager:
 
 
 class _DrawCallBackHandler:
-    """Class that allows to handle point drawing callbacks."""
+    """Class that allows to handle point drawing callbacks.
 
-    def __init__(self):
-        self._shader = gpu.shader.from_builtin("FLAT_COLOR")
+    Each redraw selects the octree nodes within the view frustum (using their
+    screen-space size as priority) until the point budget is exhausted. The
+    batches of the nodes are created lazily and cached.
+
+    To avoid blocking the UI, each redraw uploads at most
+    :code:`upload_chunk_size` points. Since the selected nodes are ordered
+    from coarse to fine, a sparse preview of the point cloud is shown
+    immediately and the remaining nodes are uploaded in subsequent redraws.
+    """
+
+    def __init__(self, upload_chunk_size=2**19):
+        self._shader = get_point_shader()
+        self._upload_chunk_size = upload_chunk_size
+        self._redraw_scheduler = _RedrawScheduler()
 
         # Handle to the function
         self._draw_handler_handle = None
 
-        # Handle to the object
-        self._object_anchor_pose_previous = np.array([])
-        self._batch_cached = None
+        # Level of detail structure and the correspondingly ordered points
+        self._octree = None
+        self._coords = None
+        self._colors = None
+
+        self._node_selector = None
+
+        self._node_to_batch_cached = {}
+        self._num_cached_points = 0
         self._point_size = 5
+        self._point_budget = 3000000
 
-        # If Blender is closed and self._batch_cached is not properly deleted,
-        # this causes something like the following:
+        # If Blender is closed and self._node_to_batch_cached is not properly
+        # deleted, this causes something like the following:
         # "Error: Not freed memory blocks: 2, total unfreed memory 0.001358 MB"
         atexit.register(self._clean_batch_cached)
 
     def _clean_batch_cached(self):
-        """Clean the cached batch used to draw the points."""
-        self._batch_cached = None
+        """Clean the cached batches used to draw the points."""
+        self._node_to_batch_cached = {}
+        self._num_cached_points = 0
 
     def set_point_size(self, point_size):
         """Set the point size used to draw the points in the 3D point cloud."""
         self._point_size = point_size
 
-    def _draw_points_callback(
-        self, draw_manager, object_anchor, positions, colors
-    ):
+    def set_point_budget(self, point_budget):
+        """Set the maximum number of points drawn per redraw."""
+        self._point_budget = point_budget
+
+    def get_point_size(self):
+        """Return the point size used to draw the points."""
+        return self._point_size
+
+    def get_point_budget(self):
+        """Return the maximum number of points drawn per redraw."""
+        return self._point_budget
+
+    def unregister_points_draw_callback(self):
+        """Stop drawing the points and free the cached batches."""
+        if self._draw_handler_handle is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(
+                self._draw_handler_handle, "WINDOW"
+            )
+            self._draw_handler_handle = None
+        self._clean_batch_cached()
+
+    def _get_selected_nodes(self, object_anchor):
+        selected_nodes, is_updated = self._node_selector.get_selected_nodes(
+            object_anchor, self._point_budget
+        )
+        if is_updated:
+            self._free_unselected_batches(selected_nodes)
+        return selected_nodes
+
+    def _free_unselected_batches(self, selected_nodes):
+        # Keep the batches of previously selected nodes to allow fast
+        # navigation, but limit the amount of memory used on the GPU.
+        if self._num_cached_points <= 2 * self._point_budget:
+            return
+        selected_nodes = set(selected_nodes)
+        for node_idx in list(self._node_to_batch_cached):
+            if node_idx not in selected_nodes:
+                del self._node_to_batch_cached[node_idx]
+                self._num_cached_points -= self._octree.node_count[node_idx]
+
+    def _upload_node_batches(self, selected_nodes):
+        num_uploaded_points = 0
+        for node_idx in selected_nodes:
+            if node_idx in self._node_to_batch_cached:
+                continue
+            if num_uploaded_points >= self._upload_chunk_size:
+                # Upload the remaining nodes in the next redraw
+                self._redraw_scheduler.request_redraw()
+                break
+            start = self._octree.node_start[node_idx]
+            count = self._octree.node_count[node_idx]
+            self._node_to_batch_cached[node_idx] = create_point_batch(
+                self._coords[start : start + count],
+                self._colors[start : start + count],
+            )
+            self._num_cached_points += count
+            num_uploaded_points += count
+
+    def _draw_points_callback(self, draw_manager, object_anchor):
         """A callback function to draw a point cloud in Blender's 3D view."""
         handle_is_valid = True
         try:
@@ -139,26 +499,8 @@ class _DrawCallBackHandler:
                 # disable the drawing of the point cloud
                 if bpy.data.objects[object_anchor_name].visible_get():
 
-                    # Update the batch depending on the anchor pose (only if
-                    # necessary)
-                    object_anchor_has_changed = not np.array_equal(
-                        self._object_anchor_pose_previous,
-                        object_anchor.matrix_world,
-                    )
-                    if self._batch_cached is None or object_anchor_has_changed:
-
-                        self._object_anchor_pose_previous = np.copy(
-                            object_anchor.matrix_world
-                        )
-                        transf_pos_list = _compute_transformed_coords(
-                            object_anchor.matrix_world, positions
-                        )
-
-                        self._batch_cached = batch_for_shader(
-                            self._shader,
-                            "POINTS",
-                            {"pos": transf_pos_list, "color": colors},
-                        )
+                    selected_nodes = self._get_selected_nodes(object_anchor)
+                    self._upload_node_batches(selected_nodes)
 
                     self._shader.bind()
                     gpu.state.point_size_set(self._point_size)
@@ -168,7 +510,16 @@ class _DrawCallBackHandler:
                     gpu.state.depth_mask_set(True)
                     gpu.state.depth_test_set("LESS_EQUAL")
 
-                    self._batch_cached.draw(self._shader)
+                    # The batches contain the coordinates w.r.t. the anchor,
+                    # i.e. transforming the anchor requires no update of the
+                    # batches.
+                    gpu.matrix.push()
+                    gpu.matrix.multiply_matrix(object_anchor.matrix_world)
+                    for node_idx in selected_nodes:
+                        batch = self._node_to_batch_cached.get(node_idx)
+                        if batch is not None:
+                            batch.draw(self._shader)
+                    gpu.matrix.pop()
 
                     gpu.state.depth_mask_set(previous_depth_mask_value)
                     gpu.state.depth_test_set(previous_depth_test_value)
@@ -183,15 +534,414 @@ class _DrawCallBackHandler:
                     self._draw_handler_handle, "WINDOW"
                 )
                 self._draw_handler_handle = None
-                self._batch_cached = None
+                self._clean_batch_cached()
                 draw_manager.delete_anchor(object_anchor)
 
     def register_points_draw_callback(
-        self, draw_manager, object_anchor, positions, colors, point_size
+        self, draw_manager, object_anchor, octree, coords, colors, point_size
     ):
         """Register a callback to draw a point cloud."""
         self.set_point_size(point_size)
-        args = (draw_manager, object_anchor, positions, colors)
+        self._octree = octree
+        self._node_selector = _OctreeNodeSelector(octree)
+        self._coords = coords
+        self._colors = colors
+        args = (draw_manager, object_anchor)
         self._draw_handler_handle = bpy.types.SpaceView3D.draw_handler_add(
             self._draw_points_callback, args, "WINDOW", "POST_VIEW"
-        )
\ No newline at end of file
+        )
+
+
+class _MergedAnchor:
+    """Class that represents a point cloud drawn by the merged handler.
+
+    Provides the same interface to adjust the point size and the point budget
+    as :code:`_DrawCallBackHandler`.
+    """
+
+    def __init__(self, object_anchor, anchor_idx, offset, capacity, octree):
+        self.object_anchor = object_anchor
+        # Row of the anchor matrix texture
+        self.anchor_idx = anchor_idx
+        # Position of the first point in the shared vertex buffers
+        self.offset = offset
+        # Number of points reserved in the shared vertex buffers (replaced
+        # points may use less than this range, see replace_points())
+        self.capacity = capacity
+        self.octree = octree
+        self.node_selector = _OctreeNodeSelector(octree)
+        self.point_size = 5
+        self.point_budget = 3000000
+        self.is_valid = True
+
+    def set_point_size(self, point_size):
+        """Set the point size used to draw the points in the 3D point cloud."""
+        self.point_size = point_size
+
+    def set_point_budget(self, point_budget):
+        """Set the maximum number of points drawn per redraw."""
+        self.point_budget = point_budget
+
+    def get_point_size(self):
+        """Return the point size used to draw the points."""
+        return self.point_size
+
+    def get_point_budget(self):
+        """Return the maximum number of points drawn per redraw."""
+        return self.point_budget
+
+    def unregister_points_draw_callback(self):
+        """Stop drawing the points.
+
+        The points remain in the shared buffers until the points of all
+        anchors are removed.
+        """
+        self.is_valid = False
+
+
+class _MergedDrawCallBackHandler:
+    """Class that draws the point clouds of many anchors with one callback.
+
+    The points of all anchors are stored in shared vertex buffers (pages with
+    a fixed capacity), i.e. each anchor occupies a range of the global point
+    indices. Each vertex stores the index of its anchor, which is used to
+    read the anchor transformation from a texture. Thus, moving an anchor
+    requires only an update of the (small) matrix texture.
+
+    The visible points (i.e. the selected octree nodes of the visible
+    anchors) are gathered in index buffers, which results in one draw call
+    per page and point size.
+
+    Each redraw uploads at most :code:`upload_chunk_size` points (i.e. whole
+    pages). The points of each anchor are ordered from coarse to fine octree
+    levels, thus the first pages of an anchor provide a sparse preview. The
+    pages of the anchors are uploaded alternately, i.e. all point clouds are
+    previewed before the finer levels are uploaded.
+    """
+
+    def __init__(self, page_capacity=2**19, upload_chunk_size=2**19):
+        self._shader = get_merged_point_shader()
+        self._page_capacity = page_capacity
+        self._upload_chunk_size = upload_chunk_size
+        self._redraw_scheduler = _RedrawScheduler()
+
+        # Handle to the function
+        self._draw_handler_handle = None
+
+        self._merged_anchors = []
+        self._anchor_to_coords = {}
+        self._anchor_to_colors = {}
+        self._num_points = 0
+
+        self._page_to_vertex_buffer = {}
+        self._dirty_pages = set()
+        self._matrix_texture = None
+        self._matrices_previous = None
+        self._selection_key_previous = None
+        self._point_size_to_batches = {}
+
+        # If Blender is closed and the GPU resources are not properly
+        # deleted, this causes something like the following:
+        # "Error: Not freed memory blocks: 2, total unfreed memory 0.001358 MB"
+        atexit.register(self._clean_batch_cached)
+
+    def _clean_batch_cached(self):
+        """Clean the buffers and textures used to draw the points."""
+        self._page_to_vertex_buffer = {}
+        self._dirty_pages = set(range(self._get_num_pages()))
+        self._matrix_texture = None
+        self._matrices_previous = None
+        self._selection_key_previous = None
+        self._point_size_to_batches = {}
+
+    def _get_num_pages(self):
+        return -(-self._num_points // self._page_capacity)
+
+    def _get_anchor_page_range(self, merged_anchor):
+        first_page = merged_anchor.offset // self._page_capacity
+        end_page = -(
+            -(merged_anchor.offset + merged_anchor.capacity)
+            // self._page_capacity
+        )
+        return range(first_page, end_page)
+
+    def _get_dirty_pages_in_upload_order(self):
+        # Interleave the pages of the anchors (round-robin), so the coarse
+        # levels of all point clouds are shown before the finer levels
+        anchor_page_lists = [
+            [
+                page_idx
+                for page_idx in self._get_anchor_page_range(merged_anchor)
+                if page_idx in self._dirty_pages
+            ]
+            for merged_anchor in self._merged_anchors
+            if merged_anchor.is_valid
+        ]
+        ordered_pages = []
+        ordered_page_set = set()
+        max_num_pages = max(map(len, anchor_page_lists), default=0)
+        for page_list_idx in range(max_num_pages):
+            for page_list in anchor_page_lists:
+                if page_list_idx >= len(page_list):
+                    continue
+                page_idx = page_list[page_list_idx]
+                if page_idx not in ordered_page_set:
+                    ordered_pages.append(page_idx)
+                    ordered_page_set.add(page_idx)
+        # Pages containing only points of invalid anchors
+        ordered_pages += sorted(self._dirty_pages - ordered_page_set)
+        return ordered_pages
+
+    def _update_vertex_buffers(self):
+        if len(self._dirty_pages) == 0:
+            return
+        num_uploaded_points = 0
+        for page_idx in self._get_dirty_pages_in_upload_order():
+            if num_uploaded_points >= self._upload_chunk_size:
+                # Upload the remaining pages in the next redraw
+                self._redraw_scheduler.request_redraw()
+                break
+            page_begin = page_idx * self._page_capacity
+            page_end = min(page_begin + self._page_capacity, self._num_points)
+            coords_list = []
+            colors_list = []
+            anchor_indices_list = []
+            for merged_anchor in self._merged_anchors:
+                coords = self._anchor_to_coords[merged_anchor]
+                colors = self._anchor_to_colors[merged_anchor]
+                begin = max(merged_anchor.offset, page_begin)
+                end = min(
+                    merged_anchor.offset + merged_anchor.capacity, page_end
+                )
+                if begin >= end:
+                    continue
+                local_begin = begin - merged_anchor.offset
+                local_end = end - merged_anchor.offset
+                coords_list.append(coords[local_begin:local_end])
+                colors_list.append(colors[local_begin:local_end])
+                # Fill the unused part of the anchor's range (which is never
+                # referenced by the index buffers)
+                num_unused = (local_end - local_begin) - len(coords_list[-1])
+                if num_unused > 0:
+                    coords_list.append(np.zeros((num_unused, 3), np.float32))
+                    colors_list.append(np.zeros((num_unused, 4), np.uint8))
+                anchor_indices_list.append(
+                    np.full(end - begin, merged_anchor.anchor_idx, np.int32)
+                )
+            vertex_buffer = gpu.types.GPUVertBuf(
+                get_merged_point_vertex_format(), page_end - page_begin
+            )
+            vertex_buffer.attr_fill("pos", np.concatenate(coords_list))
+            vertex_buffer.attr_fill("color", np.concatenate(colors_list))
+            vertex_buffer.attr_fill(
+                "anchor", np.concatenate(anchor_indices_list)
+            )
+            self._page_to_vertex_buffer[page_idx] = vertex_buffer
+            self._dirty_pages.remove(page_idx)
+            num_uploaded_points += page_end - page_begin
+        # The batches do not contain the new vertex buffers
+        self._selection_key_previous = None
+
+    def _update_matrix_texture(self):
+        matrices = np.array(
+            [
+                np.array(merged_anchor.object_anchor.matrix_world)
+                if merged_anchor.is_valid
+                else np.identity(4)
+                for merged_anchor in self._merged_anchors
+            ],
+            dtype=np.float32,
+        )
+        if self._matrices_previous is not None and np.array_equal(
+            matrices, self._matrices_previous
+        ):
+            return
+        self._matrices_previous = matrices
+        self._matrix_texture = create_anchor_matrix_texture(matrices)
+
+    def _update_batches(self, visible_anchors):
+        anchor_selections = []
+        for merged_anchor in visible_anchors:
+            selected_nodes, _ = merged_anchor.node_selector.get_selected_nodes(
+                merged_anchor.object_anchor, merged_anchor.point_budget
+            )
+            anchor_selections.append((merged_anchor, selected_nodes))
+
+        # Rebuilding the index buffers is only required, if the selection,
+        # the visibility or the point sizes change. Transforming anchors
+        # affects only the matrix texture.
+        selection_key = tuple(
+            (
+                merged_anchor.anchor_idx,
+                merged_anchor.point_size,
+                tuple(selected_nodes),
+            )
+            for merged_anchor, selected_nodes in anchor_selections
+        )
+        if selection_key == self._selection_key_previous:
+            return
+        self._selection_key_previous = selection_key
+
+        point_size_to_index_arrays = {}
+        for merged_anchor, selected_nodes in anchor_selections:
+            octree = merged_anchor.octree
+            indices = compute_range_indices(
+                merged_anchor.offset + octree.node_start[selected_nodes],
+                octree.node_count[selected_nodes],
+            )
+            point_size_to_index_arrays.setdefault(
+                merged_anchor.point_size, []
+            ).append(indices)
+
+        self._point_size_to_batches = {}
+        for point_size, index_arrays in point_size_to_index_arrays.items():
+            indices = np.concatenate(index_arrays)
+            page_indices = indices // self._page_capacity
+            batches = []
+            for page_idx in np.unique(page_indices):
+                # Skip pages that are not uploaded yet
+                if int(page_idx) not in self._page_to_vertex_buffer:
+                    continue
+                local_indices = (
+                    indices[page_indices == page_idx]
+                    - page_idx * self._page_capacity
+                ).astype(np.uint32)
+                if len(local_indices) == 0:
+                    continue
+                index_buffer = gpu.types.GPUIndexBuf(
+                    type="POINTS", seq=local_indices
+                )
+                batches.append(
+                    gpu.types.GPUBatch(
+                        type="POINTS",
+                        buf=self._page_to_vertex_buffer[int(page_idx)],
+                        elem=index_buffer,
+                    )
+                )
+            self._point_size_to_batches[point_size] = batches
+
+    def _get_visible_anchors(self, draw_manager):
+        visible_anchors = []
+        for merged_anchor in self._merged_anchors:
+            if not merged_anchor.is_valid:
+                continue
+            try:
+                # Check if object still exists
+                object_anchor_name = merged_anchor.object_anchor.name
+            except:
+                log_report(
+                    "INFO", "Removing points of deleted point cloud handle"
+                )
+                merged_anchor.is_valid = False
+                draw_manager.delete_anchor(merged_anchor.object_anchor)
+                continue
+            # Use the visibility of the object to enable / disable the
+            # drawing of the point cloud
+            if object_anchor_name in bpy.data.objects:
+                if bpy.data.objects[object_anchor_name].visible_get():
+                    visible_anchors.append(merged_anchor)
+        return visible_anchors
+
+    def _draw_points_callback(self, draw_manager):
+        """A callback function to draw all point clouds in the 3D view."""
+        visible_anchors = self._get_visible_anchors(draw_manager)
+        if not any(
+            merged_anchor.is_valid for merged_anchor in self._merged_anchors
+        ):
+            log_report(
+                "INFO", "Removing draw handler of merged point cloud handles"
+            )
+            bpy.types.SpaceView3D.draw_handler_remove(
+                self._draw_handler_handle, "WINDOW"
+            )
+            self._draw_handler_handle = None
+            self._merged_anchors = []
+            self._anchor_to_coords = {}
+            self._anchor_to_colors = {}
+            self._num_points = 0
+            self._clean_batch_cached()
+            return
+        if len(visible_anchors) == 0:
+            return
+
+        self._update_vertex_buffers()
+        self._update_matrix_texture()
+        self._update_batches(visible_anchors)
+
+        self._shader.bind()
+        self._shader.uniform_sampler("anchor_matrices", self._matrix_texture)
+
+        previous_depth_mask_value = gpu.state.depth_mask_get()
+        previous_depth_test_value = gpu.state.depth_test_get()
+        gpu.state.depth_mask_set(True)
+        gpu.state.depth_test_set("LESS_EQUAL")
+
+        for point_size, batches in self._point_size_to_batches.items():
+            gpu.state.point_size_set(point_size)
+            for batch in batches:
+                batch.draw(self._shader)
+
+        gpu.state.depth_mask_set(previous_depth_mask_value)
+        gpu.state.depth_test_set(previous_depth_test_value)
+
+    def _invalidate_anchor_pages(self, merged_anchor):
+        for page_idx in self._get_anchor_page_range(merged_anchor):
+            self._page_to_vertex_buffer.pop(page_idx, None)
+            self._dirty_pages.add(page_idx)
+        self._selection_key_previous = None
+
+    def replace_anchor_points(self, merged_anchor, octree, coords, colors):
+        """Replace the points of an anchor within its range of the buffers.
+
+        The number of points must not exceed the capacity of the anchor.
+        """
+        assert len(coords) <= merged_anchor.capacity
+        merged_anchor.octree = octree
+        merged_anchor.node_selector = _OctreeNodeSelector(octree)
+        self._anchor_to_coords[merged_anchor] = coords
+        self._anchor_to_colors[merged_anchor] = colors
+        self._invalidate_anchor_pages(merged_anchor)
+        self._redraw_scheduler.request_redraw()
+
+    def release_anchor_points(self, merged_anchor):
+        """Free the points of an unregistered anchor.
+
+        The range of the anchor in the shared buffers remains reserved.
+        """
+        self._anchor_to_coords[merged_anchor] = np.zeros((0, 3), np.float32)
+        self._anchor_to_colors[merged_anchor] = np.zeros((0, 4), np.uint8)
+        self._invalidate_anchor_pages(merged_anchor)
+
+    def register_anchor(
+        self, draw_manager, object_anchor, octree, coords, colors, point_size
+    ):
+        """Add a point cloud to the shared buffers and return its handle."""
+        merged_anchor = _MergedAnchor(
+            object_anchor,
+            len(self._merged_anchors),
+            self._num_points,
+            len(coords),
+            octree,
+        )
+        merged_anchor.set_point_size(point_size)
+        self._merged_anchors.append(merged_anchor)
+        self._anchor_to_coords[merged_anchor] = coords
+        self._anchor_to_colors[merged_anchor] = colors
+
+        # Only the pages overlapping with the new points must be updated
+        first_page = self._num_points // self._page_capacity
+        self._num_points += len(coords)
+        for page_idx in range(first_page, self._get_num_pages()):
+            # The vertex buffer of a partially filled page does not contain
+            # the new points
+            self._page_to_vertex_buffer.pop(page_idx, None)
+            self._dirty_pages.add(page_idx)
+
+        if self._draw_handler_handle is None:
+            args = (draw_manager,)
+            self._draw_handler_handle = (
+                bpy.types.SpaceView3D.draw_handler_add(
+                    self._draw_points_callback, args, "WINDOW", "POST_VIEW"
+                )
+            )
+        return merged_anchor
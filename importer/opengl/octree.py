@@ -0,0 +1,335 @@
+import heapq
+import numpy as np
+
+# Maximum number of points stored in a single node. This is also the smallest
+# reasonable point budget, since the root node is always drawn.
+DEFAULT_MAX_POINTS_PER_NODE = 32768
+
+
+def _spread_bits(values):
+    """Insert two zero bits between the lower 21 bits of each value."""
+    values = values.astype(np.uint64) & np.uint64(0x1FFFFF)
+    values = (values | (values << np.uint64(32))) & np.uint64(
+        0x1F00000000FFFF
+    )
+    values = (values | (values << np.uint64(16))) & np.uint64(
+        0x1F0000FF0000FF
+    )
+    values = (values | (values << np.uint64(8))) & np.uint64(
+        0x100F00F00F00F00F
+    )
+    values = (values | (values << np.uint64(4))) & np.uint64(
+        0x10C30C30C30C30C3
+    )
+    values = (values | (values << np.uint64(2))) & np.uint64(
+        0x1249249249249249
+    )
+    return values
+
+
+def compute_morton_codes(cell_indices):
+    """Compute the Morton (z-order) codes of integer 3D cell indices."""
+    cell_indices = np.asarray(cell_indices)
+    return (
+        _spread_bits(cell_indices[:, 0])
+        | (_spread_bits(cell_indices[:, 1]) << np.uint64(1))
+        | (_spread_bits(cell_indices[:, 2]) << np.uint64(2))
+    )
+
+
+def compute_frustum_planes(perspective_matrix):
+    """Return the six clipping planes of a (model) view projection matrix.
+
+    Each row contains the plane parameters (a, b, c, d). A point p lies inside
+    the frustum, if a * p.x + b * p.y + c * p.z + d >= 0 holds for all planes.
+    """
+    # Gribb and Hartmann: "Fast Extraction of Viewing Frustum Planes from the
+    # World-View-Projection Matrix"
+    mat = np.asarray(perspective_matrix, dtype=np.float64)
+    return np.array(
+        [
+            mat[3] + mat[0],  # left
+            mat[3] - mat[0],  # right
+            mat[3] + mat[1],  # bottom
+            mat[3] - mat[1],  # top
+            mat[3] + mat[2],  # near
+            mat[3] - mat[2],  # far
+        ]
+    )
+
+
+def compute_range_indices(starts, counts):
+    """Concatenate the index ranges defined by the starts and the counts."""
+    starts = np.asarray(starts, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    range_offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - range_offsets, counts) + np.arange(
+        counts.sum(), dtype=np.int64
+    )
+
+
+class PointCloudOctree:
+    """Multi-resolution octree used to draw large point clouds.
+
+    The octree is built once for a given set of coordinates. Each node stores
+    a random subset of the points contained in its cell, i.e. coarser levels
+    represent sparser versions of the point cloud and the union of a node and
+    all its ancestors contains the full point density of the node's cell.
+
+    The points of each node are stored contiguously in :code:`point_order`,
+    which allows to draw a node by slicing the (re-ordered) point arrays.
+    Nodes are sorted by level and Morton code, i.e. the children of a node
+    are stored contiguously as well.
+    """
+
+    def __init__(
+        self,
+        coords,
+        max_points_per_node=DEFAULT_MAX_POINTS_PER_NODE,
+        max_depth=12,
+    ):
+        coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+        num_points = len(coords)
+        assert 0 < max_depth <= 21
+
+        if num_points > 0:
+            bbox_min = coords.min(axis=0).astype(np.float64)
+            bbox_max = coords.max(axis=0).astype(np.float64)
+        else:
+            bbox_min = np.zeros(3, dtype=np.float64)
+            bbox_max = np.zeros(3, dtype=np.float64)
+        # Use a cube as root cell, so all nodes have cubic cells
+        extent = max(float(np.max(bbox_max - bbox_min)), 1e-6)
+
+        self.bbox_min = bbox_min
+        self.extent = extent
+        self.max_points_per_node = max_points_per_node
+
+        # The random order of the points determines which points represent a
+        # cell at coarser levels
+        remaining = np.random.default_rng(0).permutation(num_points)
+        finest_cells = np.floor(
+            (coords - bbox_min) / extent * (1 << max_depth)
+        ).astype(np.int64)
+        np.clip(finest_cells, 0, (1 << max_depth) - 1, out=finest_cells)
+        finest_codes = compute_morton_codes(finest_cells)
+
+        point_order_list = []
+        node_levels = []
+        node_codes = []
+        node_counts = []
+        for level in range(max_depth + 1):
+            if len(remaining) == 0:
+                break
+            shift = np.uint64(3 * (max_depth - level))
+            keys = finest_codes[remaining] >> shift
+            sort_indices = np.argsort(keys, kind="stable")
+            sorted_keys = keys[sort_indices]
+            # The keys are already sorted, thus avoid sorting them again with
+            # np.unique()
+            first_indices = np.flatnonzero(
+                np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+            )
+            unique_keys = sorted_keys[first_indices]
+            counts = np.diff(np.append(first_indices, len(sorted_keys)))
+            if level == max_depth:
+                # The finest level contains all remaining points
+                take = np.ones(len(sorted_keys), dtype=bool)
+                node_counts.append(counts)
+            else:
+                ranks = np.arange(len(sorted_keys)) - np.repeat(
+                    first_indices, counts
+                )
+                take = ranks < max_points_per_node
+                node_counts.append(np.minimum(counts, max_points_per_node))
+            point_order_list.append(remaining[sort_indices[take]])
+            node_levels.append(np.full(len(unique_keys), level))
+            node_codes.append(unique_keys)
+            remaining = remaining[sort_indices[~take]]
+
+        if num_points > 0:
+            self.point_order = np.concatenate(point_order_list)
+            self.node_level = np.concatenate(node_levels)
+            self.node_code = np.concatenate(node_codes)
+            self.node_count = np.concatenate(node_counts)
+        else:
+            self.point_order = np.zeros(0, dtype=np.int64)
+            self.node_level = np.zeros(0, dtype=np.int64)
+            self.node_code = np.zeros(0, dtype=np.uint64)
+            self.node_count = np.zeros(0, dtype=np.int64)
+        self.node_start = (
+            np.cumsum(self.node_count) - self.node_count
+        ).astype(np.int64)
+        self._compute_hierarchy()
+        self._compute_node_bounds(coords)
+
+    def __len__(self):
+        return len(self.node_count)
+
+    def _compute_hierarchy(self):
+        num_nodes = len(self.node_count)
+        self.node_child_start = np.zeros(num_nodes, dtype=np.int64)
+        self.node_child_count = np.zeros(num_nodes, dtype=np.int64)
+        if num_nodes == 0:
+            return
+        level_starts = np.searchsorted(
+            self.node_level, np.arange(self.node_level[-1] + 2)
+        )
+        for level in range(self.node_level[-1]):
+            parent_begin, parent_end = level_starts[level : level + 2]
+            child_begin, child_end = level_starts[level + 1 : level + 3]
+            parent_codes = self.node_code[parent_begin:parent_end]
+            child_parent_codes = self.node_code[child_begin:child_end] >> (
+                np.uint64(3)
+            )
+            # Children are sorted by their Morton code, i.e. all children of
+            # a parent node are stored contiguously.
+            self.node_child_start[parent_begin:parent_end] = (
+                child_begin
+                + np.searchsorted(child_parent_codes, parent_codes, "left")
+            )
+            self.node_child_count[parent_begin:parent_end] = np.searchsorted(
+                child_parent_codes, parent_codes, "right"
+            ) - np.searchsorted(child_parent_codes, parent_codes, "left")
+
+    def _compute_node_bounds(self, coords):
+        # Use the tight bounds of the points in each node's subtree for the
+        # visibility computation. The points of a subtree are not stored
+        # contiguously, thus propagate the bounds from the leaves upwards.
+        num_nodes = len(self.node_count)
+        ordered_coords = coords[self.point_order]
+        self.node_min = np.zeros((num_nodes, 3), dtype=np.float64)
+        self.node_max = np.zeros((num_nodes, 3), dtype=np.float64)
+        self.node_center = np.zeros((num_nodes, 3), dtype=np.float64)
+        self.node_radius = np.zeros(num_nodes, dtype=np.float64)
+        if num_nodes == 0:
+            return
+        self.node_min[:] = np.minimum.reduceat(
+            ordered_coords, self.node_start, axis=0
+        )
+        self.node_max[:] = np.maximum.reduceat(
+            ordered_coords, self.node_start, axis=0
+        )
+        for node_idx in range(num_nodes - 1, -1, -1):
+            child_count = self.node_child_count[node_idx]
+            if child_count == 0:
+                continue
+            child_start = self.node_child_start[node_idx]
+            child_slice = slice(child_start, child_start + child_count)
+            self.node_min[node_idx] = np.minimum(
+                self.node_min[node_idx], self.node_min[child_slice].min(axis=0)
+            )
+            self.node_max[node_idx] = np.maximum(
+                self.node_max[node_idx], self.node_max[child_slice].max(axis=0)
+            )
+        self.node_center = (self.node_min + self.node_max) / 2.0
+        self.node_radius = np.linalg.norm(
+            self.node_max - self.node_min, axis=1
+        ) / 2.0
+
+    def compute_node_plane_distances(self, planes):
+        """Compute the signed distances of the node bounds to the planes.
+
+        Returns two (num_nodes, num_planes) arrays containing the distances of
+        the corners of each bounding box that lie farthest along the plane
+        normals (the "positive vertices") and that lie closest (the "negative
+        vertices"). A node intersects the region defined by the planes, if
+        all positive distances are non-negative, and is fully contained in the
+        region, if all negative distances are non-negative. See
+        :code:`compute_frustum_planes()` for the plane representation.
+        """
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        normals = planes[:, 0:3]
+        is_positive = normals[np.newaxis, :, :] >= 0
+        node_min = self.node_min[:, np.newaxis, :]
+        node_max = self.node_max[:, np.newaxis, :]
+        positive_vertices = np.where(is_positive, node_max, node_min)
+        negative_vertices = np.where(is_positive, node_min, node_max)
+        positive_distances = (
+            np.einsum("npc,pc->np", positive_vertices, normals)
+            + planes[np.newaxis, :, 3]
+        )
+        negative_distances = (
+            np.einsum("npc,pc->np", negative_vertices, normals)
+            + planes[np.newaxis, :, 3]
+        )
+        return positive_distances, negative_distances
+
+    def compute_visible_nodes(self, perspective_matrix):
+        """Return a boolean array reflecting the visibility of each node.
+
+        The perspective matrix must map the (local) point coordinates to clip
+        coordinates.
+        """
+        positive_distances, _ = self.compute_node_plane_distances(
+            compute_frustum_planes(perspective_matrix)
+        )
+        return np.all(positive_distances >= 0, axis=1)
+
+    def compute_projected_node_sizes(
+        self, view_origin, projection_scale, is_perspective=True
+    ):
+        """Return the projected size (in pixels) of each node.
+
+        The view origin must be given in the (local) coordinate system of the
+        points. The projection scale converts a size at a distance of one unit
+        to pixels (e.g. :code:`window_matrix[1][1] * region_height / 2`).
+        """
+        if not is_perspective:
+            return self.node_radius * projection_scale
+        distances = np.linalg.norm(
+            self.node_center - np.asarray(view_origin), axis=1
+        )
+        # Nodes containing the view origin must always be refined
+        distances = np.maximum(distances - self.node_radius, 1e-6)
+        return self.node_radius / distances * projection_scale
+
+    def select_nodes(
+        self,
+        perspective_matrix,
+        view_origin,
+        projection_scale,
+        point_budget,
+        is_perspective=True,
+        min_node_pixel_size=100.0,
+    ):
+        """Select the nodes that should be drawn for the given view.
+
+        Nodes are traversed in the order of their projected size (largest
+        first). Nodes that do not fit into the remaining point budget are
+        skipped, so that smaller nodes can still fill the budget. The root
+        node is always selected (if visible), since otherwise nothing would
+        be drawn for budgets below :code:`max_points_per_node`. Nodes outside
+        the view frustum and nodes whose parents appear smaller than
+        :code:`min_node_pixel_size` are skipped.
+        """
+        if len(self) == 0:
+            return []
+        visible = self.compute_visible_nodes(perspective_matrix)
+        pixel_sizes = self.compute_projected_node_sizes(
+            view_origin, projection_scale, is_perspective
+        )
+        selected = []
+        num_selected_points = 0
+        # The root cell is always the first node
+        candidates = [(-pixel_sizes[0], 0)]
+        while candidates:
+            neg_pixel_size, node_idx = heapq.heappop(candidates)
+            if not visible[node_idx]:
+                continue
+            node_count = self.node_count[node_idx]
+            is_over_budget = num_selected_points + node_count > point_budget
+            if is_over_budget and node_idx != 0:
+                continue
+            selected.append(node_idx)
+            num_selected_points += node_count
+            if -neg_pixel_size < min_node_pixel_size:
+                continue
+            child_start = self.node_child_start[node_idx]
+            for child_idx in range(
+                child_start, child_start + self.node_child_count[node_idx]
+            ):
+                heapq.heappush(
+                    candidates, (-pixel_sizes[child_idx], child_idx)
+                )
+        return selected
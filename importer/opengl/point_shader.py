@@ -0,0 +1,173 @@
+import numpy as np
+import gpu
+
+_vertex_shader_source = """
+void main()
+{
+    gl_Position = ModelViewProjectionMatrix * vec4(pos, 1.0);
+    // The colors are stored as unsigned bytes (i.e. values in [0, 255])
+    finalColor = color / 255.0;
+}
+"""
+
+_fragment_shader_source = """
+void main()
+{
+    fragColor = blender_srgb_to_framebuffer_space(finalColor);
+}
+"""
+
+_merged_vertex_shader_source = """
+void main()
+{
+    // Each row of the texture contains the columns of an anchor's matrix
+    mat4 anchor_matrix = mat4(
+        texelFetch(anchor_matrices, ivec2(0, anchor), 0),
+        texelFetch(anchor_matrices, ivec2(1, anchor), 0),
+        texelFetch(anchor_matrices, ivec2(2, anchor), 0),
+        texelFetch(anchor_matrices, ivec2(3, anchor), 0));
+    gl_Position = ModelViewProjectionMatrix * anchor_matrix * vec4(pos, 1.0);
+    finalColor = color / 255.0;
+}
+"""
+
+_point_shader = None
+_point_vertex_format = None
+_merged_point_shader = None
+_merged_point_vertex_format = None
+
+
+def get_point_shader():
+    """Return a shader that draws points with packed 8 bit colors.
+
+    The shader expects float32 positions (:code:`pos`) and unsigned byte RGBA
+    colors (:code:`color`), which are normalized in the vertex shader. This
+    requires a quarter of the memory of float colors.
+    """
+    global _point_shader
+    if _point_shader is None:
+        shader_info = gpu.types.GPUShaderCreateInfo()
+        shader_info.push_constant("MAT4", "ModelViewProjectionMatrix")
+        shader_info.vertex_in(0, "VEC3", "pos")
+        shader_info.vertex_in(1, "VEC4", "color")
+        interface_info = gpu.types.GPUStageInterfaceInfo("point_interface")
+        interface_info.flat("VEC4", "finalColor")
+        shader_info.vertex_out(interface_info)
+        shader_info.fragment_out(0, "VEC4", "fragColor")
+        shader_info.vertex_source(_vertex_shader_source)
+        shader_info.fragment_source(_fragment_shader_source)
+        _point_shader = gpu.shader.create_from_info(shader_info)
+    return _point_shader
+
+
+def get_point_vertex_format():
+    """Return the vertex format corresponding to :code:`get_point_shader()`."""
+    global _point_vertex_format
+    if _point_vertex_format is None:
+        vertex_format = gpu.types.GPUVertFormat()
+        vertex_format.attr_add(
+            id="pos", comp_type="F32", len=3, fetch_mode="FLOAT"
+        )
+        # Convert the bytes to (non-normalized) floats, the shader performs
+        # the normalization.
+        vertex_format.attr_add(
+            id="color", comp_type="U8", len=4, fetch_mode="INT_TO_FLOAT"
+        )
+        _point_vertex_format = vertex_format
+    return _point_vertex_format
+
+
+def get_merged_point_shader():
+    """Return a shader that draws the points of several anchors at once.
+
+    In addition to the inputs of :code:`get_point_shader()`, each vertex
+    stores the index of its anchor (:code:`anchor`). The vertex shader reads
+    the corresponding anchor matrix from the :code:`anchor_matrices` texture
+    (see :code:`create_anchor_matrix_texture()`).
+    """
+    global _merged_point_shader
+    if _merged_point_shader is None:
+        shader_info = gpu.types.GPUShaderCreateInfo()
+        shader_info.push_constant("MAT4", "ModelViewProjectionMatrix")
+        shader_info.sampler(0, "FLOAT_2D", "anchor_matrices")
+        shader_info.vertex_in(0, "VEC3", "pos")
+        shader_info.vertex_in(1, "VEC4", "color")
+        shader_info.vertex_in(2, "INT", "anchor")
+        interface_info = gpu.types.GPUStageInterfaceInfo(
+            "merged_point_interface"
+        )
+        interface_info.flat("VEC4", "finalColor")
+        shader_info.vertex_out(interface_info)
+        shader_info.fragment_out(0, "VEC4", "fragColor")
+        shader_info.vertex_source(_merged_vertex_shader_source)
+        shader_info.fragment_source(_fragment_shader_source)
+        _merged_point_shader = gpu.shader.create_from_info(shader_info)
+    return _merged_point_shader
+
+
+def get_merged_point_vertex_format():
+    """Return the vertex format of :code:`get_merged_point_shader()`."""
+    global _merged_point_vertex_format
+    if _merged_point_vertex_format is None:
+        vertex_format = gpu.types.GPUVertFormat()
+        vertex_format.attr_add(
+            id="pos", comp_type="F32", len=3, fetch_mode="FLOAT"
+        )
+        vertex_format.attr_add(
+            id="color", comp_type="U8", len=4, fetch_mode="INT_TO_FLOAT"
+        )
+        vertex_format.attr_add(
+            id="anchor", comp_type="I32", len=1, fetch_mode="INT"
+        )
+        _merged_point_vertex_format = vertex_format
+    return _merged_point_vertex_format
+
+
+def create_anchor_matrix_texture(matrices):
+    """Create a texture containing the given (n, 4, 4) anchor matrices.
+
+    The texture has a size of 4 x n, the i-th row contains the columns of the
+    i-th matrix.
+    """
+    matrices = np.asarray(matrices, dtype=np.float32).reshape(-1, 4, 4)
+    num_matrices = max(len(matrices), 1)
+    data = np.zeros((num_matrices, 4, 4), dtype=np.float32)
+    data[: len(matrices)] = np.transpose(matrices, (0, 2, 1))
+    buffer = gpu.types.Buffer("FLOAT", data.size, data.ravel().tolist())
+    return gpu.types.GPUTexture(
+        (4, num_matrices), format="RGBA32F", data=buffer
+    )
+
+
+def convert_colors_to_uint8(colors):
+    """Convert (normalized) RGB or RGBA colors to an uint8 RGBA array.
+
+    Arrays with dtype uint8 are considered to be un-normalized, all other
+    values are expected to be in the range [0, 1].
+    """
+    colors = np.asarray(colors)
+    if colors.ndim == 1:
+        colors = colors.reshape(-1, 4)
+    if colors.dtype != np.uint8:
+        colors = np.round(np.clip(colors, 0.0, 1.0) * 255.0).astype(np.uint8)
+    if colors.shape[1] == 3:
+        alpha = np.full((len(colors), 1), 255, dtype=np.uint8)
+        colors = np.hstack((colors, alpha))
+    return colors
+
+
+def create_point_batch(coords, colors):
+    """Create a batch for :code:`get_point_shader()` from NumPy arrays.
+
+    The arrays are copied to the GPU without converting them to Python
+    objects.
+    """
+    coords = np.ascontiguousarray(coords, dtype=np.float32).reshape(-1, 3)
+    colors = np.ascontiguousarray(colors, dtype=np.uint8).reshape(-1, 4)
+    assert len(coords) == len(colors)
+    vertex_buffer = gpu.types.GPUVertBuf(
+        get_point_vertex_format(), len(coords)
+    )
+    vertex_buffer.attr_fill("pos", coords)
+    vertex_buffer.attr_fill("color", colors)
+    return gpu.types.GPUBatch(type="POINTS", buf=vertex_buffer)
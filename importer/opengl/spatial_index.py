@@ -0,0 +1,145 @@
+import numpy as np
+from ..opengl.octree import compute_frustum_planes
+
+
+def compute_box_planes(box_min, box_max, matrix=None):
+    """Return the six planes of an (oriented) box.
+
+    The box is defined by the minimum and maximum corner w.r.t. a local
+    coordinate system. If a matrix (mapping the local coordinates of the box
+    to the query coordinates) is provided, the planes are transformed
+    accordingly. See :code:`compute_frustum_planes()` for the plane
+    representation.
+    """
+    box_min = np.asarray(box_min, dtype=np.float64)
+    box_max = np.asarray(box_max, dtype=np.float64)
+    planes = np.zeros((6, 4), dtype=np.float64)
+    for axis in range(3):
+        # x >= min and -x >= -max
+        planes[2 * axis, axis] = 1.0
+        planes[2 * axis, 3] = -box_min[axis]
+        planes[2 * axis + 1, axis] = -1.0
+        planes[2 * axis + 1, 3] = box_max[axis]
+    if matrix is not None:
+        # A plane p of the box contains the points x with p * inv(M) * x = 0
+        planes = planes @ np.linalg.inv(np.asarray(matrix, dtype=np.float64))
+    return planes
+
+
+def transform_planes(planes, matrix):
+    """Express planes w.r.t. the coordinate system mapped by the matrix.
+
+    If the matrix maps local coordinates to world coordinates, world space
+    planes are converted to local planes.
+    """
+    return np.asarray(planes, dtype=np.float64) @ np.asarray(
+        matrix, dtype=np.float64
+    )
+
+
+class PointCloudSpatialIndex:
+    """Class that provides spatial queries for the points of an octree.
+
+    The index uses the bounds of the octree nodes (see
+    :code:`PointCloudOctree`) to determine the candidate points of a query.
+    Nodes fully contained in the query region are accepted without testing
+    their points, i.e. only the points of nodes intersecting the region
+    border are tested individually. The points of each node are stored
+    contiguously, thus testing them requires no copy of the coordinates.
+
+    The coordinates must be ordered according to :code:`octree.point_order`.
+    The queries return indices of these (re-ordered) coordinates.
+    """
+
+    def __init__(self, octree, coords):
+        self._octree = octree
+        self._coords = np.asarray(coords).reshape(-1, 3)
+
+    def _collect_points(self, intersecting, contained, compute_point_mask):
+        octree = self._octree
+        # The nodes are processed in the order of their points, i.e. the
+        # resulting indices are sorted
+        index_list = [np.zeros(0, dtype=np.int64)]
+        for node_idx in np.flatnonzero(intersecting):
+            start = octree.node_start[node_idx]
+            end = start + octree.node_count[node_idx]
+            if contained[node_idx]:
+                index_list.append(np.arange(start, end, dtype=np.int64))
+            else:
+                point_mask = compute_point_mask(
+                    node_idx, self._coords[start:end]
+                )
+                index_list.append(start + np.flatnonzero(point_mask))
+        return np.concatenate(index_list)
+
+    def query_planes(self, planes):
+        """Return the indices of the points inside a convex region.
+
+        The region is defined by planes (a, b, c, d), a point p lies inside
+        the region if a * p.x + b * p.y + c * p.z + d >= 0 holds for all
+        planes.
+        """
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        (
+            positive_distances,
+            negative_distances,
+        ) = self._octree.compute_node_plane_distances(planes)
+        intersecting = np.all(positive_distances >= 0, axis=1)
+        contained = np.all(negative_distances >= 0, axis=1)
+
+        def _compute_point_mask(node_idx, coords):
+            # Only the planes cutting the bounds of the node must be tested
+            point_mask = np.ones(len(coords), dtype=bool)
+            for plane in planes[negative_distances[node_idx] < 0]:
+                # Avoid converting the coordinates to float64
+                normal = plane[0:3].astype(coords.dtype)
+                point_mask &= coords @ normal >= -plane[3]
+            return point_mask
+
+        return self._collect_points(
+            intersecting, contained, _compute_point_mask
+        )
+
+    def query_box(self, box_min, box_max, matrix=None):
+        """Return the indices of the points inside an (oriented) box.
+
+        See :code:`compute_box_planes()` for the parameters.
+        """
+        return self.query_planes(compute_box_planes(box_min, box_max, matrix))
+
+    def query_frustum(self, perspective_matrix):
+        """Return the indices of the points inside a view frustum.
+
+        The perspective matrix must map the point coordinates to clip
+        coordinates.
+        """
+        return self.query_planes(compute_frustum_planes(perspective_matrix))
+
+    def query_sphere(self, center, radius):
+        """Return the indices of the points within a radius of the center."""
+        center = np.asarray(center, dtype=np.float64)
+        octree = self._octree
+        # Distance to the closest and to the farthest point of each box
+        closest_offsets = np.maximum(
+            np.maximum(octree.node_min - center, center - octree.node_max), 0
+        )
+        farthest_offsets = np.maximum(
+            np.abs(octree.node_min - center), np.abs(octree.node_max - center)
+        )
+        squared_radius = radius * radius
+        intersecting = (
+            np.einsum("nc,nc->n", closest_offsets, closest_offsets)
+            <= squared_radius
+        )
+        contained = (
+            np.einsum("nc,nc->n", farthest_offsets, farthest_offsets)
+            <= squared_radius
+        )
+
+        def _compute_point_mask(node_idx, coords):
+            offsets = coords - center.astype(coords.dtype)
+            return np.einsum("nc,nc->n", offsets, offsets) <= squared_radius
+
+        return self._collect_points(
+            intersecting, contained, _compute_point_mask
+        )
@@ -1,16 +1,84 @@
+import zlib
+import numpy as np
 import bpy
-import gpu
 from bpy.app.handlers import persistent
-from mathutils import Matrix
-from gpu.types import GPUOffScreen
-from gpu_extras.batch import batch_for_shader
 
 from ..types.point import Point
 from ..opengl.draw_manager import DrawManager
+from ..opengl.point_shader import convert_colors_to_uint8
+from ..opengl.batch_renderer import (
+    OpenGLBatchRenderer,
+    compute_camera_perspective_matrix,
+)
 from ..blender_utility.object_utility import add_empty
+from ..blender_utility.image_utility import (
+    create_image_lazy,
+    copy_pixels_to_image,
+)
 from ..blender_utility.logging_utility import log_report
 
 
+def set_merged_draw_mode(use_merged_draw_mode):
+    """Draw subsequently added point clouds with a single shared callback.
+
+    The mode is stored in the scene, so the point clouds are drawn in the
+    same way after reloading the blend file.
+    """
+    DrawManager.get_singleton().set_merged_draw_mode(use_merged_draw_mode)
+    bpy.context.scene["opengl_merged_draw_mode"] = use_merged_draw_mode
+
+
+def _pack_point_data(coords, colors, compress):
+    """Pack float32 coordinates and uint8 RGBA colors into a single blob."""
+    data = (
+        np.ascontiguousarray(coords, dtype="<f4").tobytes()
+        + np.ascontiguousarray(colors, dtype=np.uint8).tobytes()
+    )
+    if compress:
+        data = zlib.compress(data, 1)
+    return data
+
+
+def _unpack_point_data(data, num_points, compression):
+    """Unpack the coordinates and colors without creating Python objects."""
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    coords = np.frombuffer(data, dtype="<f4", count=3 * num_points)
+    colors = np.frombuffer(
+        data, dtype=np.uint8, count=4 * num_points, offset=12 * num_points
+    )
+    return coords.reshape(-1, 3), colors.reshape(-1, 4)
+
+
+def _store_points_in_handle(object_anchor_handle, coords, colors, compress):
+    # Store the points as binary blob (instead of lists of floats), which
+    # reduces the size of the blend file and the time to save / load it.
+    object_anchor_handle["particle_data"] = _pack_point_data(
+        coords, colors, compress
+    )
+    object_anchor_handle["particle_count"] = len(coords)
+    object_anchor_handle["particle_data_compression"] = (
+        "zlib" if compress else "none"
+    )
+
+
+def _load_points_from_handle(object_anchor_handle):
+    if "particle_data" in object_anchor_handle:
+        return _unpack_point_data(
+            object_anchor_handle["particle_data"],
+            object_anchor_handle["particle_count"],
+            object_anchor_handle.get("particle_data_compression", "none"),
+        )
+    # Blend files created with previous versions store the points as lists
+    coords = np.array(
+        object_anchor_handle["particle_coords"], dtype=np.float32
+    )
+    colors = convert_colors_to_uint8(
+        np.array(object_anchor_handle["particle_colors"], dtype=np.float32)
+    )
+    return coords, colors
+
+
 def _draw_coords_with_color(
     coords,
     colors,
@@ -18,6 +86,8 @@ def _draw_coords_with_color(
     add_points_to_point_cloud_handle,
     reconstruction_collection=None,
     object_anchor_handle_name="OpenGL Point Cloud",
+    point_budget=3000000,
+    compress_point_data=False,
     op=None,
 ):
 
@@ -25,14 +95,16 @@ def _draw_coords_with_color(
         object_anchor_handle_name, reconstruction_collection
     )
     if add_points_to_point_cloud_handle:
-        object_anchor_handle["particle_coords"] = coords
-        object_anchor_handle["particle_colors"] = colors
+        _store_points_in_handle(
+            object_anchor_handle, coords, colors, compress_point_data
+        )
         object_anchor_handle["point_size"] = point_size
+        object_anchor_handle["point_budget"] = point_budget
         bpy.context.scene["contains_opengl_point_clouds"] = True
 
     draw_manager = DrawManager.get_singleton()
     draw_manager.register_points_draw_callback(
-        object_anchor_handle, coords, colors, point_size
+        object_anchor_handle, coords, colors, point_size, point_budget
     )
     return object_anchor_handle
 
@@ -43,12 +115,42 @@ def draw_points(
     add_points_to_point_cloud_handle,
     reconstruction_collection=None,
     object_anchor_handle_name="OpenGL Point Cloud",
+    point_budget=3000000,
+    compress_point_data=False,
     op=None,
 ):
     """Draw points using OpenGL."""
-    log_report("INFO", "Add particle draw handlers", op)
+    coords, colors = Point.split_points_as_arrays(points)
+    return draw_coords_with_colors(
+        coords,
+        colors,
+        point_size,
+        add_points_to_point_cloud_handle,
+        reconstruction_collection,
+        object_anchor_handle_name,
+        point_budget=point_budget,
+        compress_point_data=compress_point_data,
+        op=op,
+    )
+
+
+def draw_coords_with_colors(
+    coords,
+    colors,
+    point_size,
+    add_points_to_point_cloud_handle,
+    reconstruction_collection=None,
+    object_anchor_handle_name="OpenGL Point Cloud",
+    point_budget=3000000,
+    compress_point_data=False,
+    op=None,
+):
+    """Draw coordinates with per point colors using OpenGL.
 
-    coords, colors = Point.split_points(points, normalize_colors=True)
+    The colors must be provided as uint8 RGBA array (see
+    :code:`Point.split_points_as_arrays()`).
+    """
+    log_report("INFO", "Add particle draw handlers", op)
     object_anchor_handle = _draw_coords_with_color(
         coords,
         colors,
@@ -56,6 +158,8 @@ def draw_points(
         add_points_to_point_cloud_handle,
         reconstruction_collection,
         object_anchor_handle_name,
+        point_budget=point_budget,
+        compress_point_data=compress_point_data,
         op=op,
     )
     return object_anchor_handle
@@ -68,13 +172,16 @@ def draw_coords(
     add_points_to_point_cloud_handle=True,
     reconstruction_collection=None,
     object_anchor_handle_name="OpenGL Coord Point Cloud",
+    point_budget=3000000,
+    compress_point_data=False,
     op=None,
 ):
     """Draw coordinates using OpenGL."""
     if len(color) == 3:
         color = (color[0], color[1], color[2], 1)
     assert len(color) == 4
-    colors = [color for coord in coords]
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+    colors = np.tile(convert_colors_to_uint8([color]), (len(coords), 1))
     object_anchor_handle = _draw_coords_with_color(
         coords,
         colors,
@@ -82,11 +189,33 @@ def draw_coords(
         add_points_to_point_cloud_handle,
         reconstruction_collection,
         object_anchor_handle_name,
+        point_budget=point_budget,
+        compress_point_data=compress_point_data,
         op=op,
     )
     return object_anchor_handle
 
 
+def replace_anchor_points(object_anchor_handle, coords, colors):
+    """Replace the points of a point cloud anchor.
+
+    The points stored in the anchor (if any) are updated as well.
+    """
+    draw_manager = DrawManager.get_singleton()
+    draw_manager.replace_points(object_anchor_handle, coords, colors)
+    if "particle_data" in object_anchor_handle or (
+        "particle_coords" in object_anchor_handle
+    ):
+        compress = (
+            object_anchor_handle.get("particle_data_compression") == "zlib"
+        )
+        _store_points_in_handle(object_anchor_handle, coords, colors, compress)
+        # Remove the points stored by previous versions
+        for key in ["particle_coords", "particle_colors"]:
+            if key in object_anchor_handle:
+                del object_anchor_handle[key]
+
+
 @persistent
 def redraw_points(dummy):
     """Redraw points of the previous Blender session."""
@@ -100,19 +229,22 @@ def redraw_points(dummy):
             "Checking scene for missing point cloud draw handlers",
             op=None,
         )
+        DrawManager.get_singleton().set_merged_draw_mode(
+            bpy.context.scene.get("opengl_merged_draw_mode", False)
+        )
         for obj in bpy.data.objects:
-            if (
-                "particle_coords" in obj
-                and "particle_colors" in obj
-                and "point_size" in obj
-            ):
-                coords = obj["particle_coords"]
-                colors = obj["particle_colors"]
+            has_point_data = "particle_data" in obj or (
+                "particle_coords" in obj and "particle_colors" in obj
+            )
+            if has_point_data and "point_size" in obj:
+                # The points are uploaded lazily by the draw handler
+                coords, colors = _load_points_from_handle(obj)
                 point_size = obj["point_size"]
+                point_budget = obj.get("point_budget", 3000000)
 
                 draw_manager = DrawManager.get_singleton()
                 draw_manager.register_points_draw_callback(
-                    obj, coords, colors, point_size
+                    obj, coords, colors, point_size, point_budget
                 )
 
         for area in bpy.context.screen.areas:
@@ -132,74 +264,12 @@ def render_opengl_image(image_name, cam, coords, colors, point_size):
     # width = bpy.context.region.width
     # height = bpy.context.region.height
 
-    offscreen = gpu.types.GPUOffScreen(width, height)
-    with offscreen.bind():
-
-        gpu.state.point_size_set(point_size)
-
-        previous_depth_mask_value = gpu.state.depth_mask_get()
-        previous_depth_test_value = gpu.state.depth_test_get()
-        gpu.state.depth_mask_set(True)
-        gpu.state.depth_test_set("LESS_EQUAL")
-
-        frame_buffer = gpu.state.active_framebuffer_get()
-        frame_buffer.clear(color=(0.0, 0.0, 0.0, 0.0), depth=1.0)
-
-        view_matrix = cam.matrix_world.inverted()
-        projection_matrix = cam.calc_matrix_camera(
-            bpy.context.evaluated_depsgraph_get(), x=width, y=height
-        )
-        perspective_matrix = projection_matrix @ view_matrix
-
-        gpu.matrix.load_matrix(perspective_matrix)
-        gpu.matrix.load_projection_matrix(Matrix.Identity(4))
-
-        shader = gpu.shader.from_builtin("3D_FLAT_COLOR")
-        shader.bind()
-        batch = batch_for_shader(
-            shader, "POINTS", {"pos": coords, "color": colors}
+    with OpenGLBatchRenderer(
+        coords, colors, point_size, width, height
+    ) as renderer:
+        pixels = renderer.render(
+            compute_camera_perspective_matrix(cam, width, height)
         )
-        batch.draw(shader)
-
-        gpu.state.depth_mask_set(previous_depth_mask_value)
-        gpu.state.depth_test_set(previous_depth_test_value)
-
-        buffer = frame_buffer.read_color(0, 0, width, height, 4, 0, "UBYTE")
-
-    offscreen.free()
-
-    image = _create_image_lazy(image_name, width, height)
-    _copy_buffer_to_pixel(buffer, image, width, height)
-
-
-def _create_image_lazy(image_name, width, height):
-    if image_name not in bpy.data.images:
-        image = bpy.data.images.new(image_name, width, height)
-    else:
-        image = bpy.data.images[image_name]
-        if image.size[0] != width or image.size[1] != height:
-            image.scale(width, height)
-    return image
-
-
-def _copy_buffer_to_pixel(buffer, image, width, height):
-
-    # According to
-    #   https://developer.blender.org/D2734
-    #   https://docs.blender.org/api/current/gpu.html#copy-offscreen-rendering-result-back-to-ram
-    # the buffer protocol is currently not implemented for
-    # gpu.types.Buffer and bpy.types.Image.pixels
-    # (this makes the extraction very slow)
-
-    # # from ..utility.timing_utility import StopWatch
-    # Option 1 (faster)
-    # sw = StopWatch()
-    buffer.dimensions = width * height * 4
-    image.pixels = [v / 255 for v in buffer]
-    # log_report('INFO', 'sw.get_elapsed_time(): ' + str(sw.get_elapsed_time()))
 
-    # Option 2 (slower)
-    # sw = StopWatch()
-    # buffer.dimensions = width * height * 4
-    # image.pixels = (np.asarray(buffer, dtype=np.uint8) / 255).tolist()
-    # log_report('INFO', 'sw.get_elapsed_time(): ' + str(sw.get_elapsed_time()))
\ No newline at end of file
+    image = create_image_lazy(image_name, width, height)
+    copy_pixels_to_image(pixels, image)
@@ -0,0 +1,91 @@
+import numpy as np
+import bpy
+from ..opengl.draw_manager import DrawManager
+from ..opengl.utility import replace_anchor_points
+from ..blender_utility.logging_utility import log_report
+from ..utility.timing_utility import StopWatch
+
+
+def _get_crop_objects(context, anchors):
+    return [obj for obj in context.selected_objects if obj not in anchors]
+
+
+def _get_existing_anchors(draw_manager):
+    existing_anchors = []
+    for object_anchor in draw_manager.get_anchors():
+        try:
+            # Check if object still exists
+            object_anchor.name
+        except ReferenceError:
+            continue
+        existing_anchors.append(object_anchor)
+    return existing_anchors
+
+
+class CropOpenGLPointCloudsOperator(bpy.types.Operator):
+    """An Operator to crop the OpenGL point clouds to the selection."""
+
+    bl_idname = "photogrammetry_importer.crop_opengl_point_clouds"
+    bl_label = "Crop Point Clouds to Selection"
+    bl_description = (
+        "Remove the points of the OpenGL point clouds outside of the"
+        " bounding boxes of the selected objects."
+    )
+
+    @classmethod
+    def poll(cls, context):
+        """Return the availability status of the operator."""
+        draw_manager = DrawManager.get_singleton()
+        anchors = draw_manager.get_anchors()
+        return (
+            len(anchors) > 0
+            and len(_get_crop_objects(context, anchors)) > 0
+        )
+
+    def execute(self, context):
+        """Keep only the points inside of the selected objects."""
+        log_report("INFO", "Crop point clouds: ...", self)
+        stop_watch = StopWatch()
+        draw_manager = DrawManager.get_singleton()
+        anchors = _get_existing_anchors(draw_manager)
+        crop_objects = _get_crop_objects(context, anchors)
+
+        for object_anchor in anchors:
+            if not object_anchor.visible_get():
+                continue
+            coords, colors = draw_manager.get_anchor_coords_and_colors(
+                object_anchor
+            )
+            # Keep the points inside of any of the (oriented) bounding boxes
+            indices = np.zeros(0, dtype=np.int64)
+            for crop_object in crop_objects:
+                corners = np.array(crop_object.bound_box)
+                indices = np.union1d(
+                    indices,
+                    draw_manager.query_points_in_box(
+                        object_anchor,
+                        corners.min(axis=0),
+                        corners.max(axis=0),
+                        matrix=np.array(crop_object.matrix_world),
+                    ),
+                )
+            if len(indices) == len(coords):
+                continue
+            log_report(
+                "INFO",
+                f"Crop {object_anchor.name}: keep {len(indices)} of"
+                f" {len(coords)} points",
+                self,
+            )
+            replace_anchor_points(
+                object_anchor, coords[indices], colors[indices]
+            )
+
+        log_report(
+            "INFO",
+            "Crop point clouds: Done (Duration: "
+            + str(stop_watch.get_elapsed_time())
+            + " s)",
+            self,
+        )
+        return {"FINISHED"}
@@ -8,7 +8,13 @@ from ..blender_utility.retrieval_utility import (
 )
 from ..opengl.draw_manager import DrawManager
 from ..opengl.utility import render_opengl_image
+from ..opengl.batch_renderer import (
+    OpenGLBatchRenderer,
+    ImageSequenceWriter,
+    compute_camera_perspective_matrix,
+)
 from ..blender_utility.logging_utility import log_report
+from ..blender_utility.animation_utility import CameraPoseEvaluator
 from ..blender_utility.image_utility import (
     save_image_to_disk,
 )
@@ -114,7 +120,7 @@ class ExportOpenGLRenderAnimationOperator(bpy.types.Operator, ExportHelper):
         if not os.path.isdir(output_dp):
             os.mkdir(output_dp)
 
-        # Used to cache the results
+        # Used to cache the results (of formats not supported by Pillow)
         image_name = "OpenGL Export"
         ext = "." + scene.opengl_panel_settings.render_file_format
         save_alpha = scene.opengl_panel_settings.save_alpha
@@ -131,20 +137,43 @@ class ExportOpenGLRenderAnimationOperator(bpy.types.Operator, ExportHelper):
         else:
             animation_indices = get_scene_animation_indices()
 
+        width = scene.render.resolution_x
+        height = scene.render.resolution_y
+
+        # Sample the camera animation for all frames at once instead of
+        # evaluating the whole scene for each frame
+        use_pose_evaluator = CameraPoseEvaluator.can_evaluate(selected_cam)
+        if use_pose_evaluator:
+            perspective_matrices = CameraPoseEvaluator(
+                selected_cam
+            ).compute_perspective_matrices(animation_indices, width, height)
+
         draw_manager = DrawManager.get_singleton()
         coords, colors = draw_manager.get_coords_and_colors(visible_only=True)
-        for idx in animation_indices:
-            bpy.context.scene.frame_set(idx)
-            current_frame_fn = str(idx).zfill(5) + ext
-            current_frame_fp = os.path.join(output_dp, current_frame_fn)
-
-            log_report(
-                "INFO", "Output File Path: " + str(current_frame_fp), self
-            )
-            render_opengl_image(
-                image_name, selected_cam, coords, colors, save_point_size
-            )
-            save_image_to_disk(image_name, current_frame_fp, save_alpha)
+        # Reuse the offscreen buffer and the point batch for all frames and
+        # encode the images in background threads while rendering
+        with OpenGLBatchRenderer(
+            coords, colors, save_point_size, width, height
+        ) as renderer, ImageSequenceWriter(
+            save_alpha, image_name=image_name
+        ) as writer:
+            for frame_idx, idx in enumerate(animation_indices):
+                current_frame_fn = str(idx).zfill(5) + ext
+                current_frame_fp = os.path.join(output_dp, current_frame_fn)
+
+                log_report(
+                    "INFO", "Output File Path: " + str(current_frame_fp), self
+                )
+                if use_pose_evaluator:
+                    perspective_matrix = perspective_matrices[frame_idx]
+                else:
+                    bpy.context.scene.frame_set(idx)
+                    perspective_matrix = compute_camera_perspective_matrix(
+                        selected_cam, width, height
+                    )
+                writer.write(
+                    current_frame_fp, renderer.render(perspective_matrix)
+                )
 
         log_report("INFO", "Save opengl render as animation: Done", self)
         return {"FINISHED"}
\ No newline at end of file
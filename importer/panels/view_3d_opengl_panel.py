@@ -15,8 +15,10 @@ from ..panels.render_operators import (
     ExportOpenGLRenderImageOperator,
     ExportOpenGLRenderAnimationOperator,
 )
+from ..panels.crop_operators import CropOpenGLPointCloudsOperator
 from ..types.point import Point
 from ..opengl.draw_manager import DrawManager
+from ..opengl.octree import DEFAULT_MAX_POINTS_PER_NODE
 from ..blender_utility.logging_utility import log_report
 from ..blender_utility.retrieval_utility import (
     get_selected_empty,
@@ -53,6 +55,32 @@ class OpenGLPanelSettings(bpy.types.PropertyGroup):
         set=set_viz_point_size,
         min=1,
     )
+
+    def get_viz_point_budget(self):
+        point_cloud_anchor = get_selected_empty()
+        if point_cloud_anchor is not None:
+            if "point_budget" in point_cloud_anchor:
+                return point_cloud_anchor["point_budget"]
+        return 3000000
+
+    def set_viz_point_budget(self, value):
+        point_cloud_anchor = get_selected_empty()
+        if point_cloud_anchor is not None:
+            point_cloud_anchor["point_budget"] = value
+
+            draw_manager = DrawManager.get_singleton()
+            draw_back_handler = draw_manager.get_draw_callback_handler(
+                point_cloud_anchor
+            )
+            draw_back_handler.set_point_budget(value)
+
+    viz_point_budget: IntProperty(
+        name="Point Budget",
+        description="Maximum number of points drawn per redraw.",
+        get=get_viz_point_budget,
+        set=set_viz_point_budget,
+        min=DEFAULT_MAX_POINTS_PER_NODE,
+    )
     only_3d_view: BoolProperty(
         name="Export Only 3D View",
         description="Export only the 3D view or the full UI of Blender",
@@ -121,6 +149,7 @@ class OpenGLPanel(bpy.types.Panel):
         bpy.utils.register_class(SaveOpenGLRenderImageOperator)
         bpy.utils.register_class(ExportOpenGLRenderImageOperator)
         bpy.utils.register_class(ExportOpenGLRenderAnimationOperator)
+        bpy.utils.register_class(CropOpenGLPointCloudsOperator)
 
     @classmethod
     def unregister(cls):
@@ -133,6 +162,7 @@ class OpenGLPanel(bpy.types.Panel):
         bpy.utils.unregister_class(SaveOpenGLRenderImageOperator)
         bpy.utils.unregister_class(ExportOpenGLRenderImageOperator)
         bpy.utils.unregister_class(ExportOpenGLRenderAnimationOperator)
+        bpy.utils.unregister_class(CropOpenGLPointCloudsOperator)
 
     def draw(self, context):
         """Draw the panel with corrresponding properties and operators."""
@@ -156,6 +186,21 @@ class OpenGLPanel(bpy.types.Panel):
             text="OpenGL Visualization Point Size",
         )
         row.enabled = anchor_selected
+        row = viz_box.row()
+        row.prop(
+            settings,
+            "viz_point_budget",
+            text="OpenGL Visualization Point Budget",
+        )
+        row.enabled = anchor_selected
+
+        crop_box = layout.box()
+        crop_box.label(
+            text="Select objects to crop the point clouds to their bounding"
+            " boxes."
+        )
+        row = crop_box.row()
+        row.operator(CropOpenGLPointCloudsOperator.bl_idname)
 
         export_screenshot_box = layout.box()
         export_screenshot_box.label(
@@ -1,6 +1,21 @@
 import math
 import os
 import numpy as np
+from ..types.camera_poses import CameraPoses
+
+
+def _create_read_only_array(values, dtype=float):
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+# Default values shared by all cameras. The setters replace (and never
+# modify) these arrays.
+_ZERO_VEC = _create_read_only_array([0, 0, 0])
+_ZERO_QUATERNION = _create_read_only_array([0, 0, 0, 0])
+_ZERO_MAT = _create_read_only_array(np.zeros((3, 3)))
+_WHITE_COLOR = _create_read_only_array([255, 255, 255], dtype=int)
 
 
 class Camera:
@@ -8,8 +23,38 @@ class Camera:
 
     It provides functionality to manage intrinsic and extrinsic camera
     parameters as well as corresponding image and depth map information.
+
+    The pose may be stored in a shared :code:`CameraPoses` object (see
+    :code:`set_pose_reference()`) and the intrinsics in the columns of a
+    :code:`CameraSet`. In this case, the getters return views of the shared
+    arrays and the setters write into them.
     """
 
+    __slots__ = (
+        "_poses",
+        "_pose_index",
+        "_camera_set",
+        "_index",
+        "normal",
+        "color",
+        "_calibration_mat",
+        "_radial_distortion",
+        "image_fp_type",
+        "image_dp",
+        "_relative_fp",
+        "_absolute_fp",
+        "_undistorted_relative_fp",
+        "_undistorted_absolute_fp",
+        "_width",
+        "_height",
+        "_panoramic_type",
+        "_depth_map_callback",
+        "_depth_map_fp",
+        "_depth_map_semantic",
+        "_shift_depth_map_to_pixel_center",
+        "id",
+    )
+
     panoramic_type_equirectangular = "EQUIRECTANGULAR"
 
     IMAGE_FP_TYPE_NAME = "NAME"
@@ -20,16 +65,23 @@ class Camera:
     DEPTH_MAP_WRT_CANONICAL_VECTORS = "DEPTH_MAP_WRT_CANONICAL_VECTORS"
 
     def __init__(self):
-        self._center = np.array([0, 0, 0], dtype=float)  # C = -R^T t
-        self._translation_vec = np.array([0, 0, 0], dtype=float)  # t = -R C
-        self.normal = np.array([0, 0, 0], dtype=float)
-        self.color = np.array([255, 255, 255], dtype=int)
+        self.normal = _ZERO_VEC
+        self.color = _WHITE_COLOR
 
-        # Use these attributes ONLY with getter and setter methods
-        self._quaternion = np.array([0, 0, 0, 0], dtype=float)
-        self._rotation_mat = np.zeros((3, 3), dtype=float)
+        # Use these attributes ONLY with getter and setter methods. The pose
+        # (i.e. the quaternion, the rotation matrix, the translation
+        # t = -R C and the center C = -R^T t) is stored in a (possibly
+        # shared) CameraPoses object, which is created with the first setter
+        # call.
+        self._poses = None
+        self._pose_index = None
 
-        self._calibration_mat = np.zeros((3, 3), dtype=float)
+        # The camera set providing the intrinsics (see CameraSet)
+        self._camera_set = None
+        self._index = None
+
+        self._calibration_mat = _ZERO_MAT
+        self._radial_distortion = None
 
         self.image_fp_type = None
         self.image_dp = None
@@ -40,8 +92,8 @@ class Camera:
         self._undistorted_relative_fp = None
         self._undistorted_absolute_fp = None
 
-        self.width = None
-        self.height = None
+        self._width = None
+        self._height = None
         self._panoramic_type = None
 
         # Parameters of the depth map callback
@@ -60,7 +112,7 @@ class Camera:
             "Camera: "
             + self._relative_fp
             + " "
-            + str(self._center)
+            + str(self.get_camera_center())
             + " "
             + str(self.normal)
         )
@@ -158,19 +210,63 @@ class Camera:
         else:
             return None
 
+    def set_camera_set_reference(self, camera_set, index):
+        """Use a row of the columns of a :code:`CameraSet` as intrinsics."""
+        self._camera_set = camera_set
+        self._index = index
+
+    @property
+    def width(self):
+        """The width of the image (or None if undefined)."""
+        if self._camera_set is None:
+            return self._width
+        return self._camera_set.get_width(self._index)
+
+    @width.setter
+    def width(self, width):
+        if self._camera_set is None:
+            self._width = width
+        else:
+            self._camera_set.set_width(self._index, width)
+
+    @property
+    def height(self):
+        """The height of the image (or None if undefined)."""
+        if self._camera_set is None:
+            return self._height
+        return self._camera_set.get_height(self._index)
+
+    @height.setter
+    def height(self, height):
+        if self._camera_set is None:
+            self._height = height
+        else:
+            self._camera_set.set_height(self._index, height)
+
+    def _get_calibration_mat(self):
+        if self._camera_set is None:
+            return self._calibration_mat
+        return self._camera_set.calibration_mats[self._index]
+
+    def _set_calibration_mat(self, calibration_mat):
+        if self._camera_set is None:
+            self._calibration_mat = np.array(calibration_mat, dtype=float)
+        else:
+            self._camera_set.calibration_mats[self._index] = calibration_mat
+
     def set_calibration(self, calibration_mat, radial_distortion):
         """Set calibration matrix and distortion parameter."""
-        self._calibration_mat = np.asarray(calibration_mat, dtype=float)
+        self._set_calibration_mat(calibration_mat)
         self._radial_distortion = radial_distortion
         assert self._radial_distortion is not None
 
     def has_focal_length(self):
         """Return wether the focal length value has been defined or not."""
-        return self._calibration_mat[0][0] > 0
+        return self._get_calibration_mat()[0][0] > 0
 
     def get_focal_length(self):
         """Return the focal length value."""
-        return self._calibration_mat[0][0]
+        return self._get_calibration_mat()[0][0]
 
     def get_field_of_view(self):
         """Return the field of view corresponding to the focal length."""
@@ -193,16 +289,18 @@ class Camera:
     def get_calibration_mat(self):
         """Return the calibration matrix."""
         self._check_calibration_mat()
-        return self._calibration_mat
+        return self._get_calibration_mat()
 
     def set_calibration_mat(self, calibration_mat):
         """Set the calibration matrix."""
-        self._calibration_mat = calibration_mat
+        self._set_calibration_mat(calibration_mat)
 
     def set_principal_point(self, principal_point):
         """Set the principal point."""
-        self._calibration_mat[0][2] = principal_point[0]
-        self._calibration_mat[1][2] = principal_point[1]
+        calibration_mat = np.array(self._get_calibration_mat(), dtype=float)
+        calibration_mat[0][2] = principal_point[0]
+        calibration_mat[1][2] = principal_point[1]
+        self._set_calibration_mat(calibration_mat)
 
     def get_principal_point(self):
         """Return the principal point."""
@@ -213,8 +311,9 @@ class Camera:
 
     def has_principal_point(self):
         """Return wether the principal point has been defined or not."""
-        cx_zero = np.isclose(self._calibration_mat[0][2], 0.0)
-        cy_zero = np.isclose(self._calibration_mat[1][2], 0.0)
+        calibration_mat = self._get_calibration_mat()
+        cx_zero = np.isclose(calibration_mat[0][2], 0.0)
+        cy_zero = np.isclose(calibration_mat[1][2], 0.0)
         initialized = (not cx_zero) and (not cy_zero)
         return initialized
 
@@ -238,11 +337,34 @@ class Camera:
             dtype=float,
         )
 
+    def set_pose_reference(self, poses, index):
+        """Use a row of a shared :code:`CameraPoses` object as camera pose.
+
+        The getters return views of the pose arrays and the setters modify
+        the corresponding row, i.e. no per camera copy is created.
+        """
+        self._poses = poses
+        self._pose_index = index
+
+    def get_pose_reference(self):
+        """Return the poses and the index of the camera (if any)."""
+        if self._poses is None:
+            return None
+        return self._poses, self._pose_index
+
+    def _get_writable_poses(self):
+        if self._poses is None:
+            self.set_pose_reference(CameraPoses.create_zeros(1), 0)
+        return self._poses, self._pose_index
+
     def set_rotation_with_quaternion(self, quaternion):
         """Set the camera rotation using a quaternion."""
-        self._quaternion = quaternion
+        poses, index = self._get_writable_poses()
+        poses.quaternions[index] = quaternion
         # We must change the rotation matrixes as well.
-        self._rotation_mat = Camera.quaternion_to_rotation_matrix(quaternion)
+        poses.rotation_mats[index] = Camera.quaternion_to_rotation_matrix(
+            quaternion
+        )
 
     def set_rotation_with_rotation_mat(
         self, rotation_mat, check_rotation=True
@@ -250,45 +372,60 @@ class Camera:
         """Set the camera rotation using a rotation matrix."""
         if check_rotation:
             assert self.__class__._is_rotation_mat_valid(rotation_mat)
-        self._rotation_mat = rotation_mat
+        poses, index = self._get_writable_poses()
+        poses.rotation_mats[index] = rotation_mat
         # We must change the quaternion as well.
-        self._quaternion = Camera.rotation_matrix_to_quaternion(rotation_mat)
+        poses.quaternions[index] = Camera.rotation_matrix_to_quaternion(
+            rotation_mat
+        )
 
     def set_camera_center_after_rotation(self, center, check_rotation=True):
         """Set the camera center after setting the camera rotation."""
+        rotation_mat = self.get_rotation_as_rotation_mat()
         if check_rotation:
-            assert self.__class__._is_rotation_mat_valid(self._rotation_mat)
-        self._center = center
+            assert self.__class__._is_rotation_mat_valid(rotation_mat)
+        poses, index = self._get_writable_poses()
+        poses.centers[index] = center
         # t = -R C
-        self._translation_vec = -np.dot(self._rotation_mat, center)
+        poses.translation_vecs[index] = -np.dot(rotation_mat, center)
 
     def set_camera_translation_vector_after_rotation(
         self, translation_vector, check_rotation=True
     ):
         """Set the camera translation after setting the camera rotation."""
+        rotation_mat = self.get_rotation_as_rotation_mat()
         if check_rotation:
-            assert self.__class__._is_rotation_mat_valid(self._rotation_mat)
-        self._translation_vec = translation_vector
+            assert self.__class__._is_rotation_mat_valid(rotation_mat)
+        poses, index = self._get_writable_poses()
+        poses.translation_vecs[index] = translation_vector
         # C = -R^T t
-        self._center = -np.dot(
-            self._rotation_mat.transpose(), translation_vector
+        poses.centers[index] = -np.dot(
+            rotation_mat.transpose(), translation_vector
         )
 
     def get_rotation_as_quaternion(self):
         """Return the rotation as quaternion."""
-        return self._quaternion
+        if self._poses is None:
+            return _ZERO_QUATERNION
+        return self._poses.quaternions[self._pose_index]
 
     def get_rotation_as_rotation_mat(self):
         """Return the rotation as rotation matrix."""
-        return self._rotation_mat
+        if self._poses is None:
+            return _ZERO_MAT
+        return self._poses.rotation_mats[self._pose_index]
 
     def get_translation_vec(self):
         """Return the translation vector."""
-        return self._translation_vec
+        if self._poses is None:
+            return _ZERO_VEC
+        return self._poses.translation_vecs[self._pose_index]
 
     def get_camera_center(self):
         """Return the camera center."""
-        return self._center
+        if self._poses is None:
+            return _ZERO_VEC
+        return self._poses.centers[self._pose_index]
 
     def set_4x4_world_to_cam_mat(self, world_to_cam_mat, check_rotation=True):
         """Set the extrinsic parameters using a world to camera matrix."""
@@ -322,6 +459,23 @@ class Camera:
             cam_to_world_mat[0:3, 3], check_rotation=check_rotation
         )
 
+    def apply_similarity_transform(self, transform_mat):
+        """Transform the camera pose with a 4x4 similarity transformation.
+
+        The scale of the transformation affects only the camera center (and
+        not the depth maps).
+        """
+        linear_mat = transform_mat[0:3, 0:3]
+        scale = np.cbrt(np.linalg.det(linear_mat))
+        rotation_mat = linear_mat / scale
+        # The rotation of the camera maps world to camera coordinates
+        self.set_rotation_with_rotation_mat(
+            self.get_rotation_as_rotation_mat().dot(rotation_mat.transpose())
+        )
+        self.set_camera_center_after_rotation(
+            linear_mat.dot(self.get_camera_center()) + transform_mat[0:3, 3]
+        )
+
     @staticmethod
     def _is_rotation_mat_valid(some_mat):
         # Test if rotation_mat is really a rotation matrix
@@ -0,0 +1,158 @@
+import numpy as np
+from ..utility.pose_utility import (
+    compute_quaternion_rotation_matrices,
+    compute_rotation_matrix_quaternions,
+    compute_camera_centers,
+    compute_translation_vecs,
+    compute_cam_to_world_mats,
+    invert_camera_y_and_z_axes,
+)
+
+
+class CameraPoses:
+    """This class stores the extrinsic parameters of many cameras as arrays.
+
+    The rotations map world coordinates to camera coordinates (i.e. x_cam =
+    R x_world + t). Cameras referencing these poses (see
+    :code:`Camera.set_pose_reference()`) read and write the corresponding
+    rows, thus in place modifications of the arrays are visible to all
+    cameras.
+    """
+
+    def __init__(self, quaternions, rotation_mats, translation_vecs, centers):
+        self.quaternions = quaternions
+        self.rotation_mats = rotation_mats
+        self.translation_vecs = translation_vecs
+        self.centers = centers
+
+    def __len__(self):
+        return len(self.rotation_mats)
+
+    @classmethod
+    def create_zeros(cls, num_cameras):
+        """Create poses with zero entries (i.e. undefined poses)."""
+        return cls(
+            np.zeros((num_cameras, 4), dtype=float),
+            np.zeros((num_cameras, 3, 3), dtype=float),
+            np.zeros((num_cameras, 3), dtype=float),
+            np.zeros((num_cameras, 3), dtype=float),
+        )
+
+    @classmethod
+    def from_quaternions_and_translation_vecs(
+        cls, quaternions, translation_vecs
+    ):
+        """Create the poses from (n, 4) quaternions and (n, 3) translations."""
+        quaternions = np.array(quaternions, dtype=float).reshape(-1, 4)
+        translation_vecs = np.array(translation_vecs, dtype=float).reshape(
+            -1, 3
+        )
+        rotation_mats = compute_quaternion_rotation_matrices(quaternions)
+        centers = compute_camera_centers(rotation_mats, translation_vecs)
+        return cls(quaternions, rotation_mats, translation_vecs, centers)
+
+    @classmethod
+    def from_rotation_mats_and_centers(cls, rotation_mats, centers):
+        """Create the poses from (n, 3, 3) rotations and (n, 3) centers."""
+        rotation_mats = np.array(rotation_mats, dtype=float).reshape(-1, 3, 3)
+        centers = np.array(centers, dtype=float).reshape(-1, 3)
+        quaternions = compute_rotation_matrix_quaternions(rotation_mats)
+        translation_vecs = compute_translation_vecs(rotation_mats, centers)
+        return cls(quaternions, rotation_mats, translation_vecs, centers)
+
+    @classmethod
+    def from_cameras(cls, cameras):
+        """Return the poses of a list of cameras.
+
+        If all cameras reference the same poses, the rows are selected
+        without converting the poses of the individual cameras.
+        """
+        poses, indices = _get_shared_pose_indices(cameras)
+        if poses is not None:
+            return cls(
+                poses.quaternions[indices],
+                poses.rotation_mats[indices],
+                poses.translation_vecs[indices],
+                poses.centers[indices],
+            )
+        return cls(
+            np.array(
+                [camera.get_rotation_as_quaternion() for camera in cameras],
+                dtype=float,
+            ).reshape(-1, 4),
+            np.array(
+                [camera.get_rotation_as_rotation_mat() for camera in cameras],
+                dtype=float,
+            ).reshape(-1, 3, 3),
+            np.array(
+                [camera.get_translation_vec() for camera in cameras],
+                dtype=float,
+            ).reshape(-1, 3),
+            np.array(
+                [camera.get_camera_center() for camera in cameras],
+                dtype=float,
+            ).reshape(-1, 3),
+        )
+
+    def compute_cam_to_world_mats(self):
+        """Return the (n, 4, 4) camera to world matrices."""
+        return compute_cam_to_world_mats(self.rotation_mats, self.centers)
+
+    def compute_matrices_world(self, convert_coordinate_system=True):
+        """Return Blender's :code:`matrix_world` of all cameras.
+
+        If :code:`convert_coordinate_system` is True, the computer vision
+        camera coordinate systems are converted to Blender's camera
+        coordinate system.
+        """
+        mats = self.compute_cam_to_world_mats()
+        if convert_coordinate_system:
+            mats = invert_camera_y_and_z_axes(mats)
+        return mats
+
+    def apply_similarity_transform(self, transform_mat):
+        """Transform all poses (in place) with a 4x4 similarity transform.
+
+        See :code:`Camera.apply_similarity_transform()`.
+        """
+        transform_mat = np.asarray(transform_mat, dtype=float)
+        linear_mat = transform_mat[0:3, 0:3]
+        scale = np.cbrt(np.linalg.det(linear_mat))
+        rotation_mat = linear_mat / scale
+        self.rotation_mats[...] = self.rotation_mats @ rotation_mat.T
+        self.quaternions[...] = compute_rotation_matrix_quaternions(
+            self.rotation_mats
+        )
+        self.centers[...] = self.centers @ linear_mat.T + transform_mat[0:3, 3]
+        self.translation_vecs[...] = compute_translation_vecs(
+            self.rotation_mats, self.centers
+        )
+
+
+def _get_shared_pose_indices(cameras):
+    poses = None
+    indices = np.empty(len(cameras), dtype=np.int64)
+    for index, camera in enumerate(cameras):
+        pose_reference = camera.get_pose_reference()
+        if pose_reference is None:
+            return None, None
+        camera_poses, indices[index] = pose_reference
+        if poses is None:
+            poses = camera_poses
+        elif camera_poses is not poses:
+            return None, None
+    return poses, indices
+
+
+def apply_similarity_transform_to_cameras(cameras, transform_mat):
+    """Transform the poses of the cameras with a 4x4 similarity transform.
+
+    If the cameras reference all poses of a shared :code:`CameraPoses`
+    object, the poses are transformed at once.
+    """
+    poses, indices = _get_shared_pose_indices(cameras)
+    if poses is not None and len(np.unique(indices)) == len(poses):
+        poses.apply_similarity_transform(transform_mat)
+        return
+    for camera in cameras:
+        camera.apply_similarity_transform(transform_mat)
@@ -0,0 +1,75 @@
+from collections.abc import Sequence
+import numpy as np
+from ..types.camera import Camera
+from ..types.camera_poses import CameraPoses
+
+
+class CameraSet(Sequence):
+    """This class stores the parameters of many cameras as columnar arrays.
+
+    The poses are stored in a :code:`CameraPoses` object, the calibration
+    matrices and the image sizes in (n, 3, 3) and (n,) arrays. The elements
+    of the set are lightweight :code:`Camera` objects referencing the rows
+    of these arrays, i.e. they provide the usual camera interface without
+    allocating arrays per camera. Undefined image sizes are stored as -1.
+    """
+
+    def __init__(
+        self, poses, calibration_mats=None, widths=None, heights=None
+    ):
+        num_cameras = len(poses)
+        self.poses = poses
+        if calibration_mats is None:
+            calibration_mats = np.zeros((num_cameras, 3, 3), dtype=float)
+        self.calibration_mats = np.array(calibration_mats, dtype=float)
+        self.widths = self._create_size_array(widths, num_cameras)
+        self.heights = self._create_size_array(heights, num_cameras)
+        self._cameras = []
+        for index in range(num_cameras):
+            camera = Camera()
+            camera.set_pose_reference(poses, index)
+            camera.set_camera_set_reference(self, index)
+            self._cameras.append(camera)
+
+    @staticmethod
+    def _create_size_array(sizes, num_cameras):
+        if sizes is None:
+            return np.full(num_cameras, -1, dtype=np.int64)
+        return np.array(sizes, dtype=np.int64).reshape(num_cameras)
+
+    @classmethod
+    def create(cls, num_cameras):
+        """Create a set of cameras without pose and intrinsics."""
+        return cls(CameraPoses.create_zeros(num_cameras))
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def __getitem__(self, index):
+        return self._cameras[index]
+
+    def get_width(self, index):
+        """Return the image width of a camera (or None if undefined)."""
+        width = self.widths[index]
+        return None if width < 0 else int(width)
+
+    def set_width(self, index, width):
+        """Set the image width of a camera."""
+        self.widths[index] = -1 if width is None else width
+
+    def get_height(self, index):
+        """Return the image height of a camera (or None if undefined)."""
+        height = self.heights[index]
+        return None if height < 0 else int(height)
+
+    def set_height(self, index, height):
+        """Set the image height of a camera."""
+        self.heights[index] = -1 if height is None else height
+
+    def get_focal_lengths(self):
+        """Return the focal lengths of all cameras."""
+        return self.calibration_mats[:, 0, 0]
+
+    def get_principal_points(self):
+        """Return the principal points of all cameras as (n, 2) array."""
+        return self.calibration_mats[:, 0:2, 2]
@@ -31,6 +31,23 @@ class Point(namedtuple("Point", ["coord", "color", "id", "scalars"])):
             colors.append(color_with_alpha)
         return coords, colors
 
+    @staticmethod
+    def split_points_as_arrays(points, coords_dtype=np.float32):
+        """Split points into coordinate and color arrays.
+
+        Return the coordinates as array with shape (n, 3) (float32 by
+        default) and the colors as uint8 RGBA array with shape (n, 4).
+        """
+        num_points = len(points)
+        coords = np.empty((num_points, 3), dtype=coords_dtype)
+        colors = np.full((num_points, 4), 255, dtype=np.uint8)
+        if num_points > 0:
+            coords[:] = [point.coord for point in points]
+            colors[:, 0:3] = np.clip(
+                [point.color[0:3] for point in points], 0, 255
+            )
+        return coords, colors
+
     @staticmethod
     def create_points(coords, colors, unnormalize_colors=False):
         if unnormalize_colors:
@@ -46,25 +63,3 @@ class Point(namedtuple("Point", ["coord", "color", "id", "scalars"])):
             )
             for idx, (coord, color) in enumerate(zip(coords, colors))
         ]
-
-    @staticmethod
-    def _compute_centroid_coord(points):
-        centroid = np.array(
-            sum([point.coord for point in points]) / float(len(points)),
-            dtype=float,
-        )
-        return centroid
-
-    @staticmethod
-    def get_centered_points(points):
-        centroid_coord = Point._compute_centroid_coord(points)
-        mean_free_points = []
-        for point in points:
-            mean_free_point = Point(
-                coord=point.coord - centroid_coord,
-                color=point.color,
-                id=point.id,
-                scalars=point.scalars,
-            )
-            mean_free_points.append(mean_free_point)
-        return mean_free_points
@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Linux ioctl request that clones the extents of a file (e.g. on Btrfs or
+# XFS), i.e. the "copy" shares the data blocks with the source file
+_FICLONE = 0x40049409
+
+
+def _reflink_file(ifp, ofp):
+    if not sys.platform.startswith("linux"):
+        raise OSError("Reflinks are only supported on Linux")
+    import fcntl
+
+    with open(ifp, "rb") as input_file, open(ofp, "wb") as output_file:
+        fcntl.ioctl(output_file.fileno(), _FICLONE, input_file.fileno())
+    shutil.copystat(ifp, ofp)
+
+
+def _copy_file(ifp, ofp):
+    # Preserves the modification time (required by is_file_unchanged())
+    shutil.copy2(ifp, ofp)
+
+
+# Functions of the transfer methods used by the transfer modes
+_TRANSFER_FUNCTIONS = {
+    "REFLINK": _reflink_file,
+    "HARDLINK": os.link,
+    "SYMLINK": os.symlink,
+    "COPY": _copy_file,
+}
+
+
+def _get_transfer_methods(transfer_mode):
+    if transfer_mode == "COPY":
+        return ["COPY"]
+    if transfer_mode == "SYMLINK":
+        # Symbolic links may require special privileges (e.g. on Windows)
+        return ["SYMLINK", "HARDLINK", "COPY"]
+    assert transfer_mode == "AUTO"
+    # Hard links and reflinks require the same file system
+    return ["REFLINK", "HARDLINK", "COPY"]
+
+
+def is_file_unchanged(ifp, ofp, transfer_method):
+    """Return True, if the output file corresponds to the input file.
+
+    The output must have been created with the given transfer method (see
+    :code:`transfer_file()`). A :code:`SYMLINK` must point to the input
+    file and a :code:`HARDLINK` must refer to the same file. A
+    :code:`REFLINK` or a :code:`COPY` must be a separate file with the same
+    size and modification time.
+    """
+    try:
+        if os.path.islink(ofp):
+            return transfer_method == "SYMLINK" and os.readlink(ofp) == ifp
+        if transfer_method == "SYMLINK":
+            return False
+        input_stat = os.stat(ifp)
+        output_stat = os.stat(ofp)
+    except OSError:
+        return False
+    if os.path.samestat(input_stat, output_stat):
+        return transfer_method == "HARDLINK"
+    return (
+        transfer_method in ["REFLINK", "COPY"]
+        and input_stat.st_size == output_stat.st_size
+        and input_stat.st_mtime_ns == output_stat.st_mtime_ns
+    )
+
+
+def transfer_file(ifp, ofp, transfer_mode="AUTO"):
+    """Create a (linked) copy of a file.
+
+    The :code:`transfer_mode` can be :code:`AUTO` (use a reflink or a hard
+    link if possible, otherwise copy the file), :code:`COPY` or
+    :code:`SYMLINK` (create a symbolic link if possible). Existing output
+    files are replaced atomically. Returns the transfer method that was
+    used (i.e. :code:`REFLINK`, :code:`HARDLINK`, :code:`SYMLINK` or
+    :code:`COPY`).
+    """
+    tmp_ofp = ofp + ".tmp" + str(os.getpid())
+    for transfer_method in _get_transfer_methods(transfer_mode):
+        if os.path.lexists(tmp_ofp):
+            os.remove(tmp_ofp)
+        try:
+            _TRANSFER_FUNCTIONS[transfer_method](ifp, tmp_ofp)
+        except OSError:
+            if transfer_method == "COPY":
+                raise
+            continue
+        os.replace(tmp_ofp, ofp)
+        return transfer_method
+
+
+def transfer_files(
+    file_pairs, transfer_mode="AUTO", previous_methods=None, max_workers=None
+):
+    """Transfer many files in parallel (see :code:`transfer_file()`).
+
+    The optional :code:`previous_methods` map output paths to the transfer
+    methods used by a previous transfer with the same transfer mode. These
+    outputs are skipped, if they still correspond to the input files.
+    Returns a dictionary mapping each output path to its transfer method as
+    well as the number of transferred and the number of skipped files.
+    """
+    if previous_methods is None:
+        previous_methods = {}
+    transfer_methods = {}
+    pending_pairs = []
+    for ifp, ofp in file_pairs:
+        previous_method = previous_methods.get(ofp)
+        if previous_method is not None and is_file_unchanged(
+            ifp, ofp, previous_method
+        ):
+            transfer_methods[ofp] = previous_method
+        else:
+            pending_pairs.append((ifp, ofp))
+    num_skipped = len(file_pairs) - len(pending_pairs)
+    if len(pending_pairs) == 0:
+        return transfer_methods, 0, num_skipped
+
+    if max_workers is None:
+        # Copying is I/O bound, so more threads than cores are reasonable
+        max_workers = min(32, 4 * (os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (ofp, executor.submit(transfer_file, ifp, ofp, transfer_mode))
+            for ifp, ofp in pending_pairs
+        ]
+        for ofp, future in futures:
+            # Propagate exceptions of the worker threads
+            transfer_methods[ofp] = future.result()
+    return transfer_methods, len(pending_pairs), num_skipped
+
+
+class FileSequenceManifest:
+    """Class that records the files of a (virtual) file sequence.
+
+    The manifest maps the file names of a sequence directory to the paths of
+    the corresponding source files. This allows to remove outdated files
+    (which would otherwise be considered as part of the sequence) and to
+    create the sequence from links to the source files. The manifest also
+    records the transfer mode and the transfer method of each file (e.g. a
+    copy, if symbolic links are not supported), which allows to skip
+    unchanged files of later updates with the same transfer mode.
+    """
+
+    manifest_fn = "sequence_manifest.json"
+
+    def __init__(self, sequence_dp):
+        self._sequence_dp = sequence_dp
+        self._manifest_ifp = os.path.join(sequence_dp, self.manifest_fn)
+
+    def read(self):
+        """Return the recorded transfer mode and files.
+
+        The files are given as dictionary mapping the file names to pairs of
+        source paths and transfer methods.
+        """
+        if not os.path.isfile(self._manifest_ifp):
+            return None, {}
+        try:
+            with open(self._manifest_ifp, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+            files = {}
+            for fn, (source_fp, method) in manifest["files"].items():
+                files[fn] = (source_fp, method)
+            return manifest["transfer_mode"], files
+        except (OSError, ValueError, TypeError, KeyError):
+            return None, {}
+
+    def write(self, transfer_mode, files):
+        """Record the transfer mode and the files (see :code:`read()`)."""
+        manifest = {"transfer_mode": transfer_mode, "files": files}
+        tmp_ifp = self._manifest_ifp + ".tmp" + str(os.getpid())
+        with open(tmp_ifp, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=1)
+        os.replace(tmp_ifp, self._manifest_ifp)
+
+    def update(self, source_fps, transfer_mode="AUTO", max_workers=None):
+        """Create the sequence files and update the manifest.
+
+        Files of a previous sequence that are not part of the new sequence
+        are removed. Returns the number of transferred, skipped and removed
+        files.
+        """
+        os.makedirs(self._sequence_dp, exist_ok=True)
+        previous_transfer_mode, previous_files = self.read()
+        num_removed = 0
+        for fn in previous_files:
+            fp = os.path.join(self._sequence_dp, fn)
+            if fn not in source_fps and os.path.lexists(fp):
+                os.remove(fp)
+                num_removed += 1
+
+        # Reuse only files created with the same mode from the same source
+        previous_methods = {}
+        if previous_transfer_mode == transfer_mode:
+            for fn, (source_fp, transfer_method) in previous_files.items():
+                if source_fps.get(fn) == source_fp:
+                    fp = os.path.join(self._sequence_dp, fn)
+                    previous_methods[fp] = transfer_method
+        file_pairs = [
+            (source_fp, os.path.join(self._sequence_dp, fn))
+            for fn, source_fp in source_fps.items()
+        ]
+        transfer_methods, num_transferred, num_skipped = transfer_files(
+            file_pairs,
+            transfer_mode=transfer_mode,
+            previous_methods=previous_methods,
+            max_workers=max_workers,
+        )
+        files = {
+            fn: (source_fp, transfer_methods[ofp])
+            for (source_fp, ofp), fn in zip(file_pairs, source_fps)
+        }
+        self.write(transfer_mode, files)
+        return num_transferred, num_skipped, num_removed
@@ -1,5 +1,8 @@
 import os
 import re
+import sys
+import time
+import threading
 
 
 def _natural_key(some_string):
@@ -9,6 +12,148 @@ def _natural_key(some_string):
     ]
 
 
+# Directories modified within this period before a scan may change again
+# without changing their modification time (file system time granularity)
+_MTIME_GRANULARITY_NS = 2 * 10**9
+
+
+class DirectoryIndex:
+    """Class that caches the file entries of a directory.
+
+    The directory is scanned once with :code:`os.scandir()`. The entries
+    (relative paths and modification times) are stored in natural order,
+    membership queries are answered with sets. An index is rescanned, if the
+    modification time of the directory (or of one of the scanned
+    subdirectories) changes. Use :code:`get_index()` to obtain a shared
+    index.
+    """
+
+    _indices = {}
+    _indices_lock = threading.Lock()
+
+    def __init__(self, idp, recursive=True):
+        self._idp = idp
+        self._recursive = recursive
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dir_mtimes = None
+        self._is_racy = True
+        self._relative_fps = None
+        self._base_names = None
+
+    @classmethod
+    def get_index(cls, idp, recursive=True):
+        """Return the (updated) shared index of the given directory."""
+        key = (os.path.abspath(idp), recursive)
+        with cls._indices_lock:
+            index = cls._indices.get(key)
+            if index is None:
+                index = cls(key[0], recursive)
+                cls._indices[key] = index
+        index.update()
+        return index
+
+    def _is_outdated(self):
+        if self._entries is None or self._is_racy:
+            return True
+        for dp, mtime_ns in self._dir_mtimes.items():
+            try:
+                if os.stat(dp).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _scan(self):
+        scan_start_ns = time.time_ns()
+        entries = []
+        dir_mtimes = {}
+        pending_dps = [self._idp]
+        while pending_dps:
+            dp = pending_dps.pop()
+            try:
+                dir_mtimes[dp] = os.stat(dp).st_mtime_ns
+                with os.scandir(dp) as dir_entries:
+                    dir_entries = list(dir_entries)
+            except OSError:
+                if dp == self._idp:
+                    raise
+                continue
+            for dir_entry in dir_entries:
+                try:
+                    if dir_entry.is_dir():
+                        # Do not follow symbolic links (like os.walk())
+                        if self._recursive and not dir_entry.is_symlink():
+                            pending_dps.append(dir_entry.path)
+                    elif dir_entry.is_file():
+                        relative_fp = os.path.relpath(
+                            dir_entry.path, self._idp
+                        )
+                        mtime_ns = dir_entry.stat().st_mtime_ns
+                        entries.append((relative_fp, mtime_ns))
+                except OSError:
+                    # The entry has been removed during the scan
+                    continue
+        entries.sort(key=lambda entry: _natural_key(entry[0]))
+
+        self._entries = entries
+        self._dir_mtimes = dir_mtimes
+        self._is_racy = any(
+            mtime_ns >= scan_start_ns - _MTIME_GRANULARITY_NS
+            for mtime_ns in dir_mtimes.values()
+        )
+        self._relative_fps = {relative_fp for relative_fp, _ in entries}
+        self._base_names = {
+            os.path.basename(relative_fp) for relative_fp in self._relative_fps
+        }
+
+    def update(self):
+        """Rescan the directory, if it has been modified."""
+        with self._lock:
+            if self._is_outdated():
+                self._scan()
+
+    def get_entries(self):
+        """Return the naturally sorted (relative path, mtime_ns) tuples."""
+        return self._entries
+
+    def get_relative_file_paths(self):
+        """Return the naturally sorted relative paths of the files."""
+        return [relative_fp for relative_fp, _ in self._entries]
+
+    def contains(self, relative_fp):
+        """Return True, if the directory contains the relative path."""
+        return os.path.normpath(relative_fp) in self._relative_fps
+
+    def contains_base_name(self, base_name):
+        """Return True, if a file with the given name exists."""
+        return base_name in self._base_names
+
+
+def get_existing_file_paths(fps):
+    """Return the set of the given file paths that exist.
+
+    The paths are grouped by their directories, i.e. the existence is
+    determined with a single (cached) scan per directory. Paths missing in
+    the index (e.g. due to case insensitive file systems) are checked
+    individually.
+    """
+    fps_per_dp = {}
+    for fp in fps:
+        fps_per_dp.setdefault(os.path.dirname(fp), []).append(fp)
+    existing_fps = set()
+    for dp, dp_fps in fps_per_dp.items():
+        if not os.path.isdir(dp or "."):
+            continue
+        index = DirectoryIndex.get_index(dp or ".", recursive=False)
+        existing_fps.update(
+            fp
+            for fp in dp_fps
+            if index.contains(os.path.basename(fp)) or os.path.isfile(fp)
+        )
+    return existing_fps
+
+
 def get_file_paths_in_dir(
     idp,
     ext=None,
@@ -24,19 +169,15 @@ def get_file_paths_in_dir(
     """Return the paths of the files in the given directory.
 
     The parameter :code:`ext` can be a list of extensions or a single extension
-    (e.g. [:code:`.jpg`, :code:`.png`] or :code:`.jpg`).
+    (e.g. [:code:`.jpg`, :code:`.png`] or :code:`.jpg`). The entries are
+    provided by a cached :code:`DirectoryIndex`.
     """
 
-    if recursive:
-        ifp_s = []
-        for root, dirs, files in os.walk(idp):
-            ifp_s += [os.path.join(root, ele) for ele in files]
-    else:
-        ifp_s = [
-            os.path.join(idp, ele)
-            for ele in os.listdir(idp)
-            if os.path.isfile(os.path.join(idp, ele))
-        ]
+    index = DirectoryIndex.get_index(idp, recursive=recursive)
+    ifp_s = [
+        os.path.join(idp, relative_fp)
+        for relative_fp in index.get_relative_file_paths()
+    ]
 
     if ext is not None:
         if isinstance(ext, list):
@@ -159,3 +300,25 @@ def get_subdirs(
             sub_dps = sorted(sub_dps)
 
     return sub_dps
+
+
+def get_cache_dp(sub_dn=None):
+    """Return (and create) the directory used to cache derived data.
+
+    The directory is located in the cache directory of the user (e.g.
+    :code:`~/.cache/oneShot` on Linux), so the cached data is reused across
+    Blender sessions.
+    """
+    if sys.platform == "win32":
+        base_dp = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    elif sys.platform == "darwin":
+        base_dp = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base_dp = os.environ.get(
+            "XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache"))
+        )
+    cache_dp = os.path.join(base_dp, "oneShot")
+    if sub_dn is not None:
+        cache_dp = os.path.join(cache_dp, sub_dn)
+    os.makedirs(cache_dp, exist_ok=True)
+    return cache_dp
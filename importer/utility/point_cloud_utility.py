@@ -0,0 +1,270 @@
+import numpy as np
+from ..opengl.octree import compute_morton_codes
+
+
+def _compute_voxel_keys(coords, voxel_size):
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    cells = np.floor((coords - coords.min(axis=0)) / voxel_size).astype(
+        np.int64
+    )
+    dims = cells.max(axis=0) + 1
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) < 2**62:
+        # Hash the cells with a linear index, which is much faster than
+        # computing unique rows
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    return cells
+
+
+def compute_voxel_indices(coords, voxel_size):
+    """Return a unique key per voxel and the inverse index of each point.
+
+    The returned inverse array maps each point to the index of its voxel.
+    """
+    keys = _compute_voxel_keys(coords, voxel_size)
+    return np.unique(keys, axis=0, return_inverse=True)
+
+
+def count_occupied_voxels(coords, voxel_size):
+    """Return the number of voxels containing at least one point."""
+    keys = _compute_voxel_keys(coords, voxel_size)
+    if keys.ndim > 1:
+        return len(np.unique(keys, axis=0))
+    keys = np.sort(keys)
+    return 1 + np.count_nonzero(keys[1:] != keys[:-1])
+
+
+def _count_occupied_voxels_per_level(coords, max_depth=21):
+    # Sort the points once by their Morton code (w.r.t. the finest grid).
+    # Then, the number of occupied voxels of each (power of two) level is
+    # the number of distinct code prefixes.
+    bbox_min = coords.min(axis=0)
+    extent = max(float(np.max(coords.max(axis=0) - bbox_min)), 1e-6)
+    cells = np.floor((coords - bbox_min) / extent * (1 << max_depth))
+    cells = np.clip(cells, 0, (1 << max_depth) - 1).astype(np.int64)
+    codes = np.sort(compute_morton_codes(cells))
+    counts = []
+    for level in range(max_depth + 1):
+        shift = np.uint64(3 * (max_depth - level))
+        prefixes = codes >> shift
+        counts.append(1 + np.count_nonzero(prefixes[1:] != prefixes[:-1]))
+    return extent, counts
+
+
+def compute_voxel_size_for_point_budget(coords, point_budget, iterations=6):
+    """Determine a voxel size that reduces the points to the given budget.
+
+    Returns a voxel size that results in at most :code:`point_budget`
+    occupied voxels (or None, if the points are already within the budget).
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    if len(coords) <= point_budget:
+        return None
+
+    # Determine the finest power of two grid within the budget. This
+    # requires only a single sort of the points.
+    extent, counts = _count_occupied_voxels_per_level(coords)
+    level = max(
+        level for level, count in enumerate(counts) if count <= point_budget
+    )
+    # Use a slightly larger voxel size, since the grids of the voxel grid
+    # downsampling are not aligned with the Morton grid
+    upper_bound = extent / 2**level * 1.01
+    lower_bound = upper_bound / 2
+
+    # Refine the voxel size with a bisection (in log space)
+    for _ in range(iterations):
+        voxel_size = np.sqrt(lower_bound * upper_bound)
+        if count_occupied_voxels(coords, voxel_size) > point_budget:
+            lower_bound = voxel_size
+        else:
+            upper_bound = voxel_size
+    if count_occupied_voxels(coords, upper_bound) > point_budget:
+        # The initial upper bound may violate the budget due to the grid
+        # alignment, use the next coarser grid in this case
+        upper_bound = extent / 2 ** max(level - 1, 0) * 1.01
+    return upper_bound
+
+
+def downsample_with_voxel_grid(coords, colors, voxel_size):
+    """Replace the points in each voxel with their mean position and color.
+
+    The colors must be provided as (n, k) array, the result is returned with
+    the same dtype.
+    """
+    coords = np.asarray(coords).reshape(-1, 3)
+    colors = np.asarray(colors)
+    if len(coords) == 0:
+        return coords, colors
+    _, inverse = compute_voxel_indices(coords, voxel_size)
+    inverse = inverse.ravel()
+    num_voxels = inverse.max() + 1
+    counts = np.bincount(inverse, minlength=num_voxels).astype(np.float64)
+
+    def _compute_means(values):
+        sums = [
+            np.bincount(inverse, weights=values[:, i], minlength=num_voxels)
+            for i in range(values.shape[1])
+        ]
+        return np.stack(sums, axis=1) / counts[:, np.newaxis]
+
+    mean_coords = _compute_means(coords.astype(np.float64))
+    mean_colors = _compute_means(colors.astype(np.float64))
+    if np.issubdtype(colors.dtype, np.integer):
+        mean_colors = np.round(mean_colors)
+    return (
+        mean_coords.astype(coords.dtype),
+        mean_colors.astype(colors.dtype),
+    )
+
+
+def compute_grid_neighbor_counts(coords, cell_size, chunk_size=2**20):
+    """Count the neighbors of each point using a uniform grid.
+
+    The neighbors of a point are the other points in the 3 x 3 x 3 cells
+    around the point's cell. The counts are computed per occupied cell, i.e.
+    the memory usage is linear in the number of points. The points and the
+    cells are processed in chunks to limit the size of temporary arrays.
+    """
+    coords = np.asarray(coords).reshape(-1, 3)
+    num_points = len(coords)
+    if num_points == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    bbox_min = coords.min(axis=0).astype(np.float64)
+    bbox_max = coords.max(axis=0).astype(np.float64)
+    # Add a margin of one cell, so neighbor cells have non-negative indices
+    dims = np.floor((bbox_max - bbox_min) / cell_size).astype(np.int64) + 3
+
+    def _compute_keys(cells):
+        return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    point_keys = np.empty(num_points, dtype=np.int64)
+    for start in range(0, num_points, chunk_size):
+        chunk = coords[start : start + chunk_size].astype(np.float64)
+        cells = np.floor((chunk - bbox_min) / cell_size).astype(np.int64) + 1
+        point_keys[start : start + chunk_size] = _compute_keys(cells)
+
+    cell_keys, inverse, cell_counts = np.unique(
+        point_keys, return_inverse=True, return_counts=True
+    )
+    del point_keys
+    inverse = inverse.ravel()
+    num_cells = len(cell_keys)
+
+    offsets = np.array(list(np.ndindex(3, 3, 3)), dtype=np.int64) - 1
+    neighborhood_counts = np.zeros(num_cells, dtype=np.int64)
+    for start in range(0, num_cells, chunk_size):
+        chunk_keys = cell_keys[start : start + chunk_size]
+        chunk_counts = neighborhood_counts[start : start + chunk_size]
+        # Recover the cell indices from the keys
+        chunk_cells = np.stack(
+            [
+                chunk_keys // (dims[1] * dims[2]),
+                chunk_keys // dims[2] % dims[1],
+                chunk_keys % dims[2],
+            ],
+            axis=1,
+        )
+        for offset in offsets:
+            neighbor_keys = _compute_keys(chunk_cells + offset)
+            indices = np.searchsorted(cell_keys, neighbor_keys)
+            indices = np.minimum(indices, num_cells - 1)
+            is_occupied = cell_keys[indices] == neighbor_keys
+            chunk_counts[is_occupied] += cell_counts[indices[is_occupied]]
+
+    # Do not count the point itself
+    return neighborhood_counts[inverse] - 1
+
+
+def compute_outlier_mask(coords, radius=None, min_neighbors=3):
+    """Return a boolean mask marking points with too few neighbors.
+
+    The neighbors are determined with a grid with a cell size equal to the
+    radius (see :code:`compute_grid_neighbor_counts()`). If no radius is
+    provided, the radius is chosen such that the occupied cells contain on
+    average eight points.
+    """
+    coords = np.asarray(coords).reshape(-1, 3)
+    if radius is None:
+        radius = compute_voxel_size_for_point_budget(
+            coords, max(len(coords) // 8, 1)
+        )
+        if radius is None:
+            return np.zeros(len(coords), dtype=bool)
+    return compute_grid_neighbor_counts(coords, radius) < min_neighbors
+
+
+def compute_centroid(coords, chunk_size=2**20):
+    """Compute the centroid of the coordinates in double precision.
+
+    The coordinates are summed in chunks, i.e. no float64 copy of the full
+    array is created.
+    """
+    coords = np.asarray(coords).reshape(-1, 3)
+    if len(coords) == 0:
+        return np.zeros(3, dtype=np.float64)
+    coord_sum = np.zeros(3, dtype=np.float64)
+    for start in range(0, len(coords), chunk_size):
+        coord_sum += coords[start : start + chunk_size].sum(
+            axis=0, dtype=np.float64
+        )
+    return coord_sum / len(coords)
+
+
+def compute_similarity_transform(scale=1.0, rotation=None, translation=None):
+    """Return the 4x4 matrix of x -> scale * rotation * x + translation."""
+    transform = np.identity(4, dtype=np.float64)
+    if rotation is not None:
+        transform[0:3, 0:3] = rotation
+    transform[0:3, 0:3] *= scale
+    if translation is not None:
+        transform[0:3, 3] = translation
+    return transform
+
+
+def apply_similarity_transform(
+    coords, scale=1.0, rotation=None, translation=None, chunk_size=2**20
+):
+    """Transform the coordinates in place and return the 4x4 transform.
+
+    The coordinates must be a writeable (n, 3) float array. They are
+    transformed in chunks to limit the size of temporary arrays.
+    """
+    transform = compute_similarity_transform(scale, rotation, translation)
+    linear = transform[0:3, 0:3].astype(coords.dtype)
+    offset = transform[0:3, 3].astype(coords.dtype)
+    is_identity = np.array_equal(transform[0:3, 0:3], np.identity(3))
+    for start in range(0, len(coords), chunk_size):
+        chunk = coords[start : start + chunk_size]
+        if not is_identity:
+            chunk[:] = chunk @ linear.T
+        chunk += offset
+    return transform
+
+
+def center_coords(coords, chunk_size=2**20):
+    """Subtract the centroid from the coordinates (in place).
+
+    Returns the applied transform (i.e. a translation by the negative
+    centroid), which allows to transform other data (e.g. cameras)
+    consistently.
+    """
+    centroid = compute_centroid(coords, chunk_size)
+    return apply_similarity_transform(
+        coords, translation=-centroid, chunk_size=chunk_size
+    )
+
+
+def scale_coords(coords, scale, center=None, chunk_size=2**20):
+    """Scale the coordinates (in place) w.r.t. the given center.
+
+    Returns the applied transform. If no center is provided, the origin is
+    used.
+    """
+    translation = None
+    if center is not None:
+        center = np.asarray(center, dtype=np.float64)
+        translation = center - scale * center
+    return apply_similarity_transform(
+        coords, scale=scale, translation=translation, chunk_size=chunk_size
+    )
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+def compute_quaternion_rotation_matrices(quaternions):
+    """Convert (n, 4) quaternions (w, x, y, z) to (n, 3, 3) rotation matrices.
+
+    The quaternions are normalized, quaternions with zero length result in
+    identity matrices.
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    norms = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    is_zero = norms[:, 0] == 0
+    quaternions = quaternions / np.where(norms > 0, norms, 1)
+    quaternions[is_zero] = (1, 0, 0, 0)
+    w, x, y, z = quaternions.T
+    rotation_mats = np.empty((len(quaternions), 3, 3), dtype=np.float64)
+    rotation_mats[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    rotation_mats[:, 0, 1] = 2 * (x * y - w * z)
+    rotation_mats[:, 0, 2] = 2 * (x * z + w * y)
+    rotation_mats[:, 1, 0] = 2 * (x * y + w * z)
+    rotation_mats[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    rotation_mats[:, 1, 2] = 2 * (y * z - w * x)
+    rotation_mats[:, 2, 0] = 2 * (x * z - w * y)
+    rotation_mats[:, 2, 1] = 2 * (y * z + w * x)
+    rotation_mats[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return rotation_mats
+
+
+def compute_rotation_matrix_quaternions(rotation_matrices):
+    """Convert (n, 3, 3) rotation matrices to (n, 4) quaternions (w, x, y, z).
+
+    Uses the numerically stable branch of each matrix (i.e. the largest of
+    the diagonal elements and the trace). The returned quaternions have a
+    non-negative w component.
+    """
+    mats = np.asarray(rotation_matrices, dtype=np.float64).reshape(-1, 3, 3)
+    m00, m11, m22 = mats[:, 0, 0], mats[:, 1, 1], mats[:, 2, 2]
+    # Four times the squares of w, x, y and z
+    squares = np.stack(
+        [
+            1 + m00 + m11 + m22,
+            1 + m00 - m11 - m22,
+            1 - m00 + m11 - m22,
+            1 - m00 - m11 + m22,
+        ],
+        axis=1,
+    )
+    # Products of two components (times four) derived from the off-diagonal
+    # elements, e.g. 4wx = m21 - m12 and 4xy = m10 + m01
+    diffs = [
+        mats[:, 2, 1] - mats[:, 1, 2],
+        mats[:, 0, 2] - mats[:, 2, 0],
+        mats[:, 1, 0] - mats[:, 0, 1],
+    ]
+    sums = [
+        mats[:, 1, 0] + mats[:, 0, 1],
+        mats[:, 0, 2] + mats[:, 2, 0],
+        mats[:, 2, 1] + mats[:, 1, 2],
+    ]
+    products = np.stack(
+        [
+            np.stack([squares[:, 0], diffs[0], diffs[1], diffs[2]], axis=1),
+            np.stack([diffs[0], squares[:, 1], sums[0], sums[1]], axis=1),
+            np.stack([diffs[1], sums[0], squares[:, 2], sums[2]], axis=1),
+            np.stack([diffs[2], sums[1], sums[2], squares[:, 3]], axis=1),
+        ],
+        axis=1,
+    )
+    # Divide the products of the largest component by its magnitude
+    largest = np.argmax(squares, axis=1)
+    indices = np.arange(len(mats))
+    quaternions = products[indices, largest] / (
+        2 * np.sqrt(np.maximum(squares[indices, largest], 1e-300))
+    )[:, np.newaxis]
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions[quaternions[:, 0] < 0] *= -1
+    return quaternions
+
+
+def compute_camera_centers(rotation_mats, translation_vecs):
+    """Return the camera centers C = -R^T t of (n) world to camera poses."""
+    return -np.einsum("nji,nj->ni", rotation_mats, translation_vecs)
+
+
+def compute_translation_vecs(rotation_mats, centers):
+    """Return the translation vectors t = -R C of (n) camera poses."""
+    return -np.einsum("nij,nj->ni", rotation_mats, centers)
+
+
+def compute_world_to_cam_mats(rotation_mats, translation_vecs):
+    """Return (n, 4, 4) matrices mapping world to camera coordinates.
+
+    M = [R  t]
+        [0  1]
+    """
+    mats = np.zeros((len(rotation_mats), 4, 4), dtype=np.float64)
+    mats[:, 0:3, 0:3] = rotation_mats
+    mats[:, 0:3, 3] = translation_vecs
+    mats[:, 3, 3] = 1
+    return mats
+
+
+def compute_cam_to_world_mats(rotation_mats, centers):
+    """Return (n, 4, 4) matrices mapping camera to world coordinates.
+
+    M = [R^T  C]
+        [0    1]
+    """
+    mats = np.zeros((len(rotation_mats), 4, 4), dtype=np.float64)
+    mats[:, 0:3, 0:3] = np.transpose(rotation_mats, (0, 2, 1))
+    mats[:, 0:3, 3] = centers
+    mats[:, 3, 3] = 1
+    return mats
+
+
+def invert_camera_y_and_z_axes(cam_to_world_mats):
+    """Convert camera to world matrices between CV and Blender cameras.
+
+    Computer vision cameras look along the positive z axis (with the y axis
+    pointing down), while Blender cameras look along the negative z axis.
+    Inverting the y and z axis of the camera coordinate system (i.e. a
+    rotation by 180 degrees around the x axis) converts between both.
+    """
+    mats = np.array(cam_to_world_mats, dtype=np.float64)
+    mats[:, 0:3, 1:3] *= -1
+    return mats
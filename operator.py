@@ -3,9 +3,20 @@ import threading
 import time
 import subprocess
 import os
+import hashlib
 import shutil
 from pathlib import Path
 from .importer import import_colmap_scene
+from .importer.importers.camera_utility import (
+    is_camera_frustum_object,
+    get_selected_frustum_camera_index,
+    add_camera_object_from_frustums,
+)
+from .importer.blender_utility.image_utility import (
+    get_object_images,
+    load_full_resolution_image,
+)
+from .importer.utility.os_utility import get_file_paths_in_dir
 import datetime
 import mathutils
 import math
@@ -13,6 +24,8 @@ import math
 _background_thread = None
 _current_process = None
 _process_terminated_by_user = False
+_proxy_process = None # FFmpeg process of the video proxy generation (independent of the reconstruction)
+_proxy_terminated_by_user = False
 _video_resolution = None # Global variable to store video resolution
 _last_successful_path = None # Global variable to store the path of the last successful reconstruction
 
@@ -101,11 +114,9 @@ def run_photogrammetry_process(context, settings, is_video: bool):
             print("oneShot: Frame extraction complete.")
         else:
             print("oneShot: Input is an image sequence. Copying files...")
-            for item in os.listdir(settings.input_path):
-                s = os.path.join(settings.input_path, item)
-                d = os.path.join(images_path, item)
-                if os.path.isfile(s):
-                    shutil.copy2(s, d)
+            for s in get_file_paths_in_dir(settings.input_path):
+                d = os.path.join(images_path, os.path.basename(s))
+                shutil.copy2(s, d)
             print("oneShot: Image copy complete.")
 
         print("oneShot: Starting COLMAP Feature Extraction process...") # NEW LINE
@@ -333,68 +344,233 @@ class ONESHOT_OT_stop_process(bpy.types.Operator):
     bl_description = "Stops the current photogrammetry process"
 
     def execute(self, context):
-        global _current_process, _process_terminated_by_user
+        global _current_process, _process_terminated_by_user, _proxy_terminated_by_user
+        stopped_process = False
         if _current_process and _current_process.poll() is None: # Check if process is running
             _process_terminated_by_user = True
             _current_process.terminate() # Request graceful termination
             self.report({'INFO'}, "Photogrammetry process termination requested.")
-        else:
+            stopped_process = True
+        if _proxy_process and _proxy_process.poll() is None:
+            _proxy_terminated_by_user = True
+            _proxy_process.terminate()
+            self.report({'INFO'}, "Video proxy generation termination requested.")
+            stopped_process = True
+        if not stopped_process:
             self.report({'INFO'}, "No photogrammetry process is currently currently running.")
         return {'FINISHED'}
 
 
+class ONESHOT_OT_spawn_camera_from_frustums(bpy.types.Operator):
+    bl_idname = "oneshot.spawn_camera_from_frustums"
+    bl_label = "Spawn Camera from Frustum"
+    bl_description = "Creates a camera object for the selected frustum of the active frustum mesh (select a vertex in edit mode)"
+
+    camera_index: bpy.props.IntProperty(name="Camera Index", default=-1, min=-1, description="Index of the camera. A value of -1 uses the selected vertex")
+
+    @classmethod
+    def poll(cls, context):
+        return is_camera_frustum_object(context.active_object)
+
+    def execute(self, context):
+        frustum_obj = context.active_object
+        camera_index = self.camera_index
+        if camera_index < 0:
+            camera_index = get_selected_frustum_camera_index(frustum_obj)
+        num_cameras = len(frustum_obj["camera_names"])
+        if camera_index is None or camera_index >= num_cameras:
+            self.report({'ERROR'}, "Select a vertex of a frustum or provide a valid camera index.")
+            return {'CANCELLED'}
+
+        if frustum_obj.mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        camera_object = add_camera_object_from_frustums(frustum_obj, camera_index)
+        self.report({'INFO'}, f"Created camera {camera_object.name}")
+        return {'FINISHED'}
+
+
+class ONESHOT_OT_load_full_resolution_images(bpy.types.Operator):
+    bl_idname = "oneshot.load_full_resolution_images"
+    bl_label = "Load Full Resolution Images"
+    bl_description = "Replaces the downscaled background images and image plane textures of the selected objects with the original images"
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.selected_objects) > 0
+
+    def execute(self, context):
+        num_images = 0
+        for obj in context.selected_objects:
+            for blender_image in get_object_images(obj):
+                if load_full_resolution_image(blender_image):
+                    num_images += 1
+        self.report({'INFO'}, f"Loaded {num_images} full resolution images")
+        return {'FINISHED'}
+
+
+_VIDEO_PROXY_SIZES = (25, 50, 75) # Proxy sizes in percent of the original resolution
+_ORIGINAL_CLIP_FP_PROPERTY = "oneshot_original_fp" # Path of the original video of a clip using a proxy
+_proxy_thread = None
+_proxy_results = None # List of (clip name, proxy paths by size, error message) of the last proxy generation
+
+def compute_video_source_hash(video_path, chunk_size=1 << 20):
+    # Hashing the full video would take about as long as decoding it, thus only the size and the first and last chunk are hashed
+    hasher = hashlib.sha1()
+    file_size = os.path.getsize(video_path)
+    hasher.update(str(file_size).encode("utf-8"))
+    with open(video_path, "rb") as video_file:
+        hasher.update(video_file.read(chunk_size))
+        if file_size > chunk_size:
+            video_file.seek(max(file_size - chunk_size, chunk_size))
+            hasher.update(video_file.read(chunk_size))
+    return hasher.hexdigest()
+
+def get_video_proxy_paths(video_path):
+    proxy_dir = Path(video_path).parent / "proxy"
+    video_name = Path(video_path).stem
+    return {size: proxy_dir / f"{video_name}_proxy_{size}.mp4" for size in _VIDEO_PROXY_SIZES}
+
+def generate_video_proxies(context, ffmpeg_path, video_path, num_frames):
+    global _proxy_process
+    proxy_paths = get_video_proxy_paths(video_path)
+    proxy_dir = Path(video_path).parent / "proxy"
+    proxy_dir.mkdir(parents=True, exist_ok=True)
+    hash_path = proxy_dir / f"{Path(video_path).stem}_proxy.sha1"
+
+    source_hash = compute_video_source_hash(video_path)
+    if hash_path.exists() and hash_path.read_text().strip() == source_hash and all(proxy_path.exists() for proxy_path in proxy_paths.values()):
+        print(f"oneShot: Reusing existing video proxies of {video_path}")
+        return proxy_paths
+    if hash_path.exists():
+        hash_path.unlink() # The proxies are outdated
+
+    # Decode the video once and split the frames into one scaled branch per proxy size
+    split_labels = "".join(f"[v{size}]" for size in _VIDEO_PROXY_SIZES)
+    filter_parts = [f"[0:v]split={len(_VIDEO_PROXY_SIZES)}{split_labels}"]
+    for size in _VIDEO_PROXY_SIZES:
+        # libx264 requires even dimensions
+        filter_parts.append(f"[v{size}]scale=trunc(iw*{size}/200)*2:trunc(ih*{size}/200)*2[out{size}]")
+    tmp_proxy_paths = {size: proxy_path.with_name(proxy_path.stem + ".tmp.mp4") for size, proxy_path in proxy_paths.items()}
+    command = [ffmpeg_path, "-y", "-nostats", "-loglevel", "error", "-progress", "pipe:1", "-i", video_path, "-filter_complex", ";".join(filter_parts)]
+    for size, tmp_proxy_path in tmp_proxy_paths.items():
+        command += ["-map", f"[out{size}]", "-c:v", "libx264", "-crf", "23", "-preset", "medium", str(tmp_proxy_path)]
+    print(f"oneShot: Running FFmpeg proxy command: {' '.join(command)}")
+
+    # Read the errors from the same pipe, a separate stderr pipe could fill up and block FFmpeg
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace')
+    _proxy_process = process # Assign to global (allows to stop the process)
+    error_lines = []
+    for line in process.stdout:
+        line = line.strip()
+        if line.startswith("frame="):
+            frame = line.split("=", 1)[1]
+            context.window_manager.oneshot_progress_detail = f"{Path(video_path).name}: Frame {frame} / {num_frames}"
+        elif line and not ("=" in line and " " not in line): # Skip the other progress (key=value) lines
+            error_lines = (error_lines + [line])[-20:]
+    if process.wait() != 0:
+        for tmp_proxy_path in tmp_proxy_paths.values():
+            if tmp_proxy_path.exists():
+                tmp_proxy_path.unlink()
+        if _proxy_terminated_by_user:
+            raise RuntimeError("Proxy generation stopped by user.")
+        raise RuntimeError("FFmpeg proxy generation failed: " + "\n".join(error_lines))
+
+    for size, tmp_proxy_path in tmp_proxy_paths.items():
+        os.replace(tmp_proxy_path, proxy_paths[size])
+    hash_path.write_text(source_hash)
+    return proxy_paths
+
+def run_video_proxy_generation(context, ffmpeg_path, jobs):
+    global _proxy_process, _proxy_terminated_by_user, _proxy_results
+    _proxy_terminated_by_user = False # Reset flag for each new run
+    results = []
+    try:
+        for index, (clip_name, video_path, num_frames) in enumerate(jobs):
+            context.window_manager.oneshot_progress = f"Generating video proxies ({index + 1}/{len(jobs)})..."
+            try:
+                proxy_paths = generate_video_proxies(context, ffmpeg_path, video_path, num_frames)
+                results.append((clip_name, proxy_paths, None))
+            except Exception as e:
+                print(f"oneShot: Error during proxy generation: {e}")
+                results.append((clip_name, None, str(e)))
+            if _proxy_terminated_by_user:
+                break
+    finally:
+        _proxy_process = None # Clear global process reference
+        _proxy_terminated_by_user = False # Reset flag
+        _proxy_results = results
+
+class ONESHOT_OT_video_proxy_monitor(bpy.types.Operator):
+    bl_idname = "oneshot.video_proxy_monitor"
+    bl_label = "Monitor Video Proxy Generation"
+
+    _timer = None
+    _thread = None
+
+    def invoke(self, context, event):
+        self._thread = _proxy_thread
+
+        if not self._thread or not self._thread.is_alive():
+            self.report({'INFO'}, "Proxy generation not running.")
+            return {'FINISHED'}
+
+        self._timer = context.window_manager.event_timer_add(0.1, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'TIMER':
+            if not self._thread.is_alive():
+                context.window_manager.event_timer_remove(self._timer)
+                global _proxy_thread, _proxy_results
+                _proxy_thread = None
+                self.apply_video_proxies(context, _proxy_results or [])
+                _proxy_results = None
+                return {'FINISHED'}
+            elif context.area:
+                context.area.tag_redraw()
+        return {'PASS_THROUGH'}
+
+    def cancel(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+
+    def apply_video_proxies(self, context, results):
+        proxy_size = int(context.scene.oneshot_settings.video_proxy_size)
+        for clip_name, proxy_paths, error in results:
+            if error is not None:
+                self.report({'ERROR'}, f"Video proxy generation failed for {clip_name}: {error}")
+                continue
+            clip = bpy.data.movieclips.get(clip_name)
+            if clip is None:
+                continue
+            clip.filepath = str(proxy_paths[proxy_size])
+            print(f"oneShot: Updated Animated Camera movie clip filepath to: {clip.filepath}")
+            self.report({'INFO'}, f"Applied video proxy: {clip.filepath}")
+        context.window_manager.oneshot_progress = "Video proxies ready."
+        context.window_manager.oneshot_progress_detail = ""
+
+
 class ONESHOT_OT_optimise_scene(bpy.types.Operator):
     bl_idname = "oneshot.optimise_scene"
     bl_label = "Optimise Scene"
     bl_description = "Optimises the imported scene for better viewing"
 
     def execute(self, context):
-        # 0. Video Proxy Generation
+        # 0. Video Proxy Generation (in a background thread, the proxies are applied by the monitor operator)
         print("oneShot: Starting video proxy generation...")
+        jobs = []
         if "Animated Camera" in bpy.data.objects:
             animated_camera = bpy.data.objects["Animated Camera"]
             if animated_camera.data and animated_camera.data.background_images:
                 for bg_img in animated_camera.data.background_images:
                     if bg_img.source == 'MOVIE' and bg_img.clip:
-                        original_video_path = bpy.path.abspath(bg_img.clip.filepath)
+                        # Always create the proxies from the original video (and not from a previously applied proxy)
+                        if _ORIGINAL_CLIP_FP_PROPERTY not in bg_img.clip:
+                            bg_img.clip[_ORIGINAL_CLIP_FP_PROPERTY] = bpy.path.abspath(bg_img.clip.filepath)
+                        original_video_path = bg_img.clip[_ORIGINAL_CLIP_FP_PROPERTY]
                         print(f"oneShot: Original video path: {original_video_path}")
                         if os.path.exists(original_video_path):
-                            video_dir = Path(original_video_path).parent
-                            proxy_dir = video_dir / "proxy"
-                            proxy_dir.mkdir(parents=True, exist_ok=True)
-                            print(f"oneShot: Proxy directory created: {proxy_dir}")
-                            
-                            video_name = Path(original_video_path).stem
-                            proxy_video_path = proxy_dir / f"{video_name}_proxy.mp4"
-                            print(f"oneShot: Proxy video output path: {proxy_video_path}")
-
-                            ffmpeg_path = context.preferences.addons[__package__].preferences.ffmpeg_executable_path
-                            print(f"oneShot: FFmpeg executable path: {ffmpeg_path}")
-                            
-                            command = [
-                                ffmpeg_path,
-                                "-i", original_video_path,
-                                "-vf", "scale=iw/2:ih/2",
-                                "-c:v", "libx264",
-                                "-crf", "23",
-                                "-preset", "medium",
-                                "-y", # Overwrite output file without asking
-                                str(proxy_video_path)
-                            ]
-                            print(f"oneShot: Running FFmpeg proxy command: {' '.join(command)}")
-                            try:
-                                subprocess.run(command, check=True, capture_output=True, text=True)
-                                print(f"oneShot: Video proxy generated successfully: {proxy_video_path}")
-                                bg_img.clip.filepath = str(proxy_video_path)
-                                print(f"oneShot: Updated Animated Camera movie clip filepath to: {bg_img.clip.filepath}")
-                                self.report({'INFO'}, f"Generated and applied video proxy: {proxy_video_path}")
-                            except subprocess.CalledProcessError as e:
-                                self.report({'ERROR'}, f"FFmpeg proxy generation failed: {e.stderr}")
-                                print(f"oneShot: FFmpeg proxy generation failed. Stderr: {e.stderr}")
-                                print(f"oneShot: FFmpeg proxy generation failed. Stdout: {e.stdout}")
-                            except Exception as e:
-                                self.report({'ERROR'}, f"Error during proxy generation: {e}")
-                                print(f"oneShot: Error during proxy generation: {e}")
+                            jobs.append((bg_img.clip.name, original_video_path, bg_img.clip.frame_duration))
                         else:
                             self.report({'WARNING'}, f"Original video not found: {original_video_path}")
                             print(f"oneShot: Warning: Original video not found at {original_video_path}. Skipping proxy generation.")
@@ -404,7 +580,17 @@ class ONESHOT_OT_optimise_scene(bpy.types.Operator):
         else:
             self.report({'WARNING'}, "'Animated Camera' object not found for proxy generation.")
             print("oneShot: Warning: 'Animated Camera' object not found. Skipping proxy generation.")
-        print("oneShot: Video proxy generation finished.")
+
+        global _proxy_thread
+        if jobs and _proxy_thread and _proxy_thread.is_alive():
+            self.report({'WARNING'}, "Video proxy generation is already running.")
+        elif jobs:
+            ffmpeg_path = context.preferences.addons[__package__].preferences.ffmpeg_executable_path
+            print(f"oneShot: FFmpeg executable path: {ffmpeg_path}")
+            _proxy_thread = threading.Thread(target=run_video_proxy_generation, args=(context, ffmpeg_path, jobs))
+            _proxy_thread.start()
+            bpy.ops.oneshot.video_proxy_monitor('INVOKE_DEFAULT')
+            print("oneShot: Video proxy generation started in the background.")
 
         # 1. Find the "Cameras" collection and hide it from the viewport.
         print("oneShot: Hiding 'Cameras' collection...")
@@ -30,23 +30,95 @@ class PhotogrammetrySettings(PropertyGroup):
     # Advanced Settings
     use_workspace_images: BoolProperty(name="Use Workspace Images", default=True)
     import_cameras: BoolProperty(name="Import Cameras", default=True)
+    camera_display_mode: EnumProperty(
+        name="Camera Display Mode",
+        items=[
+            ('OBJECTS', 'Camera Objects', 'One camera object per image'),
+            ('FRUSTUM_MESH', 'Frustum Mesh', 'A single mesh of frustum wireframes for all cameras (no background images, image planes or depth maps)'),
+        ],
+        default='OBJECTS',
+        description="Use a single frustum mesh to represent thousands of cameras (e.g. of video reconstructions)"
+    )
     initial_camera_extent: FloatProperty(name="Initial Camera Extent (in Blender Units)", default=1.0)
     add_background_image_for_each_camera: BoolProperty(name="Add a Background Image for each Camera", default=True)
+    share_camera_data: BoolProperty(name="Share Camera Data", default=True, description="Cameras with equal intrinsics share the same camera data. Only takes effect if background images are disabled (for large camera sets, disable them or use the frustum mesh display mode)")
+    background_image_resolution: EnumProperty(
+        name="Image Resolution",
+        items=[
+            ('FULL', 'Full', 'Use the original images'),
+            ('HALF', 'Half', 'Use images with half resolution'),
+            ('QUARTER', 'Quarter', 'Use images with a quarter resolution'),
+            ('EIGHTH', 'Eighth', 'Use images with an eighth resolution'),
+        ],
+        default='HALF',
+        description="Resolution of the background images and image plane textures. Reduced resolutions use cached, downscaled copies created in parallel during the import"
+    )
     add_image_plane_for_each_camera: BoolProperty(name="Add an Image Plane for each Camera", default=False)
     add_depth_maps: BoolProperty(name="Add Depth Maps (EXPERIMENTAL)", default=False)
     add_camera_motion_as_animation: BoolProperty(name="Add Camera Motion as Animation", default=True)
     add_background_images_for_animated_camera: BoolProperty(name="Add Background Images for the Animated Camera", default=True)
     adjust_frame_numbers_of_camera_animation: BoolProperty(name="Adjust Frame Numbers of Camera Animation", default=True)
+    undistorted_image_transfer_mode: EnumProperty(
+        name="Reorganized Images",
+        items=[
+            ('AUTO', 'Link or Copy', 'Use reflinks or hard links (if supported by the file system), otherwise copy the images'),
+            ('COPY', 'Copy', 'Copy the images'),
+            ('SYMLINK', 'Virtual Sequence', 'Use symbolic links to the original images (i.e. no copies)'),
+        ],
+        default='AUTO',
+        description="Determines how reorganized undistorted workspace images are written. Unchanged images of previous imports are reused"
+    )
+    video_proxy_size: EnumProperty(
+        name="Video Proxy Size",
+        items=[
+            ('25', '25%', 'Use the proxy with 25% of the original resolution'),
+            ('50', '50%', 'Use the proxy with 50% of the original resolution'),
+            ('75', '75%', 'Use the proxy with 75% of the original resolution'),
+        ],
+        default='50',
+        description="Proxy of the background video used by the animated camera after optimising the scene. All proxy sizes are created in a single pass and reused while the video is unchanged"
+    )
     interpolation_type: EnumProperty(name="Interpolation", items=[('LINEAR', 'Linear', ''), ('BEZIER', 'Bezier', ''), ('SINE', 'Sine', '')], default='LINEAR')
     remove_rotation_discontinuities: BoolProperty(name="Remove Rotation Discontinuities", default=True)
     suppress_distortion_warnings: BoolProperty(name="Suppress Distortion Warnings", default=True)
     adjust_render_settings: BoolProperty(name="Adjust Render Settings", default=True)
     import_points: BoolProperty(name="Import Points", default=True)
     point_cloud_display_sparsity: IntProperty(name="Point Cloud Display Sparsity", default=1, min=1)
+    remove_outlier_points: BoolProperty(name="Remove Outlier Points", default=False, description="Remove points with few neighbors (e.g. floating points of sparse reconstructions)")
+    outlier_radius: FloatProperty(name="Outlier Radius", default=0.0, min=0.0, description="Radius used to count the neighbors of each point. A value of 0 determines the radius from the point density")
+    outlier_min_neighbors: IntProperty(name="Outlier Min Neighbors", default=3, min=1, description="Points with fewer neighbors are removed")
+    voxel_downsampling_mode: EnumProperty(
+        name="Voxel Downsampling",
+        items=[
+            ('NONE', 'None', 'Keep all points'),
+            ('VOXEL_SIZE', 'Voxel Size', 'Use the given voxel size'),
+            ('POINT_BUDGET', 'Point Budget', 'Choose the voxel size to reach the given number of points'),
+        ],
+        default='NONE',
+        description="Reduce the number of points by averaging the positions and colors of the points in each voxel"
+    )
+    voxel_size: FloatProperty(name="Voxel Size", default=0.01, min=1e-6, description="Edge length of the voxels used for downsampling")
+    voxel_point_budget: IntProperty(name="Downsampling Point Budget", default=1000000, min=1, description="Maximum number of points after downsampling")
     center_data_around_origin: BoolProperty(name="Center Data Around Origin", default=False)
     draw_points_in_3d_view_with_opengl: BoolProperty(name="Draw Points in the 3D View with OpenGL", default=True)
     add_point_data_to_point_cloud_handle: BoolProperty(name="Add point data to the point cloud handle.", default=True)
+    compress_opengl_point_data: BoolProperty(
+        name="Compress OpenGL Point Data",
+        default=False,
+        description="Compress the point data stored in the point cloud handle. Reduces the size of the blend file, but increases the time to save and load it"
+    )
     initial_point_size: IntProperty(name="Initial Point Size", default=5, min=1)
+    opengl_point_budget: IntProperty(
+        name="OpenGL Point Budget",
+        default=3000000,
+        min=32768,
+        description="Maximum number of points drawn per redraw. Large point clouds are drawn with a view dependent level of detail"
+    )
+    merge_opengl_point_clouds: BoolProperty(
+        name="Merge OpenGL Point Clouds",
+        default=False,
+        description="Draw all OpenGL point clouds (e.g. many depth maps) with a single draw callback using shared GPU buffers"
+    )
     add_points_as_mesh_object: BoolProperty(name="Add Points as Mesh Object", default=False)
     import_mesh: BoolProperty(name="Import Mesh", default=False)
     adjust_clipping_distance: BoolProperty(name="Adjust Clipping Distance", default=False)
@@ -118,8 +190,13 @@ class ONESHOT_PT_AdvancedSettingsPanel(Panel):
         box_camera = layout.box()
         box_camera.label(text="Import Cameras")
         box_camera.prop(settings, "import_cameras")
+        box_camera.prop(settings, "camera_display_mode")
+        box_camera.operator("oneshot.spawn_camera_from_frustums")
         box_camera.prop(settings, "initial_camera_extent")
         box_camera.prop(settings, "add_background_image_for_each_camera")
+        box_camera.prop(settings, "share_camera_data")
+        box_camera.prop(settings, "background_image_resolution")
+        box_camera.operator("oneshot.load_full_resolution_images")
         box_camera.prop(settings, "add_image_plane_for_each_camera")
         box_camera.prop(settings, "add_depth_maps")
         box_camera.prop(settings, "suppress_distortion_warnings")
@@ -130,6 +207,8 @@ class ONESHOT_PT_AdvancedSettingsPanel(Panel):
         box_anim.prop(settings, "add_camera_motion_as_animation")
         box_anim.prop(settings, "add_background_images_for_animated_camera")
         box_anim.prop(settings, "adjust_frame_numbers_of_camera_animation")
+        box_anim.prop(settings, "undistorted_image_transfer_mode")
+        box_anim.prop(settings, "video_proxy_size")
         box_anim.prop(settings, "interpolation_type")
         box_anim.prop(settings, "remove_rotation_discontinuities")
 
@@ -137,10 +216,22 @@ class ONESHOT_PT_AdvancedSettingsPanel(Panel):
         box_points.label(text="Import Points")
         box_points.prop(settings, "import_points")
         box_points.prop(settings, "point_cloud_display_sparsity")
+        box_points.prop(settings, "remove_outlier_points")
+        if settings.remove_outlier_points:
+            box_points.prop(settings, "outlier_radius")
+            box_points.prop(settings, "outlier_min_neighbors")
+        box_points.prop(settings, "voxel_downsampling_mode")
+        if settings.voxel_downsampling_mode == 'VOXEL_SIZE':
+            box_points.prop(settings, "voxel_size")
+        elif settings.voxel_downsampling_mode == 'POINT_BUDGET':
+            box_points.prop(settings, "voxel_point_budget")
         box_points.prop(settings, "center_data_around_origin")
         box_points.prop(settings, "draw_points_in_3d_view_with_opengl")
         box_points.prop(settings, "add_point_data_to_point_cloud_handle")
+        box_points.prop(settings, "compress_opengl_point_data")
         box_points.prop(settings, "initial_point_size")
+        box_points.prop(settings, "opengl_point_budget")
+        box_points.prop(settings, "merge_opengl_point_clouds")
         box_points.prop(settings, "add_points_as_mesh_object")
 
         layout.prop(settings, "import_mesh")